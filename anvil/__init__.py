@@ -1,9 +1,60 @@
-from .chunk import Chunk
-from .block import Block, OldBlock
-from .region import Region
-from .empty_region import EmptyRegion
-from .empty_chunk import EmptyChunk
-from .base_section import BaseSection
-from .empty_section import EmptySection
-from .raw_section import RawSection
-from .utils import _update_fmt, bin_append
+from importlib import import_module
+
+# Not imported from typing, which alone would take longer to import than this package
+TYPE_CHECKING = False
+
+# Submodules are imported on first use of their names, so importing anvil
+# stays cheap for tools that only need part of it (and pulls in nbt, numpy, etc. lazily)
+_LAZY_NAMES = {
+    'Chunk': '.chunk',
+    'Block': '.block',
+    'OldBlock': '.block',
+    'Region': '.region',
+    'EmptyRegion': '.empty_region',
+    'EmptyChunk': '.empty_chunk',
+    'BaseSection': '.base_section',
+    'EmptySection': '.empty_section',
+    'RawSection': '.raw_section',
+    '_update_fmt': '.utils',
+    'bin_append': '.utils',
+    'EntityChunk': '.entity_chunk',
+    'EntityRegion': '.entity_region',
+    'PoiRegion': '.poi',
+    'PoiRecords': '.poi',
+    'PoiIndex': '.poi',
+    'MutableChunk': '.mutable_chunk',
+    'MutableRegion': '.mutable_region',
+    'Schematic': '.schematic',
+}
+
+__all__ = [name for name in _LAZY_NAMES if not name.startswith('_')]
+
+if TYPE_CHECKING:
+    from .chunk import Chunk
+    from .block import Block, OldBlock
+    from .region import Region
+    from .empty_region import EmptyRegion
+    from .empty_chunk import EmptyChunk
+    from .base_section import BaseSection
+    from .empty_section import EmptySection
+    from .raw_section import RawSection
+    from .utils import _update_fmt, bin_append
+    from .entity_chunk import EntityChunk
+    from .entity_region import EntityRegion
+    from .poi import PoiRegion, PoiRecords, PoiIndex
+    from .mutable_chunk import MutableChunk
+    from .mutable_region import MutableRegion
+    from .schematic import Schematic
+
+def __getattr__(name: str):
+    try:
+        module = _LAZY_NAMES[name]
+    except KeyError:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}') from None
+    value = getattr(import_module(module, __name__), name)
+    # Cache it so this is only called once per name
+    globals()[name] = value
+    return value
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_NAMES))
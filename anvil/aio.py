@@ -0,0 +1,253 @@
+"""
+Asyncio API for reading regions and worlds without blocking the event loop
+
+Regions are opened with :meth:`anvil.Region.open`, which reads chunks with positional reads
+(``os.pread``), and those reads run together with decompression and NBT decoding in an executor,
+so only awaiting happens in the event loop thread.
+"""
+from __future__ import annotations
+from collections import deque
+from collections.abc import AsyncIterator
+from concurrent.futures import Executor
+from pathlib import Path
+import asyncio
+import re
+from .chunk import Chunk
+from .region import Region
+from .errors import ChunkNotFound, EmptyRegionFile
+
+_REGION_NAME = re.compile(r'r\.(-?\d+)\.(-?\d+)\.mca')
+
+def _read_chunk(region: Region, chunk_x: int, chunk_z: int) -> Chunk:
+    nbt_data = region.chunk_data(chunk_x, chunk_z)
+    if nbt_data is None:
+        raise ChunkNotFound(f'Could not find chunk ({chunk_x}, {chunk_z})')
+    return Chunk(nbt_data)
+
+class AsyncRegion:
+    """
+    Region file read asynchronously, only reading the chunks that are asked for
+
+    Attributes
+    ----------
+    path: :class:`pathlib.Path`
+        Path to the region file
+    region: :class:`anvil.Region`
+        The region file, opened with :meth:`anvil.Region.open`
+    concurrency: :class:`int`
+        How many chunks can be read and decoded at the same time
+    executor: :class:`concurrent.futures.Executor` | None
+        Where the blocking work runs, the event loop's default executor if None
+    """
+    __slots__ = ('path', 'region', 'concurrency', 'executor', '_semaphore', '_running', '_closed')
+
+    def __init__(
+            self,
+            path: Path,
+            region: Region,
+            concurrency: int = 8,
+            executor: Executor | None = None,
+            semaphore: asyncio.Semaphore | None = None
+    ):
+        self.path = path
+        self.region = region
+        self.concurrency = concurrency
+        self.executor = executor
+        self._semaphore = semaphore or asyncio.Semaphore(concurrency)
+        # Reads running in the executor, which keep going when whatever awaited them is cancelled
+        self._running: set[asyncio.Future] = set()
+        self._closed = False
+
+    @classmethod
+    async def open(
+            cls,
+            path: str | Path,
+            concurrency: int = 8,
+            executor: Executor | None = None,
+            semaphore: asyncio.Semaphore | None = None
+    ) -> AsyncRegion:
+        """
+        Opens a region file and reads its headers
+
+        Parameters
+        ----------
+        path
+            Path to the region file
+        concurrency
+            How many chunks can be read and decoded at the same time
+        executor
+            Where file reads and decoding run, defaults to the event loop's default executor
+        semaphore
+            Limit shared with other regions, instead of one of their own of ``concurrency``
+
+        Raises
+        ------
+        anvil.errors.EmptyRegionFile
+            If the region file is empty
+        """
+        loop = asyncio.get_running_loop()
+        path = Path(path)
+        region = await loop.run_in_executor(executor, Region.open, path)
+        return cls(path, region, concurrency=concurrency, executor=executor, semaphore=semaphore)
+
+    async def close(self):
+        """Closes the region file, once the reads already running in the executor are done"""
+        self._closed = True
+        while self._running:
+            await asyncio.wait(set(self._running))
+        self.region.close()
+
+    async def __aenter__(self) -> AsyncRegion:
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def generated_chunks(self) -> list[tuple[int, int]]:
+        """Refer to :meth:`anvil.Region.generated_chunks`"""
+        return self.region.generated_chunks()
+
+    async def chunk(self, chunk_x: int, chunk_z: int) -> Chunk:
+        """
+        Reads and decodes a chunk
+
+        Parameters
+        ----------
+        chunk_x
+            Chunk's X value
+        chunk_z
+            Chunk's Z value
+
+        Raises
+        ------
+        anvil.ChunkNotFound
+            If the chunk hasn't been generated yet
+        anvil.errors.CorruptedData
+            If the chunk data is corrupted or cannot be decoded
+        ValueError
+            If the region is closed
+        """
+        if self.region.chunk_location(chunk_x, chunk_z) == (0, 0):
+            raise ChunkNotFound(f'Could not find chunk ({chunk_x}, {chunk_z})')
+        loop = asyncio.get_running_loop()
+        await self._semaphore.acquire()
+        if self._closed:
+            self._semaphore.release()
+            raise ValueError('Region is closed')
+        future = loop.run_in_executor(self.executor, _read_chunk, self.region, chunk_x, chunk_z)
+        self._running.add(future)
+        future.add_done_callback(self._finished)
+        # Cancelling the caller doesn't stop the read, which keeps its place in the
+        # semaphore until it is done, and close() waits for it
+        return await asyncio.shield(future)
+
+    def _finished(self, future: asyncio.Future):
+        self._running.discard(future)
+        self._semaphore.release()
+        if not future.cancelled():
+            # Marks the error as seen when nothing awaits the read anymore
+            future.exception()
+
+    async def chunks(self) -> AsyncIterator[Chunk]:
+        """
+        Iterates over every generated chunk, in the order of the header.
+        Up to :attr:`concurrency` chunks are read ahead while the current one is used
+        """
+        pending: deque[asyncio.Future] = deque()
+        try:
+            for chunk_x, chunk_z in self.generated_chunks():
+                pending.append(asyncio.ensure_future(self.chunk(chunk_x, chunk_z)))
+                if len(pending) >= self.concurrency:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for future in pending:
+                future.cancel()
+
+class AsyncWorld:
+    """
+    Asynchronous reader for the region files of a world (or dimension) folder
+
+    Region files are opened the first time they are used and kept open until :meth:`close`.
+
+    Attributes
+    ----------
+    path: :class:`pathlib.Path`
+        Path to the folder containing the ``.mca`` files, like ``world/region``
+    concurrency: :class:`int`
+        How many chunks can be read and decoded at the same time, shared by every region
+    executor: :class:`concurrent.futures.Executor` | None
+        Where the blocking work runs, the event loop's default executor if None
+    """
+    __slots__ = ('path', 'concurrency', 'executor', '_regions', '_lock', '_semaphore')
+
+    def __init__(self, path: str | Path, concurrency: int = 8, executor: Executor | None = None):
+        self.path = Path(path)
+        self.concurrency = concurrency
+        self.executor = executor
+        self._regions: dict[tuple[int, int], AsyncRegion | None] = {}
+        self._lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def close(self):
+        """Closes every open region file"""
+        regions = [region for region in self._regions.values() if region is not None]
+        self._regions.clear()
+        for region in regions:
+            await region.close()
+
+    async def __aenter__(self) -> AsyncWorld:
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def region_coordinates(self) -> list[tuple[int, int]]:
+        """Returns the ``(x, z)`` of every region file in the folder"""
+        coords = []
+        for path in sorted(self.path.glob('r.*.*.mca')):
+            match = _REGION_NAME.fullmatch(path.name)
+            if match:
+                coords.append((int(match[1]), int(match[2])))
+        return coords
+
+    async def region(self, region_x: int, region_z: int) -> AsyncRegion | None:
+        """
+        Returns the region at given region coordinates,
+        None if its file doesn't exist or is empty
+        """
+        key = (region_x, region_z)
+        async with self._lock:
+            if key not in self._regions:
+                path = self.path / f'r.{region_x}.{region_z}.mca'
+                try:
+                    # Every region shares the world's limit
+                    region = await AsyncRegion.open(path, self.concurrency, self.executor, self._semaphore)
+                except (FileNotFoundError, EmptyRegionFile):
+                    region = None
+                self._regions[key] = region
+            return self._regions[key]
+
+    async def chunk(self, chunk_x: int, chunk_z: int) -> Chunk:
+        """
+        Reads and decodes the chunk at given global chunk coordinates
+
+        Raises
+        ------
+        anvil.ChunkNotFound
+            If the chunk hasn't been generated yet
+        """
+        region = await self.region(chunk_x // 32, chunk_z // 32)
+        if region is None:
+            raise ChunkNotFound(f'Could not find chunk ({chunk_x}, {chunk_z})')
+        return await region.chunk(chunk_x, chunk_z)
+
+    async def chunks(self) -> AsyncIterator[Chunk]:
+        """Iterates over every generated chunk of every region, refer to :meth:`AsyncRegion.chunks`"""
+        for region_x, region_z in self.region_coordinates():
+            region = await self.region(region_x, region_z)
+            if region is None:
+                continue
+            async for chunk in region.chunks():
+                yield chunk
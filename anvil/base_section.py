@@ -1,8 +1,32 @@
 from abc import ABC, abstractmethod
 from nbt import nbt
 from . import Block
+from .chunk import _VERSION_20w17a, _VERSION_21w39a, _VERSION_21w43a
+from .nbt_stream import NBTWriter, TAG_COMPOUND
+from .utils import pack_nibbles
+import numpy as np
 import array
 
+def write_palette_entry(writer: NBTWriter, block: Block):
+    """
+    Writes the tags of a block's palette entry with a :class:`anvil.nbt_stream.NBTWriter`,
+    followed by the end of its compound, same as :meth:`BaseSection.save` does
+    """
+    writer.write_string('Name', block.name())
+    if block.properties:
+        writer.begin_compound('Properties')
+        for key, value in block.properties.items():
+            if isinstance(value, str):
+                writer.write_string(key, value)
+            elif isinstance(value, bool):
+                writer.write_string(key, str(value).lower())
+            elif isinstance(value, int):
+                writer.write_string(key, str(value))
+            else:
+                writer.write_tag(value)
+        writer.end_compound()
+    writer.end_compound()
+
 class BaseSection(ABC):
     def __init__(self, y: int):
         self.y = y
@@ -10,36 +34,60 @@ class BaseSection(ABC):
     @abstractmethod
     def palette(self) -> tuple[Block | None, ...]:
         """
-        Generates and returns a tuple of all the different blocks in the section
-        The order can change as it uses sets, but should be fine when saving since
-        it's only called once.
+        Returns a tuple of all the different blocks in the section,
+        in the order their indexes on :meth:`blockstates` refer to
         """
         pass
 
     @abstractmethod
-    def blockstates(self, palette: tuple[Block | None, ...] | None = None) -> array.array:
+    def blockstates(self, palette: tuple[Block | None, ...] | None = None, stretches: bool = True) -> np.ndarray | array.array:
         """
-        Returns a list of each block's index in the palette.
-        
+        Returns each block's index in the palette, packed into longs.
+
         This is used in the BlockStates tag of the section.
 
         Parameters
         ----------
         palette
             Section's palette. If not given will generate one.
+        stretches
+            Whether indexes can be split between two longs, which is the layout
+            used before 20w17a. Otherwise each long is padded with unused bits
+
+        Returns
+        -------
+        numpy.ndarray | array.array
+            The packed longs as unsigned 64 bit values, refer to :func:`anvil.utils.pack_states`
         """
         pass
 
-    def save(self) -> nbt.TAG_Compound:
+    def save(self, version: int | None = None) -> nbt.TAG_Compound:
         """
         Saves the section to a TAG_Compound and is used inside the chunk tag
         This is missing the SkyLight tag, but minecraft still accepts it anyway
+
+        Parameters
+        ----------
+        version
+            DataVersion of the chunk this section is saved in, which decides the
+            tag names and how block states are packed. Defaults to the pre-20w17a layout
         """
         root = nbt.TAG_Compound()
         root.tags.append(nbt.TAG_Byte(name='Y', value=self.y))
 
+        # Same version checks as the ones used by Chunk for reading
+        if version is not None and version >= _VERSION_21w39a:
+            container = nbt.TAG_Compound()
+            container.name = 'block_states'
+            states_tag = 'data'
+        else:
+            container = root
+            states_tag = 'BlockStates'
+        palette_tag = 'palette' if version is not None and version >= _VERSION_21w43a else 'Palette'
+        stretches = version is None or version < _VERSION_20w17a
+
         palette = self.palette()
-        nbt_pal = nbt.TAG_List(name='Palette', type=nbt.TAG_Compound)
+        nbt_pal = nbt.TAG_List(name=palette_tag, type=nbt.TAG_Compound)
         for block in palette:
             if block is None:
                 continue
@@ -63,11 +111,51 @@ class BaseSection(ABC):
                         properties.tags.append(value)
                 tag.tags.append(properties)
             nbt_pal.tags.append(tag)
-        root.tags.append(nbt_pal)
+        container.tags.append(nbt_pal)
 
-        states = self.blockstates(palette=palette)
-        bstates = nbt.TAG_Long_Array(name='BlockStates')
-        bstates.value = states.tolist()
-        root.tags.append(bstates)
+        # The block_states container leaves out the states of single block sections
+        if container is root or len(palette) > 1:
+            states = self.blockstates(palette=palette, stretches=stretches)
+            bstates = nbt.TAG_Long_Array(name=states_tag)
+            bstates.value = states.tolist()
+            container.tags.append(bstates)
 
+        if container is not root:
+            root.tags.append(container)
         return root
+
+    def write(self, writer: NBTWriter, version: int | None = None, sky_light: np.ndarray | None = None):
+        """
+        Writes the same tags as :meth:`save` with a :class:`anvil.nbt_stream.NBTWriter`,
+        followed by the end of the section's compound, which the caller has to begin
+
+        Parameters
+        ----------
+        writer
+            Where to write the section
+        version
+            Refer to :meth:`save`
+        sky_light
+            ``(16, 16, 16)`` array of the section's sky light in YZX order, left out if not given
+        """
+        writer.write_byte('Y', self.y)
+        container = version is not None and version >= _VERSION_21w39a
+        if container:
+            writer.begin_compound('block_states')
+        palette_tag = 'palette' if version is not None and version >= _VERSION_21w43a else 'Palette'
+        stretches = version is None or version < _VERSION_20w17a
+
+        palette = self.palette()
+        blocks = [block for block in palette if block is not None]
+        writer.begin_list(palette_tag, TAG_COMPOUND, len(blocks))
+        for block in blocks:
+            write_palette_entry(writer, block)
+
+        if not container or len(palette) > 1:
+            states = self.blockstates(palette=palette, stretches=stretches)
+            writer.write_long_array('data' if container else 'BlockStates', states)
+        if container:
+            writer.end_compound()
+        if sky_light is not None:
+            writer.write_byte_array('SkyLight', pack_nibbles(sky_light))
+        writer.end_compound()
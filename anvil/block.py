@@ -1,7 +1,9 @@
 from __future__ import annotations
+import functools
 from nbt import nbt
 from frozendict import frozendict
-from .legacy import LEGACY_ID_MAP
+from . import metrics
+from .legacy import load_legacy_id_map
 
 class Block:
     """
@@ -36,6 +38,8 @@ class Block:
             self.namespace = namespace
             self.id = block_id
         self.properties = properties or {}
+        if metrics.enabled:
+            metrics.record('blocks_allocated')
 
     def name(self) -> str:
         """
@@ -99,11 +103,39 @@ class Block:
         """
         # See https://minecraft.gamepedia.com/Java_Edition_data_value/Pre-flattening
         # and https://minecraft.gamepedia.com/Java_Edition_data_value for current values
-        key = f'{block_id}:{data}'
-        if key not in LEGACY_ID_MAP:
-            raise KeyError(f'Block {key} not found')
-        name, properties = LEGACY_ID_MAP[key]
-        return cls('minecraft', name, properties=properties)
+        block = None
+        if 0 <= block_id < 4096 and 0 <= data < 16:
+            block = legacy_block_table()[block_id << 4 | data]
+        if block is None:
+            raise KeyError(f'Block {block_id}:{data} not found')
+        if cls is not Block:
+            return cls('minecraft', block.id, properties=block.properties)
+        return block
+
+def plain_block(block: Block) -> Block:
+    """
+    Returns the block with its properties as plain values, instead of
+    the NBT tags :meth:`Block.from_palette` keeps, so it compares equal to blocks made by hand
+    """
+    if not block.properties:
+        return block
+    properties = {key: getattr(value, 'value', value) for key, value in block.properties.items()}
+    return Block(block.namespace, block.id, properties)
+
+@functools.cache
+def legacy_block_table() -> tuple[Block | None, ...]:
+    """
+    Returns the pre-flattening conversion table, built once on first use
+
+    The table has 65536 entries, one for every 12 bit block ID and 4 bit data pair,
+    indexed by ``block_id << 4 | data``. Pairs without a known conversion are ``None``.
+    The same Block instances are shared by every lookup, so they should not be modified.
+    """
+    table: list[Block | None] = [None] * 65536
+    for key, (name, properties) in load_legacy_id_map().items():
+        block_id, data = key.split(':')
+        table[int(block_id) << 4 | int(data)] = Block('minecraft', name, properties=properties)
+    return tuple(table)
 
 class OldBlock:
     """
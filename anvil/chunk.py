@@ -1,9 +1,15 @@
-from collections.abc import Generator
+from collections import Counter
+from collections.abc import Callable, Generator
 from nbt import nbt
-from .block import Block, OldBlock
+import time
+import numpy as np
+from . import metrics
+from .block import Block, OldBlock, legacy_block_table, plain_block
+from .legacy import LEGACY_BIOME_IDS
+from .light import AIR, is_solid
 from .region import Region
 from .errors import OutOfBoundsCoordinates, ChunkNotFound, EmptyRegionFile
-from .utils import bin_append, nibble
+from .utils import bin_append, nibble, unpack_nibbles, unpack_states, remap_palette
 
 # Last Checked Version: 1.20.2-rc2
 # ----------------------------------------------------------------------------------------------------
@@ -32,6 +38,10 @@ _VERSION_21w43a = 2844
 # Chunk tags were renamed and had their data type changed too (e.g. BlockStates to block_states)
 _VERSION_21w39a = 2836
 
+# Build Height Limit Increase - https://minecraft.wiki/w/Java_Edition_21w37a
+# Build height limit increased to 384 blocks (-64 to 319) again, this time for 1.18
+_VERSION_21w37a = 2834
+
 # Build Height Limit Decrease - https://minecraft.wiki/w/Java_Edition_21w15a
 # Build height limit reverted back to 256 blocks (0 to 255) from version 21w06a
 _VERSION_21w15a = 2709
@@ -49,6 +59,10 @@ _VERSION_20w45a = 2681
 # so a block value isn't in multiple elements of the array
 _VERSION_20w17a = 2529
 
+# Biome Storage Format Changed - https://minecraft.wiki/w/Java_Edition_19w36a
+# Biomes went from one per block column to one per 4x4x4 cell
+_VERSION_19w36a = 2203
+
 # Added POI Folder - https://minecraft.wiki/w/Java_Edition_19w11a
 # Villages and other points of interest are now in a poi folder
 #   instead of being in its own separate files
@@ -88,10 +102,11 @@ class Chunk:
         The guess for the type of chunk data we're looking at
     block_entities: :class:`nbt.TAG_Compound`
         ``self.data['TileEntities']`` as an attribute for easier use (or ``self.data['block_entities']`` if chunk's world's version is at least 21w43a)
-    entities: :class:`nbt.TAG_Compound`
-        ``self.data['Entities']`` as an attribute for easier use (or ``self.data['block_entities']`` if chunk's world's version is at least 21w43a)
+    entities: :class:`nbt.TAG_List`
+        ``self.data['Entities']`` as an attribute for easier use (or ``self.data['entities']`` if chunk's world's version is at least 21w43a).
+        Since 20w45a entities are stored in their own region files, see :class:`anvil.EntityRegion`
     """
-    __slots__ = ('version', 'data', 'x', 'z', 'lowest_y', 'highest_y', 'block_entities', 'tile_entities')
+    __slots__ = ('version', 'data', 'x', 'z', 'lowest_y', 'highest_y', 'block_entities', 'tile_entities', 'entities')
 
     def __init__(self, nbt_data: nbt.NBTFile):
         try:
@@ -104,8 +119,9 @@ class Chunk:
         self.data = nbt_data
 
         # Base data expected to be in any region file (citation needed)
-        self.x = self.data['Level']['xPos'].value
-        self.z = self.data['Level']['zPos'].value
+        level = self.data if self.version and self.version >= _VERSION_21w43a else self.data['Level']
+        self.x = level['xPos'].value
+        self.z = level['zPos'].value
         self.lowest_y = self.get_lowest_section()
         self.highest_y = self.get_highest_section()
 
@@ -113,6 +129,8 @@ class Chunk:
         self.tile_entities: nbt.TAG_List | None = None
         self.block_entities: nbt.TAG_List | None = None
         self.init_block_entities(nbt_data=nbt_data)
+        self.entities: nbt.TAG_List | None = None
+        self.init_entities(nbt_data=nbt_data)
 
         # print("(X: %s, Z: %s, L: %s, H: %s)" % (self.x, self.z, self.lowest_y, self.highest_y))
 
@@ -134,20 +152,16 @@ class Chunk:
         self.block_entities = self.tile_entities
 
     def init_entities(self, nbt_data: nbt.NBTFile):
+        # Entities were moved to their own region files in 20w45a, so terrain chunks
+        #   from that version onwards usually won't have them (only proto-chunks do)
         try:
             if self.version and self.version >= _VERSION_21w43a:
-                self.data = nbt_data
-                self.tile_entities = self.data['block_entities'] # BUG: This should handle 'entities' not 'block_entities' <-double check that this is true
-
+                self.entities = nbt_data['entities']
             else:
-                self.data = nbt_data['Level']
-                self.tile_entities = self.data['TileEntities']
+                self.entities = nbt_data['Level']['Entities']
         except KeyError:
-            # We're reading something without block entities
-            self.tile_entities = None
-
-        # to match the rename. we aren't getting rid of tile_entities, just making sure there's a match with the modern term
-        self.block_entities = self.tile_entities
+            # We're reading something without entities
+            self.entities = None
 
     def get_lowest_section(self) -> int | None:
         try:
@@ -452,122 +466,562 @@ class Chunk:
         if section is None or isinstance(section, int):
             section = self.get_section(section or 0)
 
-        if self.version and self.version < _VERSION_17w47a:
+        if self.version is None or self.version < _VERSION_17w47a:
             if section is None or 'Blocks' not in section:
                 air = Block.from_name('minecraft:air') if force_new else OldBlock(0)
                 for _ in range(4096):
                     yield air
                 return
 
-            while index < 4096:
-                block_id = section['Blocks'][index]
-                if 'Add' in section:
-                    block_id += nibble(section['Add'], index) << 8
-
-                block_data = nibble(section['Data'], index)
-
-                block = OldBlock(block_id, block_data)
-                if force_new:
-                    yield block.convert()
-                else:
+            values = self.legacy_section_values(section)[index:].tolist()
+            if force_new:
+                table = legacy_block_table()
+                for value in values:
+                    block = table[value]
+                    if block is None:
+                        raise KeyError(f'Block {value >> 4}:{value & 15} not found')
                     yield block
+            else:
+                for value in values:
+                    yield OldBlock(value >> 4, value & 15)
+            return
 
-                index += 1
+        # Decoded all at once, instead of one long at a time
+        arrays = self.get_section_array(section)
+        if arrays is None:
+            air = Block.from_name('minecraft:air')
+            for _ in range(4096):
+                yield air
             return
 
-        # Convert int section index to actual section
+        indexes, palette = arrays
+        for palette_id in indexes.reshape(-1)[index:].tolist():
+            yield palette[palette_id]
+
+    @staticmethod
+    def legacy_section_values(section: nbt.TAG_Compound) -> np.ndarray:
+        """
+        Decodes a pre-1.13 section's ``Blocks``, ``Add`` and ``Data`` arrays in one vectorized pass
+
+        Returns
+        -------
+        numpy.ndarray
+            ``uint16`` array of 4096 ``block_id << 4 | data`` values, in YZX order.
+            Block IDs take 12 bits and data values 4 bits, which is also the index
+            on :func:`anvil.block.legacy_block_table`
+        """
+        block_ids = np.frombuffer(bytes(section['Blocks'].value), dtype=np.uint8).astype(np.uint16)
+        if 'Add' in section:
+            block_ids |= unpack_nibbles(section['Add'].value).astype(np.uint16) << 8
+        return block_ids << 4 | unpack_nibbles(section['Data'].value)
+
+    def get_section_array(
+            self,
+            section: int | nbt.TAG_Compound | None,
+            force_new: bool = False
+    ) -> tuple[np.ndarray, tuple[Block | OldBlock, ...]] | None:
+        """
+        Returns all the blocks in given section at once, as palette indexes
+
+        Parameters
+        ----------
+        section
+            Either a section NBT tag or an index
+        force_new
+            Always use instances of Block in the palette if True, otherwise uses OldBlock for pre-1.13 versions.
+            Defaults to False
+
+        Returns
+        -------
+        tuple[numpy.ndarray, tuple[Block | OldBlock, ...]] | None
+            A ``(16, 16, 16)`` ``uint16`` array of indexes on the palette, in YZX order, and the palette.
+            None if the section is missing or holds no blocks (e.g. only light data)
+        """
         if isinstance(section, int):
             section = self.get_section(section)
-
         if section is None:
             return None
 
-        if self.version and self.version >= _VERSION_21w39a:
-            block_states_tag = 'block_states'
-            palette_parent = section[block_states_tag]
-        else:
-            block_states_tag = 'BlockStates'
-            palette_parent = section
+        if not metrics.enabled:
+            return self._decode_section(section, force_new)
+        start = time.perf_counter()
+        arrays = self._decode_section(section, force_new)
+        if arrays is not None:
+            metrics.record('section_decode_seconds', time.perf_counter() - start)
+            metrics.record('sections_decoded')
+        return arrays
+
+    def _decode_section(
+            self,
+            section: nbt.TAG_Compound,
+            force_new: bool
+    ) -> tuple[np.ndarray, tuple[Block | OldBlock, ...]] | None:
+        if self.version is None or self.version < _VERSION_17w47a:
+            if 'Blocks' not in section:
+                return None
+            values, indexes = np.unique(self.legacy_section_values(section), return_inverse=True)
+            if force_new:
+                table = legacy_block_table()
+                legacy_palette = []
+                for value in values.tolist():
+                    if table[value] is None:
+                        raise KeyError(f'Block {value >> 4}:{value & 15} not found')
+                    legacy_palette.append(table[value])
+            else:
+                legacy_palette = [OldBlock(value >> 4, value & 15) for value in values.tolist()]
+            return indexes.astype(np.uint16).reshape(16, 16, 16), tuple(legacy_palette)
 
-        if self.version and self.version >= _VERSION_21w43a:
-            palette_tag = 'palette'
+        if self.version >= _VERSION_21w39a:
+            if 'block_states' not in section:
+                return None
+            container = section['block_states']
+            states_tag = 'data'
         else:
-            palette_tag = 'Palette'
+            if 'Palette' not in section:
+                return None
+            container = section
+            states_tag = 'BlockStates'
+        palette_tag = 'palette' if self.version >= _VERSION_21w43a else 'Palette'
 
-        if section is None or block_states_tag not in section:
-            air = Block.from_name('minecraft:air')
-            for _ in range(4096):
-                yield air
-            return
+        palette = tuple(Block.from_palette(i) for i in container[palette_tag])
 
-        states = section[block_states_tag].value
-        palette = palette_parent[palette_tag]
+        # Sections with a single block in their palette don't store any states
+        if states_tag not in container:
+            return np.zeros((16, 16, 16), dtype=np.uint16), palette
 
         bits = max((len(palette) - 1).bit_length(), 4)
+        stretches = self.version < _VERSION_20w17a
+        indexes = unpack_states(container[states_tag].value, bits, stretches=stretches)
+        return indexes.reshape(16, 16, 16), palette
 
-        if self.version:
-            stretches = self.version < _VERSION_20w17a
-        else:
-            stretches = None
+    def _sections(self) -> list[nbt.TAG_Compound]:
+        try:
+            if self.version and self.version >= _VERSION_21w43a:
+                return list(self.data['sections'])
+            return list(self.data['Sections'])
+        except KeyError:
+            return []
 
-        if stretches:
-            state = index * bits // 64
+    def _block_sections(self) -> dict[int, nbt.TAG_Compound]:
+        """Returns the sections holding blocks by Y index, without decoding them"""
+        if self.version is None or self.version < _VERSION_17w47a:
+            blocks_tag = 'Blocks'
+        elif self.version >= _VERSION_21w39a:
+            blocks_tag = 'block_states'
         else:
-            state = index // (64 // bits)
+            blocks_tag = 'Palette'
+        return {section['Y'].value: section for section in self._sections() if blocks_tag in section}
 
-        data = states[state]
-        if data < 0:
-            data += 2**64
+    def section_arrays(self, force_new: bool = False) -> dict[int, tuple[np.ndarray, tuple[Block | OldBlock, ...]]]:
+        """
+        Returns every section holding blocks as palette indexes,
+        refer to :meth:`get_section_array`
 
-        bits_mask = 2**bits - 1
+        Returns
+        -------
+        dict[int, tuple[numpy.ndarray, tuple[Block | OldBlock, ...]]]
+            Section Y index to indexes and palette
+        """
+        arrays = {}
+        for section in self._sections():
+            decoded = self.get_section_array(section, force_new=force_new)
+            if decoded is not None:
+                arrays[section['Y'].value] = decoded
+        return arrays
+
+    def section_range(self) -> tuple[int, int] | None:
+        """
+        Returns the lowest and highest Y index of the sections holding blocks,
+        or None if there are no such sections
+        """
+        sections = self._block_sections()
+        if not sections:
+            return None
+        return min(sections), max(sections)
 
-        if stretches:
-            offset = (bits * index) % 64
-        else:
-            offset = index % (64 // bits) * bits
+    def to_array(
+            self,
+            lowest: int | None = None,
+            highest: int | None = None,
+            force_new: bool = False
+    ) -> tuple[np.ndarray, tuple[Block | OldBlock, ...]]:
+        """
+        Returns all the blocks in the chunk as a single contiguous array of indexes
+        on a chunk-wide palette. Missing sections are filled with air.
 
-        data_len = 64 - offset
-        data >>= offset
+        Parameters
+        ----------
+        lowest
+            Y index of the lowest section to include, defaults to the lowest section holding blocks
+        highest
+            Y index of the highest section to include, defaults to the highest section holding blocks
+        force_new
+            Always use instances of Block in the palette if True, otherwise uses OldBlock for pre-1.13 versions.
+            Defaults to False
 
-        while index < 4096:
-            if data_len < bits:
-                state += 1
-                new_data = states[state]
-                if new_data < 0:
-                    new_data += 2**64
+        Returns
+        -------
+        tuple[numpy.ndarray, tuple[Block | OldBlock, ...]]
+            A ``(height, 16, 16)`` ``uint16`` array in YZX order, where ``[0]`` is the
+            bottom of the ``lowest`` section, and the palette. Air is always index 0
+        """
+        sections = self._block_sections()
+        if lowest is None:
+            lowest = min(sections, default=0)
+        if highest is None:
+            highest = max(sections, default=lowest - 1)
+
+        legacy = self.version is None or self.version < _VERSION_17w47a
+        air = OldBlock(0) if legacy and not force_new else Block('minecraft', 'air')
+        merged: dict = {air: 0}
+
+        blocks = np.zeros((max(highest - lowest + 1, 0) * 16, 16, 16), dtype=np.uint16)
+        for y, section in sections.items():
+            # Only the sections in range are decoded
+            if lowest <= y <= highest:
+                indexes, palette = self.get_section_array(section, force_new=force_new)
+                start = (y - lowest) * 16
+                blocks[start : start + 16] = remap_palette(indexes, palette, merged)
+        return blocks, tuple(merged)
+
+    def count_blocks(self, force_new: bool = False) -> Counter:
+        """
+        Returns how many of each block are in the chunk's sections,
+        counted per palette entry without creating a Block for each block
 
-                if stretches:
-                    leftover = data_len
-                    data_len += 64
+        Only sections stored in the chunk are counted, so air in missing
+        sections is not included.
 
-                    data = bin_append(new_data, data, leftover)
-                else:
-                    data = new_data
-                    data_len = 64
+        Parameters
+        ----------
+        force_new
+            Always count instances of Block if True, otherwise counts OldBlock for pre-1.13 versions.
+            Defaults to False
+
+        Returns
+        -------
+        collections.Counter
+            Block to amount, with plain property values so blocks made by hand can be looked up
+        """
+        counts: Counter = Counter()
+        for indexes, palette in self.section_arrays(force_new=force_new).values():
+            amounts = np.bincount(indexes.reshape(-1), minlength=len(palette))
+            for block, amount in zip(palette, amounts.tolist()):
+                if amount:
+                    counts[plain_block(block) if isinstance(block, Block) else block] += amount
+        return counts
+
+    def find_blocks(self, predicate: Callable[[str], bool]) -> np.ndarray:
+        """
+        Returns the coordinates of every block whose name matches the predicate
 
-            palette_id = data & bits_mask
-            yield Block.from_palette(palette[palette_id])
+        The predicate is called once per palette entry rather than once per block,
+        e.g. ``chunk.find_blocks(lambda name: name.endswith('_ore'))``
 
-            index += 1
-            data >>= bits
-            data_len -= bits
+        Parameters
+        ----------
+        predicate
+            Called with names in the ``namespace:block_id`` format,
+            pre-1.13 blocks are converted first
 
-    def stream_chunk(self, index: int = 0) -> Generator[Block | OldBlock, None, None]:
+        Returns
+        -------
+        numpy.ndarray
+            ``(N, 3)`` ``int32`` array of ``x, y, z`` coordinates, with X and Z in the range of 0 to 15
+            and Y being global
         """
-        Returns a generator for all the blocks in the chunk
+        cache: dict[str, bool] = {}
+        found = []
+        for y, (indexes, palette) in self.section_arrays(force_new=True).items():
+            matching = []
+            for i, block in enumerate(palette):
+                name = block.name()
+                if name not in cache:
+                    cache[name] = bool(predicate(name))
+                if cache[name]:
+                    matching.append(i)
+            if not matching:
+                continue
+
+            # argwhere returns (y, z, x)
+            coords = np.argwhere(np.isin(indexes, matching)).astype(np.int32)
+            coords[:, 0] += y * 16
+            found.append(coords[:, [2, 0, 1]])
+        if not found:
+            return np.empty((0, 3), dtype=np.int32)
+        return np.concatenate(found)
+
+    def stream_chunk(self, index: int = 0, force_new: bool = False) -> Generator[Block | OldBlock, None, None]:
+        """
+        Returns a generator for all the blocks in the chunk,
+        from the lowest to the highest section holding blocks
+
+        Missing sections in between are yielded as air. Refer to :meth:`to_array`
+        to get all the blocks at once.
 
-        This is a helper function that runs Chunk.stream_blocks from section 0 to 15
+        Parameters
+        ----------
+        index
+            At what block to start from, counting from the bottom of the lowest section.
+        force_new
+            Always returns an instance of Block if True, otherwise returns type OldBlock for pre-1.13 versions.
+            Defaults to False
 
         Yields
         ------
         :class:`anvil.Block`
         """
-        lower_bound = self.lowest_y if self.lowest_y else 0
-        upper_bound = self.highest_y if self.highest_y else 15
+        blocks, palette = self.to_array(force_new=force_new)
+        for palette_id in blocks.reshape(-1)[index:].tolist():
+            yield palette[palette_id]
+
+    def get_light(self, section: int | nbt.TAG_Compound | None, sky_default: int = 15) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the block light and sky light of given section at once
+
+        Parameters
+        ----------
+        section
+            Either a section NBT tag or an index
+        sky_default
+            Sky light used when the section stores none, which is the case for sections
+            the sky reaches without anything in the way (and in dimensions without a sky,
+            where 0 should be used instead). Block light defaults to 0
+
+        Returns
+        -------
+        tuple[numpy.ndarray, numpy.ndarray]
+            Block light and sky light, as ``(16, 16, 16)`` ``uint8`` arrays in YZX order
+        """
+        if isinstance(section, int):
+            section = self.get_section(section)
+        if section is not None and 'BlockLight' in section:
+            block_light = unpack_nibbles(section['BlockLight'].value).reshape(16, 16, 16)
+        else:
+            block_light = np.zeros((16, 16, 16), dtype=np.uint8)
+        if section is not None and 'SkyLight' in section:
+            sky_light = unpack_nibbles(section['SkyLight'].value).reshape(16, 16, 16)
+        else:
+            sky_light = np.full((16, 16, 16), sky_default, dtype=np.uint8)
+        return block_light, sky_light
+
+    def light_array(
+            self,
+            lowest: int | None = None,
+            highest: int | None = None,
+            sky_default: int = 15
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the block light and sky light of the whole chunk as two contiguous arrays
+
+        Parameters
+        ----------
+        lowest
+            Y index of the lowest section to include, defaults to the lowest section stored in the chunk
+        highest
+            Y index of the highest section to include, defaults to the highest section stored in the chunk
+        sky_default
+            Refer to :meth:`get_light`
 
-        for section_y in range(lower_bound, upper_bound + 1):
-            for block in self.stream_blocks(index=index, section=section_y):
-                yield block
+        Returns
+        -------
+        tuple[numpy.ndarray, numpy.ndarray]
+            Block light and sky light, as ``(height, 16, 16)`` ``uint8`` arrays in YZX order,
+            where ``[0]`` is the bottom of the ``lowest`` section
+        """
+        sections = {section['Y'].value: section for section in self._sections()}
+        if lowest is None:
+            lowest = min(sections, default=0)
+        if highest is None:
+            highest = max(sections, default=lowest - 1)
+
+        height = max(highest - lowest + 1, 0) * 16
+        block_light = np.zeros((height, 16, 16), dtype=np.uint8)
+        sky_light = np.zeros((height, 16, 16), dtype=np.uint8)
+        for y in range(lowest, highest + 1):
+            start = (y - lowest) * 16
+            block_light[start : start + 16], sky_light[start : start + 16] = \
+                self.get_light(sections.get(y), sky_default=sky_default)
+        return block_light, sky_light
+
+    def find_dark_spaces(
+            self,
+            max_light: int = 0,
+            include_sky: bool = True,
+            solid: Callable[[str], bool] | None = None
+    ) -> np.ndarray:
+        """
+        Returns the coordinates of every air block standing on a solid block
+        with a light level of ``max_light`` or less, where most monsters can spawn
+
+        Parameters
+        ----------
+        max_light
+            Highest light level counted as dark
+        include_sky
+            Whether sky light counts too, otherwise only block light does
+            (the sky gets dark at night, so only block light stops spawning then)
+        solid
+            Called with block names in the ``namespace:block_id`` format,
+            returns whether monsters can spawn on it. Defaults to :func:`anvil.light.is_solid`
+
+        Returns
+        -------
+        numpy.ndarray
+            ``(N, 3)`` ``int32`` array of ``x, y, z`` coordinates of the air blocks,
+            with X and Z in the range of 0 to 15 and Y being global
+        """
+        ys = [section['Y'].value for section in self._sections()]
+        if not ys:
+            return np.empty((0, 3), dtype=np.int32)
+        lowest, highest = min(ys), max(ys)
+        blocks, palette = self.to_array(lowest, highest, force_new=True)
+        block_light, sky_light = self.light_array(lowest, highest)
+
+        solid = solid or is_solid
+        names = [block.name() for block in palette]
+        air = np.array([name in AIR for name in names])[blocks]
+        floor = np.array([bool(solid(name)) for name in names])[blocks]
+        light = np.maximum(block_light, sky_light) if include_sky else block_light
+
+        dark = air[1:] & floor[:-1] & (light[1:] <= max_light)
+        # argwhere returns (y, z, x), and the air block is one above the floor
+        coords = np.argwhere(dark).astype(np.int32)
+        coords[:, 0] += lowest * 16 + 1
+        return coords[:, [2, 0, 1]]
+
+    def _column_biomes(self) -> bool:
+        return self.version is None or self.version < _VERSION_19w36a
+
+    def _biome_palette(self, ids: np.ndarray, force_new: bool) -> tuple[str | int, ...]:
+        if not force_new:
+            return tuple(ids.tolist())
+        palette = []
+        for biome_id in ids.tolist():
+            if biome_id not in LEGACY_BIOME_IDS:
+                raise KeyError(f'Biome {biome_id} not found')
+            palette.append('minecraft:' + LEGACY_BIOME_IDS[biome_id])
+        return tuple(palette)
+
+    def get_biomes(
+            self,
+            section: int | nbt.TAG_Compound,
+            force_new: bool = False
+    ) -> tuple[np.ndarray, tuple[str | int, ...]] | None:
+        """
+        Returns the biomes of given section at once, as palette indexes
+
+        Since 19w36a biomes are stored for cells of 4x4x4 blocks,
+        older chunks only store one biome per block column, the same for every section.
+
+        Parameters
+        ----------
+        section
+            Either a section NBT tag or an index
+        force_new
+            Always use biome names (like ``minecraft:plains``) in the palette if True,
+            otherwise uses the numeric IDs of chunks from before 21w39a. Defaults to False
+
+        Raises
+        ------
+        KeyError
+            If ``force_new`` is True and a numeric ID has no known name
+
+        Returns
+        -------
+        tuple[numpy.ndarray, tuple[str | int, ...]] | None
+            A ``(4, 4, 4)`` ``uint16`` array of indexes on the palette, one per cell in YZX order
+            (``(1, 16, 16)``, one per column, for chunks from before 19w36a), and the palette.
+            None if there is no biome data for the section
+        """
+        if self.version and self.version >= _VERSION_21w39a:
+            if isinstance(section, int):
+                section = self.get_section(section)
+            if section is None or 'biomes' not in section:
+                return None
+            container = section['biomes']
+            palette_tag = 'palette' if self.version >= _VERSION_21w43a else 'Palette'
+            palette = tuple(biome.value for biome in container[palette_tag])
+            # Sections with a single biome in their palette don't store any data
+            if 'data' not in container:
+                return np.zeros((4, 4, 4), dtype=np.uint16), palette
+            bits = (len(palette) - 1).bit_length()
+            return unpack_states(container['data'].value, bits, count=64).reshape(4, 4, 4), palette
+
+        if 'Biomes' not in self.data:
+            return None
+        values = np.array(self.data['Biomes'].value, dtype=np.int64)
+        if self._column_biomes():
+            if len(values) < 256:
+                return None
+            cells = values[:256].reshape(1, 16, 16)
+        else:
+            # The array starts at the bottom of the world, which was only below 0 in 21w06a's snapshots
+            bottom = -4 if _VERSION_21w06a <= self.version < _VERSION_21w15a else 0
+            y = section if isinstance(section, int) else section['Y'].value
+            start = (y - bottom) * 64
+            if start < 0 or start + 64 > len(values):
+                return None
+            cells = values[start : start + 64].reshape(4, 4, 4)
+        ids, indexes = np.unique(cells, return_inverse=True)
+        return indexes.astype(np.uint16).reshape(cells.shape), self._biome_palette(ids, force_new)
+
+    def biome_array(
+            self,
+            lowest: int | None = None,
+            highest: int | None = None,
+            force_new: bool = False
+    ) -> tuple[np.ndarray, tuple[str | int | None, ...]]:
+        """
+        Returns the biomes of the whole chunk as a single array of indexes on a chunk-wide palette
+
+        Parameters
+        ----------
+        lowest
+            Y index of the lowest section to include, defaults to the lowest section with biome data
+        highest
+            Y index of the highest section to include, defaults to the highest section with biome data
+        force_new
+            Refer to :meth:`get_biomes`
+
+        Returns
+        -------
+        tuple[numpy.ndarray, tuple[str | int | None, ...]]
+            A ``(height, 4, 4)`` ``uint16`` array of 4x4x4 cells in YZX order, where ``[0]`` is the bottom
+            of the ``lowest`` section, and the palette. Chunks from before 19w36a give a ``(1, 16, 16)``
+            array of block columns instead, ignoring ``lowest`` and ``highest``.
+            Index 0 is always None, used where there is no biome data
+        """
+        merged: dict = {None: 0}
+        if self._column_biomes():
+            decoded = self.get_biomes(0, force_new=force_new)
+            if decoded is None:
+                return np.zeros((1, 16, 16), dtype=np.uint16), (None,)
+            indexes, palette = decoded
+            return remap_palette(indexes, palette, merged), tuple(merged)
+
+        decoded = {}
+        if self.version >= _VERSION_21w39a:
+            for section in self._sections():
+                biomes = self.get_biomes(section, force_new=force_new)
+                if biomes is not None:
+                    decoded[section['Y'].value] = biomes
+        elif 'Biomes' in self.data:
+            # Biomes are stored for the whole chunk instead of in sections
+            bottom = -4 if _VERSION_21w06a <= self.version < _VERSION_21w15a else 0
+            for y in range(bottom, bottom + len(self.data['Biomes'].value) // 64):
+                decoded[y] = self.get_biomes(y, force_new=force_new)
+        if lowest is None:
+            lowest = min(decoded, default=0)
+        if highest is None:
+            highest = max(decoded, default=lowest - 1)
+
+        biomes = np.zeros((max(highest - lowest + 1, 0) * 4, 4, 4), dtype=np.uint16)
+        for y, (indexes, palette) in decoded.items():
+            if lowest <= y <= highest:
+                start = (y - lowest) * 4
+                biomes[start : start + 4] = remap_palette(indexes, palette, merged)
+        return biomes, tuple(merged)
 
     def get_tile_entity(self, x: int, y: int, z: int) -> nbt.TAG_Compound | None:
         return self.get_block_entity(x, y, z)
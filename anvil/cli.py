@@ -0,0 +1,272 @@
+"""
+``anvil`` command line tool, for inspecting worlds without writing a script
+
+Every subcommand takes region files or folders holding them (like ``world/region``),
+processes each file in parallel with ``--jobs`` and prints one JSON object per line
+on stdout as soon as it's ready. Progress goes to stderr.
+"""
+from __future__ import annotations
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import argparse
+import functools
+import json
+import os
+import struct
+import sys
+import zlib
+import numpy as np
+from .block import Block, OldBlock
+from .region import Region
+from .errors import EmptyRegionFile
+from .verify import verify_region, salvage_region
+
+# Blocks the top view looks through
+_TRANSPARENT = frozenset(('minecraft:air', 'minecraft:cave_air', 'minecraft:void_air', 'minecraft:barrier', 'minecraft:light'))
+
+# Map colors of common blocks, anything else gets a color made from its name
+_COLORS = {
+    'minecraft:grass_block': (127, 178, 56),
+    'minecraft:dirt': (151, 109, 77),
+    'minecraft:stone': (112, 112, 112),
+    'minecraft:deepslate': (80, 80, 80),
+    'minecraft:bedrock': (50, 50, 50),
+    'minecraft:sand': (219, 207, 163),
+    'minecraft:gravel': (136, 126, 126),
+    'minecraft:water': (64, 64, 255),
+    'minecraft:lava': (255, 90, 0),
+    'minecraft:ice': (160, 160, 255),
+    'minecraft:snow': (255, 255, 255),
+    'minecraft:snow_block': (255, 255, 255),
+    'minecraft:oak_leaves': (0, 124, 0),
+    'minecraft:birch_leaves': (80, 140, 40),
+    'minecraft:spruce_leaves': (40, 90, 40),
+    'minecraft:oak_log': (143, 119, 72),
+    'minecraft:netherrack': (112, 2, 0),
+    'minecraft:end_stone': (247, 233, 163),
+}
+
+def block_name(block: Block | OldBlock) -> str:
+    """Returns the name used for a block in the output, ``id:data`` for pre-1.13 blocks"""
+    if isinstance(block, OldBlock):
+        return f'{block.id}:{block.data}'
+    return block.name()
+
+def region_files(paths: Iterable[str | Path]) -> list[Path]:
+    """Returns the given region files, plus the ones inside the given folders"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(path.glob('r.*.*.mca')))
+        else:
+            files.append(path)
+    return files
+
+def info(path: Path) -> dict:
+    """Header statistics of a region file, without reading any chunk"""
+    with Region.open(path) as region:
+        file_sectors = -(-os.path.getsize(path) // 4096)
+        locations = sorted(
+            region.chunk_location(x, z) + (region.chunk_timestamp(x, z),)
+            for x, z in region.generated_chunks()
+        )
+    used = sum(sectors for _, sectors, _ in locations)
+    # Free runs of sectors between chunks, left behind when chunks grow and move
+    gaps = 0
+    end = 2
+    for offset, sectors, _ in locations:
+        if offset > end:
+            gaps += 1
+        end = max(end, offset + sectors)
+    free = max(file_sectors - 2 - used, 0)
+    timestamps = [timestamp for _, _, timestamp in locations if timestamp]
+    return {
+        'file': str(path),
+        'chunks': len(locations),
+        'file_sectors': file_sectors,
+        'used_sectors': used,
+        'free_sectors': free,
+        'gaps': gaps,
+        'fragmentation': free / max(file_sectors - 2, 1),
+        'largest_chunk_sectors': max((sectors for _, sectors, _ in locations), default=0),
+        'oldest': min(timestamps, default=None),
+        'newest': max(timestamps, default=None),
+    }
+
+def count(path: Path, force_new: bool = False) -> dict:
+    """Block histogram of a region file"""
+    with Region.open(path) as region:
+        counts = region.count_blocks(force_new=force_new)
+    blocks: Counter = Counter()
+    for block, amount in counts.items():
+        blocks[block_name(block)] += amount
+    return {'file': str(path), 'blocks': dict(blocks.most_common())}
+
+def find(path: Path, blocks: tuple[str, ...] = (), block_entities: tuple[str, ...] = ()) -> dict:
+    """Coordinates of the given blocks and block entities in a region file"""
+    wanted = {name if ':' in name else 'minecraft:' + name for name in blocks}
+    wanted_entities = {name if ':' in name else 'minecraft:' + name for name in block_entities}
+    found = []
+    with Region.open(path) as region:
+        if wanted:
+            for x, y, z in region.find_blocks(wanted.__contains__).tolist():
+                found.append({'type': 'block', 'x': x, 'y': y, 'z': z})
+        if wanted_entities:
+            for chunk_x, chunk_z in region.generated_chunks():
+                chunk = region.get_chunk(chunk_x, chunk_z)
+                for entity in chunk.block_entities or ():
+                    entity_id = entity['id'].value if 'id' in entity else ''
+                    if entity_id in wanted_entities:
+                        found.append({
+                            'type': 'block_entity', 'id': entity_id,
+                            'x': entity['x'].value, 'y': entity['y'].value, 'z': entity['z'].value,
+                        })
+    return {'file': str(path), 'found': found}
+
+def _color(name: str) -> tuple[int, int, int]:
+    color = _COLORS.get(name)
+    if color is None:
+        value = zlib.crc32(name.encode())
+        color = (value & 0xFF, value >> 8 & 0xFF, value >> 16 & 0xFF)
+    return color
+
+def _write_png(path: Path, pixels: np.ndarray):
+    """Writes an ``(height, width, 3)`` ``uint8`` array as a PNG"""
+    height, width, _ = pixels.shape
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    # Every row starts with its filter type, 0 (none)
+    rows = np.concatenate((np.zeros((height, 1), dtype=np.uint8), pixels.reshape(height, -1)), axis=1)
+    path.write_bytes(
+        b'\x89PNG\r\n\x1a\n'
+        + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+        + chunk(b'IDAT', zlib.compress(rows.tobytes()))
+        + chunk(b'IEND', b'')
+    )
+
+def render(path: Path, output: Path) -> dict:
+    """Renders the top view of a region file into a 512x512 PNG, one pixel per block"""
+    pixels = np.zeros((512, 512, 3), dtype=np.uint8)
+    with Region.open(path) as region:
+        for chunk_x, chunk_z in region.generated_chunks():
+            blocks, palette = region.get_chunk(chunk_x, chunk_z).to_array(force_new=True)
+            if not len(blocks):
+                continue
+            colors = np.array([_color(block.name()) for block in palette], dtype=np.uint8)
+            solid = ~np.isin(blocks, [i for i, block in enumerate(palette) if block.name() in _TRANSPARENT])
+            # Highest solid block of each column, found from the top down
+            top = blocks.shape[0] - 1 - np.argmax(solid[::-1], axis=0)
+            column = np.take_along_axis(blocks, top[None], axis=0)[0]
+            tile = colors[column]
+            # Darker the lower it is, so terrain shape shows
+            shade = 0.6 + 0.4 * top / max(blocks.shape[0] - 1, 1)
+            tile = (tile * shade[..., None]).astype(np.uint8)
+            tile[~solid.any(axis=0)] = 0
+            pixels[chunk_z * 16 : chunk_z * 16 + 16, chunk_x * 16 : chunk_x * 16 + 16] = tile
+    output.mkdir(parents=True, exist_ok=True)
+    image = output / (path.stem + '.png')
+    _write_png(image, pixels)
+    return {'file': str(path), 'image': str(image)}
+
+def verify(path: Path, salvage: Path | None = None, threads: int | None = None) -> dict:
+    """Checks the headers and compressed data of a region file, optionally saving its valid chunks elsewhere"""
+    if salvage is None:
+        return verify_region(path, jobs=threads).to_dict()
+    salvage.mkdir(parents=True, exist_ok=True)
+    _, report = salvage_region(path, salvage / path.name, jobs=threads)
+    return report.to_dict() | {'salvaged': str(salvage / path.name)}
+
+def _safe(func: Callable[..., dict], path: Path) -> dict:
+    # Errors are reported per file, so one bad file doesn't stop the rest
+    try:
+        return func(path)
+    except EmptyRegionFile:
+        return {'file': str(path), 'empty': True}
+    except Exception as e:
+        return {'file': str(path), 'error': f'{type(e).__name__}: {e}'}
+
+def run(func: Callable[..., dict], paths: list[Path], jobs: int = 1, progress: bool = True) -> Iterator[dict]:
+    """
+    Runs ``func`` on each region file, in ``jobs`` processes,
+    and yields its results in the order they finish
+    """
+    total = len(paths)
+    show = progress and total > 0
+    tty = sys.stderr.isatty()
+
+    def report(done: int, path: Path):
+        if show:
+            print(f'\r[{done}/{total}] {path.name}', end='' if tty else '\n', file=sys.stderr, flush=True)
+
+    if jobs <= 1:
+        for done, path in enumerate(paths, 1):
+            result = _safe(func, path)
+            report(done, path)
+            yield result
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(_safe, func, path): path for path in paths}
+            for done, future in enumerate(as_completed(futures), 1):
+                report(done, futures[future])
+                yield future.result()
+    if show and tty:
+        print(file=sys.stderr)
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='anvil', description='Inspect Minecraft region files')
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('paths', nargs='+', help='Region files or folders containing them')
+    common.add_argument('-j', '--jobs', type=int, default=1, help='Number of processes, 0 for one per CPU')
+    common.add_argument('-q', '--quiet', action='store_true', help="Don't show progress")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('info', parents=[common], help='Header statistics and fragmentation')
+
+    sub = commands.add_parser('count', parents=[common], help='Block histogram')
+    sub.add_argument('--force-new', action='store_true', help='Convert pre-1.13 blocks to their modern names')
+
+    sub = commands.add_parser('find', parents=[common], help='Find blocks or block entities')
+    sub.add_argument('-b', '--block', action='append', default=[], help='Block name, like diamond_ore (repeatable)')
+    sub.add_argument('-e', '--block-entity', action='append', default=[], help='Block entity id, like chest (repeatable)')
+
+    sub = commands.add_parser('render', parents=[common], help='Top view PNG of each region')
+    sub.add_argument('-o', '--output', type=Path, default=Path('.'), help='Folder for the images')
+
+    sub = commands.add_parser('verify', parents=[common], help='Check headers and compressed data of every chunk')
+    sub.add_argument('--salvage', type=Path, help='Folder where to write copies of the regions with only their valid chunks')
+    return parser
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parser().parse_args(argv)
+    if args.command == 'info':
+        func = info
+    elif args.command == 'count':
+        func = functools.partial(count, force_new=args.force_new)
+    elif args.command == 'find':
+        if not args.block and not args.block_entity:
+            print('anvil find: give at least one --block or --block-entity', file=sys.stderr)
+            return 2
+        func = functools.partial(find, blocks=tuple(args.block), block_entities=tuple(args.block_entity))
+    elif args.command == 'render':
+        func = functools.partial(render, output=args.output)
+
+    jobs = args.jobs or os.cpu_count() or 1
+    if args.command == 'verify':
+        # Files are checked with a thread per CPU, unless there's already a process per file
+        func = functools.partial(verify, salvage=args.salvage, threads=1 if jobs > 1 else None)
+    totals: Counter = Counter()
+    failed = False
+    for result in run(func, region_files(args.paths), jobs=jobs, progress=not args.quiet):
+        print(json.dumps(result), flush=True)
+        failed = failed or 'error' in result or result.get('ok') is False
+        totals.update(result.get('blocks', {}))
+    if args.command == 'count':
+        print(json.dumps({'total': dict(totals.most_common())}), flush=True)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
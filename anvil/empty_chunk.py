@@ -1,8 +1,16 @@
+from collections.abc import Sequence
 from .block import Block
 from .empty_section import EmptySection
 from .raw_section import RawSection
 from .errors import OutOfBoundsCoordinates, EmptySectionAlreadyExists
+from .utils import remap_palette, pack_states, pack_nibbles
+from .chunk import _VERSION_20w17a, _VERSION_21w06a, _VERSION_21w15a, _VERSION_21w37a, _VERSION_21w43a
+from .light import AIR, FLUIDS, opacity, blocks_motion, sky_light
+from .nbt_stream import NBTWriter, TAG_COMPOUND
+from . import metrics
 from nbt import nbt
+import numpy as np
+import time
 
 # TODO: Determine if should update this file to modern Minecraft
 class EmptyChunk:
@@ -113,25 +121,241 @@ class EmptyChunk:
             self.add_section(section)
         section.set_block(block, x, y % 16, z)
 
-    def save(self) -> nbt.NBTFile:
+    def _writable_section(self, y: int) -> EmptySection:
+        section = self.sections[y]
+        if section is None:
+            section = EmptySection(y)
+            self.add_section(section)
+        return section
+
+    def _check_height(self, y1: int, y2: int) -> None:
+        height = len(self.sections) * 16
+        if y1 < 0 or y2 >= height:
+            raise OutOfBoundsCoordinates(f'Y ({y1!r} to {y2!r}) must be in range of 0 to {height - 1}')
+
+    def fill(self, block: Block, x1: int, y1: int, z1: int, x2: int, y2: int, z2: int) -> None:
         """
-        Saves the chunk data to a :class:`NBTFile`
+        Fills in blocks from ``(x1, y1, z1)`` to ``(x2, y2, z2)``, both included,
+        assigning a whole slab per section at once
+
+        Parameters
+        ----------
+        block
+            Block to place
+        int x1, z1, x2, z2
+            In range of 0 to 15
+        int y1, y2
+            In range of 0 to 255
+
+        Raises
+        ------
+        anvil.OutOfBoundCoordidnates
+            If X, Y or Z are not in the proper range
+        """
+        x1, x2 = sorted((x1, x2))
+        y1, y2 = sorted((y1, y2))
+        z1, z2 = sorted((z1, z2))
+        if x1 < 0 or x2 > 15:
+            raise OutOfBoundsCoordinates(f'X ({x1!r} to {x2!r}) must be in range of 0 to 15')
+        if z1 < 0 or z2 > 15:
+            raise OutOfBoundsCoordinates(f'Z ({z1!r} to {z2!r}) must be in range of 0 to 15')
+        self._check_height(y1, y2)
+
+        for section_y in range(y1 // 16, y2 // 16 + 1):
+            low = max(y1, section_y * 16) - section_y * 16
+            high = min(y2, section_y * 16 + 15) - section_y * 16
+            self._writable_section(section_y).fill(block, x1, low, z1, x2, high, z2)
+
+    def fill_array(self, origin: tuple[int, int, int], indexes: np.ndarray, palette: Sequence[Block | None]) -> None:
+        """
+        Copies a block of palette indexes into the chunk, a whole slab per section at once
+
+        Parameters
+        ----------
+        origin
+            ``(x, y, z)`` where ``indexes[0, 0, 0]`` goes, X and Z being chunk coordinates
+        indexes
+            3D array of indexes on ``palette``, in YZX order
+        palette
+            The blocks the indexes refer to
+
+        Raises
+        ------
+        anvil.OutOfBoundCoordidnates
+            If the array does not fit in the chunk
+        """
+        x, y, z = origin
+        height, depth, width = indexes.shape
+        if height == 0:
+            return
+        if x < 0 or x + width > 16:
+            raise OutOfBoundsCoordinates(f'X ({x!r} to {x + width - 1!r}) must be in range of 0 to 15')
+        if z < 0 or z + depth > 16:
+            raise OutOfBoundsCoordinates(f'Z ({z!r} to {z + depth - 1!r}) must be in range of 0 to 15')
+        self._check_height(y, y + height - 1)
+
+        for section_y in range(y // 16, (y + height - 1) // 16 + 1):
+            low = max(y, section_y * 16)
+            high = min(y + height, section_y * 16 + 16)
+            self._writable_section(section_y).fill_array(
+                (x, low - section_y * 16, z), indexes[low - y : high - y], palette
+            )
+
+    def to_array(self, lowest: int | None = None, highest: int | None = None) -> tuple[np.ndarray, tuple[Block, ...]]:
+        """
+        Returns all the blocks in the chunk as a single array of indexes on a chunk-wide palette,
+        same as :meth:`anvil.Chunk.to_array`
+
+        Parameters
+        ----------
+        lowest
+            Y index of the lowest section to include, defaults to the lowest existing section
+        highest
+            Y index of the highest section to include, defaults to the highest existing section
+
+        Returns
+        -------
+        tuple[numpy.ndarray, tuple[Block, ...]]
+            A ``(height, 16, 16)`` ``uint16`` array in YZX order and the palette. Air is always index 0
+        """
+        existing = [section.y for section in self.sections if section is not None]
+        if lowest is None:
+            lowest = min(existing, default=0)
+        if highest is None:
+            highest = max(existing, default=lowest - 1)
+
+        merged: dict = {EmptySection.air: 0}
+        blocks = np.zeros((max(highest - lowest + 1, 0) * 16, 16, 16), dtype=np.uint16)
+        for section in self.sections:
+            if section is None or not lowest <= section.y <= highest:
+                continue
+            start = (section.y - lowest) * 16
+            # The palette first, as it may compact the section's blocks
+            palette = section.palette()
+            indexes = np.asarray(section.blocks).reshape(16, 16, 16)
+            blocks[start : start + 16] = remap_palette(indexes, palette, merged)
+        return blocks, tuple(merged)
+
+    @classmethod
+    def from_array(cls, x: int, z: int, blocks: np.ndarray, palette: Sequence[Block], lowest: int = 0) -> 'EmptyChunk':
+        """
+        Creates a chunk from a whole column of palette indexes, like the ones returned by :meth:`to_array`
+
+        Each section is a :class:`RawSection` viewing its slice of ``blocks``, so nothing is copied
+        until saving. Sections that are all air are left out.
+
+        Parameters
+        ----------
+        int x, z
+            Chunk's coordinates
+        blocks
+            ``(height, 16, 16)`` array of indexes on ``palette`` in YZX order,
+            ``height`` being a multiple of 16
+        palette
+            The blocks the indexes refer to, shared by every section
+        lowest
+            Y index of the section ``blocks[0]`` belongs to
+
+        Raises
+        ------
+        ValueError
+            If the array does not have the right shape or has indexes outside the palette
+        """
+        blocks = np.asarray(blocks)
+        if blocks.ndim != 3 or blocks.shape[1:] != (16, 16) or blocks.shape[0] % 16:
+            raise ValueError(f'Expected a (height, 16, 16) array with height multiple of 16, got {blocks.shape}')
+
+        air = [i for i, block in enumerate(palette) if block is not None and block.name() == 'minecraft:air']
+        chunk = cls(x, z)
+        for i in range(blocks.shape[0] // 16):
+            section = blocks[i * 16 : i * 16 + 16]
+            if air and not (section != air[0]).any():
+                continue
+            chunk.add_section(RawSection(lowest + i, section, palette))
+        return chunk
+
+    def _world_bottom(self) -> int:
+        # The world goes down to -64 since 21w37a, and did in 21w06a's snapshots
+        if self.version >= _VERSION_21w37a or _VERSION_21w06a <= self.version < _VERSION_21w15a:
+            return -64
+        return 0
+
+    def _heightmaps(self, blocks: np.ndarray, palette: tuple[Block | None, ...], lowest: int) -> nbt.TAG_Compound:
+        """Computes every heightmap of a finished chunk from its :meth:`to_array`"""
+        names = [block.name() if block is not None else 'minecraft:air' for block in palette]
+        solid = np.array([blocks_motion(name) for name in names])
+        fluid = np.array([
+            name in FLUIDS or (block is not None and str(block.properties.get('waterlogged', '')).lower() == 'true')
+            for name, block in zip(names, palette)
+        ])
+        leaves = np.array([name.endswith('_leaves') for name in names])
+        not_air = np.array([name not in AIR for name in names])
+
+        bottom = self._world_bottom()
+        height = 384 if bottom < 0 else 256
+        bits = height.bit_length()
+        stretches = self.version < _VERSION_20w17a
+
+        heightmaps = nbt.TAG_Compound()
+        heightmaps.name = 'Heightmaps'
+        for name, matches in (
+            ('MOTION_BLOCKING', solid | fluid),
+            ('MOTION_BLOCKING_NO_LEAVES', (solid | fluid) & ~leaves),
+            ('OCEAN_FLOOR', solid),
+            ('WORLD_SURFACE', not_air),
+        ):
+            column = matches[blocks]
+            # One above the highest matching block, counted from the bottom of the world, 0 if there's none
+            top = column.shape[0] - np.argmax(column[::-1], axis=0)
+            values = np.where(column.any(axis=0), top + lowest * 16 - bottom, 0)
+            tag = nbt.TAG_Long_Array(name=name)
+            tag.value = pack_states(values.reshape(-1), bits, stretches=stretches).tolist()
+            heightmaps.tags.append(tag)
+        return heightmaps
+
+    def save(self, compute_heightmaps: bool = False, compute_skylight: bool = False) -> nbt.NBTFile:
+        """
+        Saves the chunk data to a :class:`NBTFile`,
+        using the structure of the chunk's :attr:`version`
+
+        Parameters
+        ----------
+        compute_heightmaps
+            Whether to compute and save the chunk's heightmaps, which Minecraft otherwise
+            computes when the chunk loads
+        compute_skylight
+            Whether to compute and save each section's sky light, refer to :func:`anvil.light.sky_light`.
+            Block light is not computed
 
         Notes
         -----
         Does not contain most data a regular chunk would have,
         but minecraft stills accept it.
         """
+        lowest, light, heightmaps = self._computed(compute_heightmaps, compute_skylight)
         root = nbt.NBTFile()
         root.tags.append(nbt.TAG_Int(name='DataVersion',value=self.version))
-        level = nbt.TAG_Compound()
-        # Needs to be in a separate line because it just gets
-        # ignored if you pass it as a kwarg in the constructor
-        level.name = 'Level'
+        modern = self.version >= _VERSION_21w43a
+        if modern:
+            # The Level tag was removed and its contents moved up to the root
+            level = root
+            level.tags.extend([
+                nbt.TAG_List(name='block_entities', type=nbt.TAG_Compound),
+                nbt.TAG_List(name='fluid_ticks', type=nbt.TAG_Compound),
+                # The world's bottom section, as Minecraft writes it, not the lowest one saved
+                nbt.TAG_Int(name='yPos', value=self._world_bottom() // 16),
+            ])
+        else:
+            level = nbt.TAG_Compound()
+            # Needs to be in a separate line because it just gets
+            # ignored if you pass it as a kwarg in the constructor
+            level.name = 'Level'
+            level.tags.extend([
+                nbt.TAG_List(name='Entities', type=nbt.TAG_Compound),
+                nbt.TAG_List(name='TileEntities', type=nbt.TAG_Compound),
+                nbt.TAG_List(name='LiquidTicks', type=nbt.TAG_Compound),
+            ])
         level.tags.extend([
-            nbt.TAG_List(name='Entities', type=nbt.TAG_Compound),
-            nbt.TAG_List(name='TileEntities', type=nbt.TAG_Compound),
-            nbt.TAG_List(name='LiquidTicks', type=nbt.TAG_Compound),
             nbt.TAG_Int(name='xPos', value=self.x),
             nbt.TAG_Int(name='zPos', value=self.z),
             nbt.TAG_Long(name='LastUpdate', value=0),
@@ -139,7 +363,90 @@ class EmptyChunk:
             nbt.TAG_Byte(name='isLightOn', value=1),
             nbt.TAG_String(name='Status', value='full')
         ])
-        sections = nbt.TAG_List(name='Sections', type=nbt.TAG_Compound)
+        sections = nbt.TAG_List(name='sections' if modern else 'Sections', type=nbt.TAG_Compound)
+        for s in self._saved_sections():
+            section = s.save(self.version)
+            if light is not None:
+                start = (s.y - lowest) * 16
+                sky = nbt.TAG_Byte_Array(name='SkyLight')
+                sky.value = pack_nibbles(light[start : start + 16])
+                section.tags.append(sky)
+            sections.tags.append(section)
+        level.tags.append(sections)
+        if heightmaps is not None:
+            level.tags.append(heightmaps)
+        if not modern:
+            root.tags.append(level)
+        return root
+
+    def encode(self, compute_heightmaps: bool = False, compute_skylight: bool = False) -> bytes:
+        """
+        Encodes the chunk to uncompressed NBT, the same data as :meth:`save` without building its tags
+
+        Parameters
+        ----------
+        compute_heightmaps
+            Refer to :meth:`save`
+        compute_skylight
+            Refer to :meth:`save`
+        """
+        if metrics.enabled:
+            start = time.perf_counter()
+        lowest, light, heightmaps = self._computed(compute_heightmaps, compute_skylight)
+        writer = NBTWriter()
+        writer.begin_compound()
+        writer.write_int('DataVersion', self.version)
+        modern = self.version >= _VERSION_21w43a
+        if modern:
+            writer.begin_list('block_entities', TAG_COMPOUND, 0)
+            writer.begin_list('fluid_ticks', TAG_COMPOUND, 0)
+            writer.write_int('yPos', self._world_bottom() // 16)
+        else:
+            writer.begin_compound('Level')
+            writer.begin_list('Entities', TAG_COMPOUND, 0)
+            writer.begin_list('TileEntities', TAG_COMPOUND, 0)
+            writer.begin_list('LiquidTicks', TAG_COMPOUND, 0)
+        writer.write_int('xPos', self.x)
+        writer.write_int('zPos', self.z)
+        writer.write_long('LastUpdate', 0)
+        writer.write_long('InhabitedTime', 0)
+        writer.write_byte('isLightOn', 1)
+        writer.write_string('Status', 'full')
+
+        sections = list(self._saved_sections())
+        writer.begin_list('sections' if modern else 'Sections', TAG_COMPOUND, len(sections))
+        for s in sections:
+            sky = None
+            if light is not None:
+                start_y = (s.y - lowest) * 16
+                sky = light[start_y : start_y + 16]
+            s.write(writer, self.version, sky_light=sky)
+        if heightmaps is not None:
+            writer.write_tag(heightmaps)
+        if not modern:
+            writer.end_compound()
+        writer.end_compound()
+
+        if metrics.enabled:
+            metrics.record('nbt_encode_seconds', time.perf_counter() - start)
+        return writer.getvalue()
+
+    def _computed(self, compute_heightmaps: bool, compute_skylight: bool) -> tuple[int, np.ndarray | None, nbt.TAG_Compound | None]:
+        """Returns the lowest section's Y, the sky light and the heightmaps that are asked for"""
+        lowest = min((s.y for s in self.sections if s), default=0)
+        light = heightmaps = None
+        if compute_heightmaps or compute_skylight:
+            blocks, palette = self.to_array()
+            if compute_skylight:
+                opacities = np.array([
+                    opacity(block.name()) if block is not None else 0 for block in palette
+                ], dtype=np.uint8)
+                light = sky_light(opacities[blocks])
+            if compute_heightmaps:
+                heightmaps = self._heightmaps(blocks, palette, lowest)
+        return lowest, light, heightmaps
+
+    def _saved_sections(self):
         for s in self.sections:
             if s:
                 p = s.palette()
@@ -147,7 +454,4 @@ class EmptyChunk:
                 # So we can just skip them
                 if len(p) == 1 and p[0] and p[0].name() == 'minecraft:air':
                     continue
-                sections.tags.append(s.save())
-        level.tags.append(sections)
-        root.tags.append(level)
-        return root
+                yield s
@@ -1,14 +1,81 @@
+from collections.abc import Sequence
 from typing import BinaryIO
 from .empty_chunk import EmptyChunk
-from .chunk import Chunk
+from .chunk import Chunk, _VERSION_21w43a
 from .empty_section import EmptySection
 from .raw_section import RawSection
 from .block import Block
 from .errors import OutOfBoundsCoordinates
-from io import BytesIO
+from .utils import remap_palette
+from .nbt_stream import encode
 from nbt import nbt
+import numpy as np
 import zlib
 import math
+import time
+from . import metrics
+
+def chunk_record(nbt_data: nbt.NBTFile | bytes) -> bytes:
+    """
+    Compresses chunk NBT data into the record stored in region files:
+    its 4 byte length, the compression type (2, zlib) and the compressed data
+
+    Parameters
+    ----------
+    nbt_data
+        The chunk's root tag, or its already encoded NBT like from :meth:`anvil.EmptyChunk.encode`
+    """
+    if not metrics.enabled:
+        if not isinstance(nbt_data, bytes):
+            nbt_data = encode(nbt_data)
+        compressed = zlib.compress(nbt_data)
+    else:
+        start = time.perf_counter()
+        if not isinstance(nbt_data, bytes):
+            nbt_data = encode(nbt_data)
+            metrics.record('nbt_encode_seconds', time.perf_counter() - start)
+        encoded = time.perf_counter()
+        compressed = zlib.compress(nbt_data)
+        metrics.record('save_compress_seconds', time.perf_counter() - encoded)
+        metrics.record('bytes_compressed', len(compressed))
+        metrics.record('chunks_saved')
+    return (len(compressed) + 1).to_bytes(4, 'big') + b'\x02' + compressed
+
+def pack_region(records: Sequence[bytes | None], timestamps: Sequence[int] | None = None) -> bytes:
+    """
+    Builds a region file (``.mca``) out of its chunk records
+
+    Parameters
+    ----------
+    records
+        1024 chunk records, as returned by :func:`chunk_record` or :meth:`anvil.Region.chunk_record`,
+        in header order (``x + z * 32``). ``None`` for chunks that aren't generated
+    timestamps
+        Last save time of each chunk, all 0 if not given
+
+    Returns
+    -------
+    bytes
+        The region file, padded to a multiple of 4KiB
+        as Minecraft only accepts region files that are like that
+    """
+    locations = bytearray(4096)
+    stamps = bytearray(4096)
+    body = []
+    # The two headers take up the first two sectors
+    sector = 2
+    for i, record in enumerate(records):
+        if record is None:
+            # 4 null bytes represent non-generated chunks to minecraft
+            continue
+        sector_count = math.ceil(len(record) / 4096)
+        locations[i * 4 : i * 4 + 4] = sector.to_bytes(3, 'big') + sector_count.to_bytes(1, 'big')
+        if timestamps is not None:
+            stamps[i * 4 : i * 4 + 4] = timestamps[i].to_bytes(4, 'big')
+        body.append(record)
+        body.append(bytes(-len(record) % 4096))
+        sector += sector_count
+    return bytes(locations) + bytes(stamps) + b''.join(body)
 
 def from_inclusive(a, b):
     """Returns a range from a to b, including both endpoints"""
@@ -160,12 +227,29 @@ class EmptyRegion:
         if self.inside(x, y, z):
             self.set_block(block, x, y, z)
 
+    def _chunk_boxes(self, x1: int, x2: int, z1: int, z2: int):
+        """
+        Yields ``(chunk, x1, x2, z1, z2)`` for every chunk intersecting the given
+        inclusive area (clipped to this region), making the chunks that don't exist
+        """
+        x1, z1 = max(x1, self.x * 512), max(z1, self.z * 512)
+        x2, z2 = min(x2, self.x * 512 + 511), min(z2, self.z * 512 + 511)
+        for cz in range(z1 // 16, z2 // 16 + 1):
+            for cx in range(x1 // 16, x2 // 16 + 1):
+                chunk = self.chunks[cz % 32 * 32 + cx % 32]
+                if chunk is None:
+                    chunk = EmptyChunk(cx, cz)
+                    self.add_chunk(chunk)
+                yield chunk, max(x1, cx * 16), min(x2, cx * 16 + 15), max(z1, cz * 16), min(z2, cz * 16 + 15)
+
     def fill(self, block: Block, x1: int, y1: int, z1: int, x2: int, y2: int, z2: int, ignore_outside: bool=False):
         """
         Fills in blocks from
         ``(x1, y1, z1)`` to ``(x2, y2, z2)``
         in a rectangle.
 
+        The area is split in per-section slabs, each one filled at once.
+
         Parameters
         ----------
         block: :class:`Block`
@@ -187,15 +271,115 @@ class EmptyRegion:
             if not self.inside(x2, y2, z2):
                 raise OutOfBoundsCoordinates(f'Second coords ({x2}, {y2}, {z2}) is not inside this region')
 
-        for y in from_inclusive(y1, y2):
-            for z in from_inclusive(z1, z2):
-                for x in from_inclusive(x1, x2):
-                    if ignore_outside:
-                        self.set_if_inside(block, x, y, z)
-                    else:
-                        self.set_block(block, x, y, z)
+        x1, x2 = sorted((x1, x2))
+        z1, z2 = sorted((z1, z2))
+        for chunk, cx1, cx2, cz1, cz2 in self._chunk_boxes(x1, x2, z1, z2):
+            chunk.fill(block, cx1 % 16, y1, cz1 % 16, cx2 % 16, y2, cz2 % 16)
 
-    def save(self, file: str | BinaryIO | None = None) -> bytes:
+    def fill_array(self, origin: tuple[int, int, int], indexes: np.ndarray, palette: Sequence[Block | None], ignore_outside: bool=False):
+        """
+        Copies a block of palette indexes into the region,
+        a whole slab per section at once
+
+        Parameters
+        ----------
+        origin
+            ``(x, y, z)`` global coordinates where ``indexes[0, 0, 0]`` goes
+        indexes
+            3D array of indexes on ``palette``, in YZX order
+        palette
+            The blocks the indexes refer to
+        ignore_outside
+            Whether to ignore the part of the array that's outside the region
+
+        Raises
+        ------
+        anvil.OutOfBoundsCoordinates
+            If the array is not inside the region
+        """
+        x, y, z = origin
+        indexes = np.asarray(indexes)
+        height, depth, width = indexes.shape
+        if height == 0 or depth == 0 or width == 0:
+            return
+        if not ignore_outside:
+            if not self.inside(x, y, z):
+                raise OutOfBoundsCoordinates(f'Origin ({x}, {y}, {z}) is not inside this region')
+            if not self.inside(x + width - 1, y + height - 1, z + depth - 1):
+                raise OutOfBoundsCoordinates(f'Array of size {(width, height, depth)} does not fit inside this region')
+
+        for chunk, cx1, cx2, cz1, cz2 in self._chunk_boxes(x, x + width - 1, z, z + depth - 1):
+            chunk.fill_array(
+                (cx1 % 16, y, cz1 % 16),
+                indexes[:, cz1 - z : cz2 - z + 1, cx1 - x : cx2 - x + 1],
+                palette
+            )
+
+    def paste(self, source, origin: tuple[int, int, int], ignore_outside: bool=False):
+        """
+        Pastes all the blocks of another region, chunk or schematic into this region
+
+        Parameters
+        ----------
+        source
+            Anything with a ``to_array()`` method returning an index array and its palette,
+            like :class:`anvil.Region`, :class:`anvil.Chunk` or :class:`EmptyRegion`
+        origin
+            ``(x, y, z)`` global coordinates where the source's lowest corner goes
+        ignore_outside
+            Whether to ignore the part of the source that's outside the region
+
+        Raises
+        ------
+        anvil.OutOfBoundsCoordinates
+            If the source does not fit inside the region
+        """
+        indexes, palette = source.to_array()
+        self.fill_array(origin, indexes, palette, ignore_outside=ignore_outside)
+
+    def to_array(self, lowest: int | None = None, highest: int | None = None) -> tuple[np.ndarray, tuple[Block, ...]]:
+        """
+        Returns all the blocks in the region as a single array of indexes on a region-wide palette,
+        same as :meth:`anvil.Region.to_array`
+
+        Parameters
+        ----------
+        lowest
+            Y index of the lowest section to include, defaults to the lowest existing section
+        highest
+            Y index of the highest section to include, defaults to the highest existing section
+
+        Returns
+        -------
+        tuple[numpy.ndarray, tuple[Block, ...]]
+            A ``(height, 512, 512)`` ``uint16`` array in YZX order, using region-local X and Z,
+            and the palette. Air is always index 0
+        """
+        existing = [
+            section.y for chunk in self.chunks if chunk is not None and not isinstance(chunk, Chunk)
+            for section in chunk.sections if section is not None
+        ]
+        if lowest is None:
+            lowest = min(existing, default=0)
+        if highest is None:
+            highest = max(existing, default=lowest - 1)
+
+        merged: dict = {EmptySection.air: 0}
+        blocks = np.zeros((max(highest - lowest + 1, 0) * 16, 512, 512), dtype=np.uint16)
+        for i, chunk in enumerate(self.chunks):
+            if chunk is None or isinstance(chunk, Chunk):
+                continue
+            chunk_blocks, palette = chunk.to_array(lowest, highest)
+            x, z = i % 32 * 16, i // 32 * 16
+            blocks[:, z : z + 16, x : x + 16] = remap_palette(chunk_blocks, palette, merged)
+        return blocks, tuple(merged)
+
+    def save(
+            self,
+            file: str | BinaryIO | None = None,
+            compute_heightmaps: bool = False,
+            compute_skylight: bool = False
+    ) -> bytes:
         """
         Returns the region as bytes with
         the anvil file format structure,
@@ -206,63 +390,28 @@ class EmptyRegion:
         file
             Either a path or a file object, if given region
             will be saved there.
+        compute_heightmaps, compute_skylight
+            Passed on to :meth:`anvil.EmptyChunk.encode` for every chunk made with :class:`anvil.EmptyChunk`
         """
         # Store all the chunks data as zlib compressed nbt data
-        chunks_data = []
+        records = []
         for chunk in self.chunks:
             if chunk is None:
-                chunks_data.append(None)
+                records.append(None)
                 continue
-            chunk_data = BytesIO()
             if isinstance(chunk, Chunk):
-                nbt_data = nbt.NBTFile()
-                nbt_data.tags.append(nbt.TAG_Int(name='DataVersion', value=chunk.version))
-                nbt_data.tags.append(chunk.data)
-            else:
-                nbt_data = chunk.save()
-            nbt_data.write_file(buffer=chunk_data)
-            chunk_data.seek(0)
-            chunk_data = zlib.compress(chunk_data.read())
-            chunks_data.append(chunk_data)
-
-        # This is what is added after the location and timestamp header
-        chunks_bytes = bytes()
-        offsets = []
-        for chunk in chunks_data:
-            if chunk is None:
-                offsets.append(None)
-                continue
-            # 4 bytes are for length, b'\x02' is the compression type which is 2 since its using zlib
-            to_add = (len(chunk)+1).to_bytes(4, 'big') + b'\x02' + chunk
-
-            # offset in 4KiB sectors
-            sector_offset = len(chunks_bytes) // 4096
-            sector_count = math.ceil(len(to_add) / 4096)
-            offsets.append((sector_offset, sector_count))
-
-            # Padding to be a multiple of 4KiB long
-            to_add += bytes(4096 - (len(to_add) % 4096))
-            chunks_bytes += to_add
-
-        locations_header = bytes()
-        for offset in offsets:
-            # None means the chunk is not an actual chunk in the region
-            # and will be 4 null bytes, which represents non-generated chunks to minecraft
-            if offset is None:
-                locations_header += bytes(4)
+                if chunk.version is not None and chunk.version >= _VERSION_21w43a:
+                    # Chunk.data is already the root tag
+                    nbt_data = chunk.data
+                else:
+                    nbt_data = nbt.NBTFile()
+                    nbt_data.tags.append(nbt.TAG_Int(name='DataVersion', value=chunk.version))
+                    nbt_data.tags.append(chunk.data)
             else:
-                # offset is (sector offset, sector count)
-                locations_header += (offset[0] + 2).to_bytes(3, 'big') + offset[1].to_bytes(1, 'big')
-
-        # Set them all as 0
-        timestamps_header = bytes(4096)
-
-        final = locations_header + timestamps_header + chunks_bytes
+                nbt_data = chunk.encode(compute_heightmaps=compute_heightmaps, compute_skylight=compute_skylight)
+            records.append(chunk_record(nbt_data))
 
-        # Pad file to be a multiple of 4KiB in size
-        # as Minecraft only accepts region files that are like that
-        final += bytes(4096 - (len(final) % 4096))
-        assert len(final) % 4096 == 0 # just in case
+        final = pack_region(records)
 
         # Save to a file if it was given
         if file:
@@ -1,36 +1,59 @@
+from collections.abc import Sequence
 from . import Block
 from .errors import OutOfBoundsCoordinates
 from .base_section import BaseSection
-from .utils import _update_fmt, bin_append
-from nbt import nbt
-import array
-
-nbt.TAG_Long_Array.update_fmt = _update_fmt
+from .utils import pack_states
+import numpy as np
 
 class EmptySection(BaseSection):
     """
     Used for making own sections.
 
-    This is where the blocks are actually stored, in a 16³ sized array.
-    To save up some space, ``None`` is used instead of the air block object,
-    and will be replaced with ``self.air`` when needed
+    This is where the blocks are actually stored, in a 16³ sized array of
+    indexes on the section's palette. The palette is kept up to date as blocks
+    are set, starting with just air, so it's ready when saving.
 
     Attributes
     ----------
     y: :class:`int`
         Section's Y index
-    blocks: List[:class:`Block`]
-        1D list of blocks
+    blocks: :class:`numpy.ndarray`
+        1D ``uint16`` array of indexes on the palette, in YZX order
     air: :class:`Block`
-        An air block
+        An air block, shared by every section
     """
-    __slots__ = ('y', 'blocks', 'air')
+    __slots__ = ('y', 'blocks', '_palette', '_indexes')
+    air = Block('minecraft', 'air')
+
     def __init__(self, y: int):
         super().__init__(y)
-        # None is the same as an air block
-        self.blocks: list[Block | None] = [None] * 4096
-        # Block that will be used when None
-        self.air = Block('minecraft', 'air')
+        # Index 0 is air, so a new section is all air
+        self.blocks = np.zeros(4096, dtype=np.uint16)
+        self._palette: list[Block] = [self.air]
+        self._indexes: dict[Block, int] = {self.air: 0}
+
+    @classmethod
+    def from_array(cls, y: int, indexes: np.ndarray, palette: Sequence[Block]) -> 'EmptySection':
+        """
+        Creates a section holding a copy of existing blocks,
+        like the ones returned by :meth:`anvil.Chunk.get_section_array`
+
+        Parameters
+        ----------
+        y
+            Section's Y index
+        indexes
+            4096 indexes on ``palette``, in YZX order
+        palette
+            The blocks the indexes refer to
+        """
+        section = cls(y)
+        section.blocks = np.array(indexes, dtype=np.uint16).reshape(4096)
+        section._palette = list(palette)
+        section._indexes = {}
+        for i, block in enumerate(section._palette):
+            section._indexes.setdefault(block, i)
+        return section
 
     @staticmethod
     def inside(x: int, y: int, z: int) -> bool:
@@ -44,51 +67,126 @@ class EmptySection(BaseSection):
         """
         return x >= 0 and x <= 15 and y >= 0 and y <= 15 and z >= 0 and z <= 15
 
+    def palette_index(self, block: Block | None) -> int:
+        """
+        Returns the index of a block on the palette, adding it to the palette if needed
+
+        Parameters
+        ----------
+        block
+            The block, ``None`` is the same as air
+        """
+        if block is None:
+            block = self.air
+        index = self._indexes.get(block)
+        if index is None:
+            index = len(self._palette)
+            self._palette.append(block)
+            self._indexes[block] = index
+        return index
+
+    def _compact(self) -> None:
+        """Removes the palette entries that are no longer used by any block"""
+        used = np.bincount(self.blocks, minlength=len(self._palette)) > 0
+        if used.all():
+            return
+        lut = np.cumsum(used, dtype=np.uint16) - 1
+        self.blocks = lut[self.blocks]
+        self._palette = [block for block, keep in zip(self._palette, used.tolist()) if keep]
+        self._indexes = {block: i for i, block in enumerate(self._palette)}
+
     def palette(self) -> tuple[Block | None, ...]:
         """
-        Generates and returns a tuple of all the different blocks in the section
-        The order can change as it uses sets, but should be fine when saving since
-        it's only called once.
+        Returns a tuple of all the different blocks in the section,
+        in the order used by :attr:`blocks`
         """
-        palette = set(self.blocks)
-        if None in palette:
-            palette.remove(None)
-            palette.add(self.air)
-        return tuple(palette)
+        self._compact()
+        return tuple(self._palette)
     
-    def blockstates(self, palette: tuple[Block | None, ...] | None = None) -> array.array:
+    def blockstates(self, palette: tuple[Block | None, ...] | None = None, stretches: bool = True) -> np.ndarray:
         """
-        Returns a list of each block's index in the palette.
-        
+        Returns each block's index in the palette, packed into longs.
+
         This is used in the BlockStates tag of the section.
 
         Parameters
         ----------
         palette
-            Section's palette. If not given will generate one.
+            Section's palette. If not given will use :meth:`palette`.
+        stretches
+            Whether indexes can be split between two longs, which is the layout
+            used before 20w17a. Otherwise each long is padded with unused bits
+
+        Returns
+        -------
+        numpy.ndarray
+            ``uint64`` array of the packed longs, refer to :func:`anvil.utils.pack_states`
         """
-        palette = palette or self.palette()
+        own_palette = self.palette()
+        indexes = self.blocks
+        if palette is not None and tuple(palette) != own_palette:
+            order = {block if block is not None else self.air: i for i, block in enumerate(palette)}
+            lut = np.array([order[block] for block in own_palette], dtype=np.uint16)
+            indexes = lut[indexes]
+        else:
+            palette = own_palette
         bits = max((len(palette) - 1).bit_length(), 4)
-        states = array.array('Q')
-        current = 0
-        current_len = 0
-        for block in self.blocks:
-            if block is None:
-                index = palette.index(self.air)
-            else:
-                index = palette.index(block)
-            # If it's more than 64 bits then add to list and start over
-            # with the remaining bits from last one
-            if current_len + bits > 64:
-                leftover = 64 - current_len
-                states.append(bin_append(index & ((1 << leftover) - 1), current, length=current_len))
-                current = index >> leftover
-                current_len = bits - leftover
-            else:
-                current = bin_append(index, current, length=current_len)
-                current_len += bits
-        states.append(current)
-        return states
+        return pack_states(indexes, bits, stretches=stretches)
+
+    def fill(self, block: Block, x1: int, y1: int, z1: int, x2: int, y2: int, z2: int):
+        """
+        Fills in blocks from ``(x1, y1, z1)`` to ``(x2, y2, z2)``, both included,
+        with a single slice assignment
+
+        Parameters
+        ----------
+        block
+            Block to set
+        int x1, y1, z1, x2, y2, z2
+            Coordinates, in range of 0-15
+
+        Raises
+        ------
+        anvil.OutOfBoundsCoordinates
+            If coordinates are not in range of 0-15
+        """
+        if not self.inside(x1, y1, z1) or not self.inside(x2, y2, z2):
+            raise OutOfBoundsCoordinates('X Y and Z must be in range of 0-15')
+        x1, x2 = sorted((x1, x2))
+        y1, y2 = sorted((y1, y2))
+        z1, z2 = sorted((z1, z2))
+        self.blocks.reshape(16, 16, 16)[y1 : y2 + 1, z1 : z2 + 1, x1 : x2 + 1] = self.palette_index(block)
+
+    def fill_array(self, origin: tuple[int, int, int], indexes: np.ndarray, palette: Sequence[Block | None]):
+        """
+        Copies a block of palette indexes into the section at once
+
+        Parameters
+        ----------
+        origin
+            ``(x, y, z)`` where ``indexes[0, 0, 0]`` goes
+        indexes
+            3D array of indexes on ``palette``, in YZX order
+        palette
+            The blocks the indexes refer to
+
+        Raises
+        ------
+        anvil.OutOfBoundsCoordinates
+            If the array does not fit in the section
+        """
+        x, y, z = origin
+        height, depth, width = indexes.shape
+        if height == 0 or depth == 0 or width == 0:
+            return
+        if not self.inside(x, y, z) or not self.inside(x + width - 1, y + height - 1, z + depth - 1):
+            raise OutOfBoundsCoordinates('X Y and Z must be in range of 0-15')
+
+        # Only add the palette entries that are actually used here
+        present = np.flatnonzero(np.bincount(indexes.reshape(-1), minlength=len(palette)))
+        lut = np.zeros(len(palette), dtype=np.uint16)
+        lut[present] = [self.palette_index(palette[i]) for i in present.tolist()]
+        self.blocks.reshape(16, 16, 16)[y : y + height, z : z + depth, x : x + width] = lut[indexes]
 
     def set_block(self, block: Block, x: int, y: int, z: int):
         """
@@ -109,7 +207,7 @@ class EmptySection(BaseSection):
         if not self.inside(x, y, z):
             raise OutOfBoundsCoordinates('X Y and Z must be in range of 0-15')
         index = y * 256 + z * 16 + x
-        self.blocks[index] = block
+        self.blocks[index] = self.palette_index(block)
 
     def get_block(self, x: int, y: int, z: int) -> Block:
         """
@@ -128,5 +226,4 @@ class EmptySection(BaseSection):
         if not self.inside(x, y, z):
             raise OutOfBoundsCoordinates('X Y and Z must be in range of 0-15')
         index = y * 256 + z * 16 + x
-        return self.blocks[index] or self.air
-
+        return self._palette[self.blocks[index]]
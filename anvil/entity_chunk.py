@@ -0,0 +1,125 @@
+from nbt import nbt
+from .region import Region
+from .errors import ChunkNotFound
+
+def normalize_id(entity_id: str) -> str:
+    """Returns the entity id in the ``namespace:entity_id`` format, assuming ``minecraft`` if no namespace is given"""
+    return entity_id if ':' in entity_id else 'minecraft:' + entity_id
+
+def id_needle(entity_id: str) -> bytes:
+    """
+    Returns the raw NBT bytes of an ``id`` string tag holding the given entity id
+
+    Searching a decompressed chunk for this is enough to know whether
+    the chunk can contain such entity, without decoding any NBT.
+    """
+    encoded = normalize_id(entity_id).encode('utf-8')
+    # TAG_String (8), name length (2), name, value length (2), value
+    return b'\x08\x00\x02id' + len(encoded).to_bytes(2, 'big') + encoded
+
+def inside_box(position: tuple[float, float, float], bbox: tuple[tuple[float, float, float], tuple[float, float, float]]) -> bool:
+    """
+    Returns if the given position is inside the bounding box, both corners included
+
+    Parameters
+    ----------
+    position
+        ``(x, y, z)`` position
+    bbox
+        ``((x1, y1, z1), (x2, y2, z2))`` corners, in any order
+    """
+    (x1, y1, z1), (x2, y2, z2) = bbox
+    x, y, z = position
+    return (
+        min(x1, x2) <= x <= max(x1, x2)
+        and min(y1, y2) <= y <= max(y1, y2)
+        and min(z1, z2) <= z <= max(z1, z2)
+    )
+
+class EntityChunk:
+    """
+    Represents a chunk from an entity region file (``entities/r.X.Z.mca``).
+
+    Entities were moved out of the terrain chunks into their own
+    region files in 20w45a. Note that this is read only.
+
+    Attributes
+    ----------
+    x: :class:`int`
+        Chunk's X position
+    z: :class:`int`
+        Chunk's Z position
+    version: :class:`int`
+        Version of the chunk NBT structure
+    data: :class:`nbt.NBTFile`
+        Raw NBT data of the chunk
+    entities: :class:`nbt.TAG_List`
+        ``self.data['Entities']`` as an attribute for easier use
+    """
+    __slots__ = ('version', 'data', 'x', 'z', 'entities')
+
+    def __init__(self, nbt_data: nbt.NBTFile):
+        try:
+            self.version = nbt_data['DataVersion'].value
+        except KeyError:
+            self.version = None
+
+        self.data = nbt_data
+        self.x, self.z = nbt_data['Position'].value
+        try:
+            self.entities = nbt_data['Entities']
+        except KeyError:
+            self.entities = nbt.TAG_List(name='Entities', type=nbt.TAG_Compound)
+
+    def filter(
+            self,
+            ids: str | set[str] | None = None,
+            bbox: tuple[tuple[float, float, float], tuple[float, float, float]] | None = None
+    ) -> list[nbt.TAG_Compound]:
+        """
+        Returns the entities in this chunk matching the given filters
+
+        Parameters
+        ----------
+        ids
+            Entity id or ids to keep, like ``minecraft:zombie``.
+            The namespace can be omitted. If not given, keeps every entity
+        bbox
+            ``((x1, y1, z1), (x2, y2, z2))`` box in global coordinates, both corners included.
+            If not given, keeps every entity
+        """
+        if isinstance(ids, str):
+            ids = {ids}
+        if ids is not None:
+            ids = {normalize_id(i) for i in ids}
+
+        entities = []
+        for entity in self.entities:
+            if ids is not None and entity['id'].value not in ids:
+                continue
+            if bbox is not None and not inside_box(tuple(p.value for p in entity['Pos']), bbox):
+                continue
+            entities.append(entity)
+        return entities
+
+    @classmethod
+    def from_region(cls, region: str | Region, chunk_x: int, chunk_z: int):
+        """
+        Creates a new entity chunk from region and the chunk's X and Z
+
+        Parameters
+        ----------
+        region
+            Either a :class:`anvil.Region` or a region file name (like ``entities/r.0.0.mca``)
+
+        Raises
+        ----------
+        anvil.ChunkNotFound
+            If a chunk is outside this region or has no entity data
+        """
+        if isinstance(region, str):
+            region = Region.from_file(region)
+        nbt_data = region.chunk_data(chunk_x, chunk_z)
+        if nbt_data is None:
+            raise ChunkNotFound(f'Could not find chunk ({chunk_x}, {chunk_z})')
+        return cls(nbt_data)
@@ -0,0 +1,169 @@
+from collections import Counter
+from collections.abc import Generator
+from pathlib import Path
+from typing import BinaryIO
+import re
+from nbt import nbt
+from .region import Region
+from .entity_chunk import EntityChunk, id_needle, normalize_id
+from .errors import InvalidFileType, CorruptedData
+
+_REGION_NAME = re.compile(r'^r\.(-?\d+)\.(-?\d+)\.mca$')
+
+class EntityRegion(Region):
+    """
+    Read-only entity region (``entities/r.X.Z.mca``), introduced in 20w45a
+
+    Uses the same I/O as :class:`anvil.Region`, but can filter entities by
+    ``id`` and bounding box before paying for a full NBT decode of each chunk.
+
+    Attributes
+    ----------
+    data: :class:`bytes`
+        Region file (``.mca``) as bytes
+    x: :class:`int` | None
+        Region's X position, if known (taken from the file name when using :meth:`from_file`)
+    z: :class:`int` | None
+        Region's Z position, if known
+    """
+    __slots__ = ('x', 'z')
+    def __init__(
+            self, data: bytes, x: int | None = None, z: int | None = None,
+            errors: str = 'raise', include_raw: bool = False
+    ):
+        super().__init__(data, errors=errors, include_raw=include_raw)
+        self.x = x
+        self.z = z
+
+    def get_entity_chunk(self, chunk_x: int, chunk_z: int) -> EntityChunk:
+        """
+        Returns the entity chunk at given coordinates,
+        same as doing ``EntityChunk.from_region(region, chunk_x, chunk_z)``
+
+        :rtype: :class:`anvil.EntityChunk`
+        """
+        return EntityChunk.from_region(self, chunk_x, chunk_z)
+
+    def _chunk_outside(self, chunk_x: int, chunk_z: int, bbox) -> bool:
+        # Only possible to skip by position before decoding when we know where the region is
+        if bbox is None or self.x is None or self.z is None:
+            return False
+        (x1, _, z1), (x2, _, z2) = bbox
+        bx = (self.x * 32 + chunk_x) * 16
+        bz = (self.z * 32 + chunk_z) * 16
+        return bx + 16 <= min(x1, x2) or bx > max(x1, x2) or bz + 16 <= min(z1, z2) or bz > max(z1, z2)
+
+    def iter_entities(
+            self,
+            ids: str | set[str] | None = None,
+            bbox: tuple[tuple[float, float, float], tuple[float, float, float]] | None = None
+    ) -> Generator[nbt.TAG_Compound, None, None]:
+        """
+        Returns a generator for all the entities in this region matching the given filters
+
+        Chunks are skipped without decoding any NBT when they're outside ``bbox``
+        (only if the region's position is known), or when their raw data does not
+        contain an ``id`` tag for any of the given ``ids``.
+        Chunks that fail to decode are handled according to :attr:`errors`.
+
+        Parameters
+        ----------
+        ids
+            Entity id or ids to keep, like ``minecraft:zombie``.
+            The namespace can be omitted. If not given, keeps every entity
+        bbox
+            ``((x1, y1, z1), (x2, y2, z2))`` box in global coordinates, both corners included.
+            If not given, keeps every entity
+
+        Yields
+        ------
+        :class:`nbt.TAG_Compound`
+        """
+        if isinstance(ids, str):
+            ids = {ids}
+        if ids is not None:
+            ids = {normalize_id(i) for i in ids}
+            needles = [id_needle(i) for i in ids]
+
+        for chunk_x, chunk_z in self.generated_chunks():
+            if self._chunk_outside(chunk_x, chunk_z, bbox):
+                continue
+
+            record = None
+            try:
+                record = self.chunk_record(chunk_x, chunk_z)
+                if record is None:
+                    continue
+                raw = self.decompress_record(record)
+                if ids is not None and not any(needle in raw for needle in needles):
+                    continue
+                chunk = EntityChunk(self.parse_chunk_bytes(raw))
+            except CorruptedData as error:
+                self._describe(error, chunk_x, chunk_z, record)
+                self._on_corrupted(error)
+                continue
+            yield from chunk.filter(ids=ids, bbox=bbox)
+
+    def count_entities(
+            self,
+            ids: str | set[str] | None = None,
+            bbox: tuple[tuple[float, float, float], tuple[float, float, float]] | None = None
+    ) -> Counter:
+        """
+        Returns how many entities of each id are in this region,
+        takes the same filters as :meth:`iter_entities`
+
+        Returns
+        -------
+        collections.Counter
+            Entity id to count
+        """
+        return Counter(entity['id'].value for entity in self.iter_entities(ids=ids, bbox=bbox))
+
+    @classmethod
+    def open(cls, path: str | Path, errors: str = 'raise', include_raw: bool = False) -> 'EntityRegion':
+        """
+        Opens an entity region file, refer to :meth:`anvil.Region.open`
+
+        If named like ``r.X.Z.mca``, the region's position is taken from the file name.
+        """
+        match = _REGION_NAME.match(Path(path).name)
+        if match:
+            return super().open(path, int(match.group(1)), int(match.group(2)), errors=errors, include_raw=include_raw)
+        return super().open(path, errors=errors, include_raw=include_raw)
+
+    @classmethod
+    def from_file(cls, file: str | BinaryIO | Path, errors: str = 'raise', include_raw: bool = False) -> 'EntityRegion':
+        """
+        Creates a new entity region with the data from reading the given file
+
+        If given a path named like ``r.X.Z.mca``, the region's position is
+        taken from it, which allows skipping chunks outside a bounding box.
+
+        Parameters
+        ----------
+        file
+            Either a file path or a file object
+        errors, include_raw
+            Refer to :class:`anvil.Region`
+
+        Raises
+        ------
+        anvil.errors.InvalidFileType
+            If the method receives invalid input
+        """
+        if isinstance(file, (str, Path)):
+            match = _REGION_NAME.match(Path(file).name)
+            with open(file, 'rb') as f:
+                data = f.read()
+            position = (int(match.group(1)), int(match.group(2))) if match else (None, None)
+            region = cls(data, *position, errors=errors, include_raw=include_raw)
+            region.path = str(file)
+            return region
+        elif hasattr(file, 'read'):
+            return cls(file.read(), errors=errors, include_raw=include_raw)
+        else:
+            raise InvalidFileType({
+                'message':f"Expected str, Path, or file-like object, got {type(file).__name__}",
+                'data' : file
+            })
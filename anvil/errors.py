@@ -21,7 +21,64 @@ class GZipChunkData(Exception):
 class CorruptedData(Exception):
     """
     Exception used when trying to read corrupted data
+
+    Only carries small metadata about where the data came from, so keeping many of them
+    around (like :attr:`anvil.Region.corrupted`) is cheap. The chunk's raw bytes are only
+    kept when asked for with :attr:`anvil.Region.include_raw`.
+
+    Attributes
+    ----------
+    message: :class:`str`
+        What went wrong
+    path: :class:`str` | None
+        Region file the chunk is in, if the region was read from a path
+    chunk: tuple[:class:`int`, :class:`int`] | None
+        Region-local ``(x, z)`` of the chunk
+    offset: :class:`int` | None
+        Byte offset of the chunk in the region file
+    length: :class:`int` | None
+        Length of the chunk's compressed data, as written in its record
+    compression: :class:`int` | None
+        Compression type of the chunk
+    prefix: :class:`str`
+        Hex of the first 16 bytes of the data that failed to decode
+    data: :class:`bytes` | None
+        The chunk's record as stored in the region file, only if asked for
     """
+    def __init__(
+            self,
+            message: str,
+            path: str | None = None,
+            chunk: tuple[int, int] | None = None,
+            offset: int | None = None,
+            length: int | None = None,
+            compression: int | None = None,
+            prefix: bytes = b'',
+            data: bytes | None = None
+    ):
+        super().__init__(message)
+        self.message = message
+        self.path = path
+        self.chunk = chunk
+        self.offset = offset
+        self.length = length
+        self.compression = compression
+        self.prefix = bytes(prefix[:16]).hex()
+        self.data = data
+
+    def __str__(self):
+        details = ', '.join(
+            f'{name}={value}' for name, value in (
+                ('path', self.path),
+                ('chunk', self.chunk),
+                ('offset', self.offset),
+                ('length', self.length),
+                ('compression', self.compression),
+                ('prefix', self.prefix or None),
+            ) if value is not None
+        )
+        return f'{self.message} ({details})' if details else self.message
+
 class InvalidFileType(Exception):
     """
     Exception raised when file parameter is not a valid file path or file-like object
@@ -0,0 +1,228 @@
+"""
+Columnar export of block data, for analysis without parsing any NBT
+
+Each region becomes an uncompressed ``.npz`` file with these arrays:
+
+``blocks``
+    ``(sections, 16, 16, 16)`` ``uint16`` indexes on ``palette``, in YZX order
+``palette``
+    Block states as strings, like ``minecraft:oak_log[axis=y]`` (``id:data`` for pre-1.13 blocks)
+``section_y``
+    Y index of each section
+``section_chunk``
+    Index of each section's chunk in the chunk columns below
+``x``, ``z``, ``lowest_y``, ``version``, ``inhabited_time``
+    Chunk metadata, one value per chunk. ``version`` is -1 for chunks without a DataVersion
+
+Members are stored without compression, so :func:`load_npz` can memory-map every array
+instead of reading it. ``numpy.load`` reads them too.
+"""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import BinaryIO
+import functools
+import struct
+import zipfile
+import numpy as np
+from .block import Block, OldBlock
+from .region import Region
+from .utils import remap_palette
+from .errors import EmptyRegionFile
+
+def block_state(block: Block | OldBlock) -> str:
+    """Returns a block as a string, like ``minecraft:oak_log[axis=y]``, or ``id:data`` for pre-1.13 blocks"""
+    if isinstance(block, OldBlock):
+        return f'{block.id}:{block.data}'
+    if not block.properties:
+        return block.name()
+    properties = ','.join(f'{key}={_property_value(block.properties[key])}' for key in sorted(block.properties))
+    return f'{block.name()}[{properties}]'
+
+def _property_value(value) -> str:
+    # Same as when saving sections, booleans are either 'true' or 'false'
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+def parse_block_state(state: str) -> Block:
+    """
+    Creates a block from a string like ``minecraft:oak_log[axis=y]``, as returned by :func:`block_state`.
+    The namespace defaults to ``minecraft``
+
+    Raises
+    ------
+    ValueError
+        If the string isn't a block state
+    """
+    name, bracket, rest = state.partition('[')
+    properties = {}
+    if bracket:
+        if not rest.endswith(']'):
+            raise ValueError(f'Invalid block state {state!r}')
+        for pair in filter(None, rest[:-1].split(',')):
+            key, equals, value = pair.partition('=')
+            if not equals:
+                raise ValueError(f'Invalid block state {state!r}')
+            properties[key.strip()] = value.strip()
+    namespace, colon, block_id = name.strip().rpartition(':')
+    return Block(namespace if colon else 'minecraft', block_id, properties)
+
+def region_arrays(region: Region, force_new: bool = False) -> dict[str, np.ndarray]:
+    """
+    Returns the arrays exported for a region, refer to the module's description
+
+    Chunks that fail to decode are handled according to the region's :attr:`anvil.Region.errors`.
+
+    Parameters
+    ----------
+    region
+        The region to export
+    force_new
+        Refer to :meth:`anvil.Chunk.get_section_array`
+    """
+    merged: dict = {}
+    blocks = []
+    section_y = []
+    section_chunk = []
+    columns: dict[str, list[int]] = {'x': [], 'z': [], 'lowest_y': [], 'version': [], 'inhabited_time': []}
+
+    for chunk in region.iter_chunks():
+        arrays = chunk.section_arrays(force_new=force_new)
+        index = len(columns['x'])
+        for y in sorted(arrays):
+            indexes, palette = arrays[y]
+            blocks.append(remap_palette(indexes, palette, merged))
+            section_y.append(y)
+            section_chunk.append(index)
+
+        lowest = chunk.lowest_y if chunk.lowest_y is not None else min(arrays, default=0)
+        inhabited = chunk.data['InhabitedTime'].value if 'InhabitedTime' in chunk.data else 0
+        columns['x'].append(chunk.x)
+        columns['z'].append(chunk.z)
+        columns['lowest_y'].append(lowest)
+        columns['version'].append(chunk.version if chunk.version is not None else -1)
+        columns['inhabited_time'].append(inhabited)
+
+    return {
+        'blocks': np.stack(blocks) if blocks else np.zeros((0, 16, 16, 16), dtype=np.uint16),
+        'palette': np.array([block_state(block) for block in merged], dtype=str),
+        'section_y': np.array(section_y, dtype=np.int32),
+        'section_chunk': np.array(section_chunk, dtype=np.int32),
+        'x': np.array(columns['x'], dtype=np.int32),
+        'z': np.array(columns['z'], dtype=np.int32),
+        'lowest_y': np.array(columns['lowest_y'], dtype=np.int32),
+        'version': np.array(columns['version'], dtype=np.int32),
+        'inhabited_time': np.array(columns['inhabited_time'], dtype=np.int64),
+    }
+
+def region_to_npz(region: Region | str | Path, file: str | Path | BinaryIO, force_new: bool = False):
+    """
+    Exports a region's blocks and chunk metadata to an uncompressed ``.npz`` file
+
+    Parameters
+    ----------
+    region
+        The region, or the path to its file
+    file
+        Path or file object where to write the ``.npz`` file
+    force_new
+        Refer to :meth:`anvil.Chunk.get_section_array`
+
+    Raises
+    ------
+    anvil.errors.EmptyRegionFile
+        If the region file is empty
+    """
+    if isinstance(region, (str, Path)):
+        with Region.open(region) as opened:
+            arrays = region_arrays(opened, force_new=force_new)
+    else:
+        arrays = region_arrays(region, force_new=force_new)
+    np.savez(file, **arrays)
+
+def _export_file(path: Path, output: Path, force_new: bool) -> Path | None:
+    destination = output / (path.stem + '.npz')
+    try:
+        region_to_npz(path, destination, force_new=force_new)
+    except EmptyRegionFile:
+        # Minecraft leaves empty region files behind, there's nothing to export
+        return None
+    return destination
+
+def world_to_npz(folder: str | Path, output: str | Path, force_new: bool = False, jobs: int | None = None) -> list[Path]:
+    """
+    Exports every region file of a folder (like ``world/region``) with :func:`region_to_npz`,
+    into ``r.X.Z.npz`` files in ``output``
+
+    Parameters
+    ----------
+    folder
+        Folder containing the ``.mca`` files
+    output
+        Folder where to write the ``.npz`` files, created if needed
+    force_new
+        Refer to :meth:`anvil.Chunk.get_section_array`
+    jobs
+        Number of processes exporting regions at once.
+        Exports them in this process if not given
+
+    Returns
+    -------
+    list[pathlib.Path]
+        The files written, empty region files are skipped
+    """
+    paths = sorted(Path(folder).glob('r.*.*.mca'))
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    export = functools.partial(_export_file, output=output, force_new=force_new)
+    if jobs is None or jobs <= 1:
+        written = [export(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            written = list(pool.map(export, paths))
+    return [path for path in written if path is not None]
+
+def load_npz(path: str | Path, mode: str = 'r') -> dict[str, np.ndarray]:
+    """
+    Memory-maps every array of an uncompressed ``.npz`` file, like the ones from :func:`region_to_npz`,
+    so only the parts that are used get read
+
+    Parameters
+    ----------
+    path
+        Path to the ``.npz`` file
+    mode
+        Refer to :class:`numpy.memmap`, read-only by default
+
+    Raises
+    ------
+    ValueError
+        If an array is compressed or holds Python objects
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as file:
+        for info in archive.infolist():
+            name = info.filename.removesuffix('.npy')
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f'Array {name!r} is compressed and cannot be memory-mapped')
+            # The data starts after the local file header, which has its own name and extra field lengths
+            file.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack('<HH', file.read(4))
+            file.seek(info.header_offset + 30 + name_length + extra_length)
+
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+            if dtype.hasobject:
+                raise ValueError(f'Array {name!r} holds Python objects and cannot be memory-mapped')
+
+            if 0 in shape:
+                arrays[name] = np.empty(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(
+                    path, dtype=dtype, mode=mode, offset=file.tell(), shape=shape, order='F' if fortran_order else 'C'
+                )
+    return arrays
@@ -0,0 +1,155 @@
+"""
+Block tables used for light, heightmaps and spawning checks
+
+Only covers vanilla blocks, by name. They are approximations of the game's block
+shapes, good enough for finding where monsters can spawn across whole worlds
+and for precomputing heightmaps and sky light when writing chunks.
+"""
+import numpy as np
+
+#: Blocks that are empty space
+AIR = frozenset(('minecraft:air', 'minecraft:cave_air', 'minecraft:void_air'))
+
+# Blocks that mobs can't stand on: no collision, not a full block, or transparent
+_NOT_SOLID = frozenset((
+    'minecraft:water', 'minecraft:lava', 'minecraft:bubble_column', 'minecraft:light', 'minecraft:barrier',
+    'minecraft:grass', 'minecraft:short_grass', 'minecraft:tall_grass', 'minecraft:fern', 'minecraft:large_fern',
+    'minecraft:dead_bush', 'minecraft:dandelion', 'minecraft:poppy', 'minecraft:blue_orchid', 'minecraft:allium',
+    'minecraft:azure_bluet', 'minecraft:oxeye_daisy', 'minecraft:cornflower', 'minecraft:lily_of_the_valley',
+    'minecraft:wither_rose', 'minecraft:sunflower', 'minecraft:lilac', 'minecraft:rose_bush', 'minecraft:peony',
+    'minecraft:sugar_cane', 'minecraft:kelp', 'minecraft:kelp_plant', 'minecraft:seagrass', 'minecraft:tall_seagrass',
+    'minecraft:vine', 'minecraft:ladder', 'minecraft:snow', 'minecraft:cobweb', 'minecraft:fire', 'minecraft:soul_fire',
+    'minecraft:redstone_wire', 'minecraft:lever', 'minecraft:tripwire', 'minecraft:tripwire_hook',
+    'minecraft:brown_mushroom', 'minecraft:red_mushroom', 'minecraft:wheat', 'minecraft:carrots',
+    'minecraft:potatoes', 'minecraft:beetroots', 'minecraft:nether_wart', 'minecraft:glow_lichen',
+    'minecraft:sculk_vein', 'minecraft:spawner', 'minecraft:end_portal',
+    'minecraft:nether_portal', 'minecraft:ice', 'minecraft:glass', 'minecraft:tinted_glass', 'minecraft:chest',
+    'minecraft:trapped_chest', 'minecraft:ender_chest', 'minecraft:farmland', 'minecraft:dirt_path',
+    'minecraft:magma_block', 'minecraft:powder_snow', 'minecraft:scaffolding',
+))
+_NOT_SOLID_SUFFIXES = (
+    '_sapling', '_torch', '_button', '_pressure_plate', '_sign', '_banner', '_carpet', '_rail', '_slab',
+    '_stairs', '_fence', '_fence_gate', '_wall', '_door', '_trapdoor', '_pane', '_leaves', '_stained_glass',
+    '_tulip', '_coral', '_coral_fan', '_bed', '_candle', '_roots', '_fungus', '_vines', '_plant', '_head', '_skull',
+)
+
+def is_solid(name: str) -> bool:
+    """
+    Returns whether most monsters can spawn on top of a block, given in the ``namespace:block_id`` format
+
+    Full opaque blocks are, while air, liquids, plants, slabs, glass, leaves
+    and other blocks without a full top face are not.
+    """
+    return name not in AIR and name not in _NOT_SOLID and not name.endswith(_NOT_SOLID_SUFFIXES)
+
+# Blocks that let light through without dimming it
+_TRANSPARENT = frozenset((
+    'minecraft:light', 'minecraft:barrier', 'minecraft:glass', 'minecraft:structure_void', 'minecraft:end_rod',
+    'minecraft:grass', 'minecraft:short_grass', 'minecraft:tall_grass', 'minecraft:fern', 'minecraft:large_fern',
+    'minecraft:dead_bush', 'minecraft:dandelion', 'minecraft:poppy', 'minecraft:blue_orchid', 'minecraft:allium',
+    'minecraft:azure_bluet', 'minecraft:oxeye_daisy', 'minecraft:cornflower', 'minecraft:lily_of_the_valley',
+    'minecraft:wither_rose', 'minecraft:sunflower', 'minecraft:lilac', 'minecraft:rose_bush', 'minecraft:peony',
+    'minecraft:sugar_cane', 'minecraft:vine', 'minecraft:ladder', 'minecraft:snow', 'minecraft:fire',
+    'minecraft:soul_fire', 'minecraft:redstone_wire', 'minecraft:lever', 'minecraft:tripwire',
+    'minecraft:tripwire_hook', 'minecraft:brown_mushroom', 'minecraft:red_mushroom', 'minecraft:wheat',
+    'minecraft:carrots', 'minecraft:potatoes', 'minecraft:beetroots', 'minecraft:nether_wart',
+    'minecraft:glow_lichen', 'minecraft:sculk_vein', 'minecraft:spawner', 'minecraft:nether_portal',
+    'minecraft:end_portal', 'minecraft:chest', 'minecraft:trapped_chest', 'minecraft:ender_chest',
+    'minecraft:scaffolding', 'minecraft:bamboo', 'minecraft:cactus', 'minecraft:chain', 'minecraft:lantern',
+    'minecraft:soul_lantern', 'minecraft:bell', 'minecraft:conduit', 'minecraft:beacon', 'minecraft:hopper',
+))
+_TRANSPARENT_SUFFIXES = (
+    '_sapling', '_torch', '_button', '_pressure_plate', '_sign', '_banner', '_carpet', '_rail', '_slab',
+    '_stairs', '_fence', '_fence_gate', '_wall', '_door', '_trapdoor', '_pane', '_stained_glass',
+    '_tulip', '_coral', '_coral_fan', '_bed', '_candle', '_roots', '_fungus', '_vines', '_plant', '_head', '_skull',
+)
+# Blocks that dim light by one level, like water
+_DIMMING = frozenset((
+    'minecraft:water', 'minecraft:bubble_column', 'minecraft:ice', 'minecraft:frosted_ice', 'minecraft:cobweb',
+    'minecraft:slime_block', 'minecraft:honey_block', 'minecraft:kelp', 'minecraft:kelp_plant',
+    'minecraft:seagrass', 'minecraft:tall_seagrass',
+))
+
+#: Blocks that are liquids, or always hold water
+FLUIDS = frozenset((
+    'minecraft:water', 'minecraft:lava', 'minecraft:bubble_column', 'minecraft:kelp', 'minecraft:kelp_plant',
+    'minecraft:seagrass', 'minecraft:tall_seagrass',
+))
+
+# Blocks that things go through
+_NO_COLLISION = frozenset((
+    'minecraft:water', 'minecraft:lava', 'minecraft:bubble_column', 'minecraft:light', 'minecraft:structure_void',
+    'minecraft:grass', 'minecraft:short_grass', 'minecraft:tall_grass', 'minecraft:fern', 'minecraft:large_fern',
+    'minecraft:dead_bush', 'minecraft:dandelion', 'minecraft:poppy', 'minecraft:blue_orchid', 'minecraft:allium',
+    'minecraft:azure_bluet', 'minecraft:oxeye_daisy', 'minecraft:cornflower', 'minecraft:lily_of_the_valley',
+    'minecraft:wither_rose', 'minecraft:sunflower', 'minecraft:lilac', 'minecraft:rose_bush', 'minecraft:peony',
+    'minecraft:sugar_cane', 'minecraft:kelp', 'minecraft:kelp_plant', 'minecraft:seagrass', 'minecraft:tall_seagrass',
+    'minecraft:vine', 'minecraft:cobweb', 'minecraft:fire', 'minecraft:soul_fire', 'minecraft:redstone_wire',
+    'minecraft:lever', 'minecraft:tripwire', 'minecraft:tripwire_hook', 'minecraft:brown_mushroom',
+    'minecraft:red_mushroom', 'minecraft:wheat', 'minecraft:carrots', 'minecraft:potatoes', 'minecraft:beetroots',
+    'minecraft:nether_wart', 'minecraft:glow_lichen', 'minecraft:sculk_vein', 'minecraft:nether_portal',
+    'minecraft:end_portal',
+))
+_NO_COLLISION_SUFFIXES = (
+    '_sapling', '_torch', '_button', '_pressure_plate', '_sign', '_banner', '_rail', '_tulip', '_coral',
+    '_coral_fan', '_roots', '_fungus', '_vines', '_plant',
+)
+
+def opacity(name: str) -> int:
+    """
+    Returns how many light levels a block takes away from light going through it,
+    given in the ``namespace:block_id`` format: 0 for air and see-through blocks,
+    1 for water, ice and leaves, and 15 for every other block
+    """
+    if name in AIR or name in _TRANSPARENT or name.endswith(_TRANSPARENT_SUFFIXES):
+        return 0
+    if name in _DIMMING or name.endswith('_leaves'):
+        return 1
+    return 15
+
+def blocks_motion(name: str) -> bool:
+    """Returns whether a block, given in the ``namespace:block_id`` format, stops entities going through it"""
+    return name not in AIR and name not in _NO_COLLISION and not name.endswith(_NO_COLLISION_SUFFIXES)
+
+def sky_light(opacities: np.ndarray) -> np.ndarray:
+    """
+    Computes the sky light of a chunk, lit from above with full sky light
+
+    Sky light goes straight down at full strength through transparent blocks. Once a block
+    has dimmed it, it loses at least a level per block further down, the same as when it
+    spreads sideways. Light coming from neighbouring chunks is not taken into account.
+
+    Parameters
+    ----------
+    opacities
+        ``(height, 16, 16)`` array of the :func:`opacity` of each block, in YZX order
+
+    Returns
+    -------
+    numpy.ndarray
+        ``(height, 16, 16)`` ``uint8`` array of light levels
+    """
+    opacities = np.asarray(opacities, dtype=np.int16)
+    # Spreading loses at least a level per block
+    cost = np.maximum(opacities, 1)
+    opaque = opacities >= 15
+
+    # Straight down from the top: blocks only lose their opacity while the light above is full,
+    # which is while nothing above has dimmed it
+    above = np.cumsum(opacities[::-1], axis=0)[::-1] - opacities
+    dimmed = np.cumsum(np.where(above == 0, opacities, cost)[::-1], axis=0, dtype=np.int32)[::-1]
+    light = np.clip(15 - dimmed, 0, 15).astype(np.int16)
+
+    for _ in range(14):
+        neighbours = np.zeros_like(light)
+        np.maximum(neighbours[1:], light[:-1], out=neighbours[1:])
+        np.maximum(neighbours[:-1], light[1:], out=neighbours[:-1])
+        np.maximum(neighbours[:, 1:], light[:, :-1], out=neighbours[:, 1:])
+        np.maximum(neighbours[:, :-1], light[:, 1:], out=neighbours[:, :-1])
+        np.maximum(neighbours[:, :, 1:], light[:, :, :-1], out=neighbours[:, :, 1:])
+        np.maximum(neighbours[:, :, :-1], light[:, :, 1:], out=neighbours[:, :, :-1])
+        spread = np.where(opaque, 0, np.maximum(light, neighbours - cost))
+        if np.array_equal(spread, light):
+            break
+        light = spread
+    return light.astype(np.uint8)
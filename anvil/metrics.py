@@ -0,0 +1,119 @@
+"""
+Opt-in counters and timers for the read and write pipeline
+
+Nothing is measured until a sink is added, and until then each instrumented
+spot only costs a check of :data:`enabled`. A sink is any callable taking
+the name of a metric and its value, which is called every time it is recorded::
+
+    with anvil.metrics.collect() as stats:
+        region.count_blocks()
+    print(stats.totals['nbt_decode_seconds'], stats.totals['chunks_parsed'])
+
+Metrics
+-------
+``bytes_read``
+    Bytes read from region files on disk
+``bytes_decompressed`` / ``decompress_seconds``
+    Size and time of decompressing chunk records
+``chunks_parsed`` / ``nbt_decode_seconds``
+    Chunks whose NBT data was parsed, and the time it took
+``sections_decoded`` / ``section_decode_seconds``
+    Sections whose block states were unpacked into arrays, and the time it took
+``blocks_allocated``
+    :class:`anvil.Block` instances created
+``chunks_saved`` / ``nbt_encode_seconds`` / ``save_compress_seconds`` / ``bytes_compressed``
+    Chunks written for a region file, the time spent serializing and compressing them, and their compressed size
+"""
+from __future__ import annotations
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+import logging
+import threading
+
+Sink = Callable[[str, float], None]
+
+#: Whether any sink is listening, checked before measuring anything
+enabled = False
+
+_sinks: tuple[Sink, ...] = ()
+_sinks_lock = threading.Lock()
+
+def add_sink(sink: Sink):
+    """Starts sending every recorded metric to ``sink``"""
+    global _sinks, enabled
+    with _sinks_lock:
+        _sinks = _sinks + (sink,)
+        enabled = True
+
+def remove_sink(sink: Sink):
+    """Stops sending metrics to ``sink``, measuring stops once there are no sinks left"""
+    global _sinks, enabled
+    with _sinks_lock:
+        sinks = list(_sinks)
+        sinks.remove(sink)
+        _sinks = tuple(sinks)
+        enabled = bool(_sinks)
+
+def record(name: str, value: float = 1):
+    """
+    Sends a metric to every sink
+
+    Callers check :data:`enabled` first, so the value isn't even measured without sinks.
+    """
+    for sink in _sinks:
+        sink(name, value)
+
+class Stats:
+    """
+    Sink that adds up every metric it receives, safe to share between threads
+
+    Attributes
+    ----------
+    totals: dict[:class:`str`, :class:`float`]
+        Sum of the values of each metric
+    counts: dict[:class:`str`, :class:`int`]
+        How many times each metric was recorded
+    """
+    __slots__ = ('totals', 'counts', '_lock')
+    def __init__(self):
+        self.totals: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, name: str, value: float):
+        with self._lock:
+            self.totals[name] = self.totals.get(name, 0) + value
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def __getitem__(self, name: str) -> float:
+        return self.totals.get(name, 0)
+
+    def __repr__(self):
+        return f'Stats({self.totals!r})'
+
+@contextmanager
+def collect() -> Iterator[Stats]:
+    """Collects every metric recorded inside the ``with`` block, from any thread"""
+    stats = Stats()
+    add_sink(stats)
+    try:
+        yield stats
+    finally:
+        remove_sink(stats)
+
+def logging_sink(logger: logging.Logger | None = None, level: int = logging.DEBUG) -> Sink:
+    """
+    Returns a sink that logs every metric, to be given to :func:`add_sink`
+
+    Parameters
+    ----------
+    logger
+        Defaults to the ``anvil.metrics`` logger
+    level
+        Level of the log records
+    """
+    logger = logger or logging.getLogger(__name__)
+
+    def sink(name: str, value: float):
+        logger.log(level, '%s %s', name, value)
+    return sink
@@ -0,0 +1,215 @@
+from nbt import nbt
+from .block import Block, plain_block
+from .chunk import Chunk, _VERSION_17w47a, _VERSION_21w39a, _VERSION_21w43a
+from .empty_section import EmptySection
+from .region import Region
+from .errors import ChunkNotFound
+
+class MutableChunk:
+    """
+    Editable view of a :class:`anvil.Chunk`
+
+    Sections are only decoded when they are first used, and only the ones
+    changed by :meth:`set_block` or :meth:`replace` are encoded again when saving.
+    The rest of the chunk, including the packed block states of every other section,
+    is saved exactly as it was read.
+
+    Only chunks from 17w47a (1.13) onwards can be edited.
+
+    Attributes
+    ----------
+    chunk: :class:`anvil.Chunk`
+        The chunk being edited, its NBT data is updated in place by :meth:`save`
+    x: :class:`int`
+        Chunk's X position
+    z: :class:`int`
+        Chunk's Z position
+    version: :class:`int`
+        Version of the chunk NBT structure
+    dirty: set[:class:`int`]
+        Y index of every section changed since the chunk was read
+    root: :class:`nbt.NBTFile` | None
+        The chunk's whole NBT data as read from the region file, for chunks before 21w43a
+        where :attr:`anvil.Chunk.data` only holds its ``Level`` compound.
+        Other tags of the root, like ``ForgeCaps``, are kept when saving
+
+    Raises
+    ------
+    ValueError
+        If the chunk is from before 17w47a
+    """
+    __slots__ = ('chunk', 'x', 'z', 'version', 'dirty', 'root', '_sections')
+
+    def __init__(self, chunk: Chunk, root: nbt.NBTFile | None = None):
+        if chunk.version is None or chunk.version < _VERSION_17w47a:
+            raise ValueError('Only chunks from 17w47a (1.13) onwards can be edited')
+        self.chunk = chunk
+        self.x = chunk.x
+        self.z = chunk.z
+        self.version = chunk.version
+        self.dirty: set[int] = set()
+        self.root = root
+        self._sections: dict[int, EmptySection] = {}
+
+    def _sections_tag(self) -> nbt.TAG_List:
+        level = self.chunk.data
+        name = 'sections' if self.version >= _VERSION_21w43a else 'Sections'
+        if name not in level:
+            level.tags.append(nbt.TAG_List(name=name, type=nbt.TAG_Compound))
+        return level[name]
+
+    def _section_tag(self, y: int) -> nbt.TAG_Compound | None:
+        for section in self._sections_tag():
+            if section['Y'].value == y:
+                return section
+        return None
+
+    def section(self, y: int) -> EmptySection:
+        """
+        Returns the decoded section at given Y index, decoding it if it wasn't already.
+        Missing sections are all air
+
+        Changes made directly to the returned section must be followed
+        by adding its Y index to :attr:`dirty` to be saved.
+
+        Parameters
+        ----------
+        y
+            Section's Y index
+        """
+        section = self._sections.get(y)
+        if section is None:
+            arrays = self.chunk.get_section_array(self._section_tag(y))
+            if arrays is None:
+                section = EmptySection(y)
+            else:
+                indexes, palette = arrays
+                section = EmptySection.from_array(y, indexes, [plain_block(block) for block in palette])
+            self._sections[y] = section
+        return section
+
+    def get_block(self, x: int, y: int, z: int) -> Block:
+        """
+        Returns the block at given coordinates, including any change made so far
+
+        Parameters
+        ----------
+        int x, z
+            In range of 0 to 15
+        y
+            Global Y coordinate
+
+        Raises
+        ------
+        anvil.OutOfBoundsCoordinates
+            If X or Z are not in range of 0 to 15
+        """
+        return self.section(y // 16).get_block(x, y % 16, z)
+
+    def set_block(self, block: Block, x: int, y: int, z: int):
+        """
+        Sets the block at given coordinates
+
+        Parameters
+        ----------
+        block
+            Block to set
+        int x, z
+            In range of 0 to 15
+        y
+            Global Y coordinate
+
+        Raises
+        ------
+        anvil.OutOfBoundsCoordinates
+            If X or Z are not in range of 0 to 15
+        """
+        self.section(y // 16).set_block(block, x, y % 16, z)
+        self.dirty.add(y // 16)
+
+    def replace(self, old: Block, new: Block) -> int:
+        """
+        Replaces every ``old`` block in the chunk with ``new``
+
+        Only the sections that have ``old`` in their palette are decoded.
+
+        Returns
+        -------
+        int
+            How many blocks were replaced
+        """
+        replaced = 0
+        for tag in self._sections_tag():
+            y = tag['Y'].value
+            if y not in self._sections:
+                palette = self.chunk.get_palette(tag)
+                if not palette or old not in map(plain_block, palette):
+                    continue
+            section = self.section(y)
+            palette = section.palette()
+            if old not in palette:
+                continue
+            mask = section.blocks == palette.index(old)
+            count = int(mask.sum())
+            if count:
+                section.blocks[mask] = section.palette_index(new)
+                self.dirty.add(y)
+                replaced += count
+        return replaced
+
+    def save(self) -> nbt.NBTFile:
+        """
+        Encodes the changed sections back into the chunk's NBT data and returns it,
+        ready to be written to a region file
+
+        Light is marked as not computed on changed chunks, so Minecraft recalculates it when loading them.
+        """
+        if self.version >= _VERSION_21w39a:
+            block_tags = ('block_states',)
+        else:
+            block_tags = ('Palette', 'BlockStates')
+
+        sections = self._sections_tag()
+        for y in sorted(self.dirty):
+            new = self._sections[y].save(self.version)
+            old = self._section_tag(y)
+            if old is None:
+                # Keep the sections sorted by Y, as Minecraft saves them
+                position = sum(1 for section in sections if section['Y'].value < y)
+                sections.insert(position, new)
+                continue
+            for name in block_tags:
+                if name in old:
+                    del old[name]
+            for tag in new.tags:
+                if tag.name != 'Y':
+                    old.tags.append(tag)
+
+        level = self.chunk.data
+        if self.dirty:
+            for name in ('isLightOn', 'LightPopulated'):
+                if name in level:
+                    level[name].value = 0
+
+        if self.version >= _VERSION_21w43a:
+            return level
+        if self.root is not None:
+            # The level compound was edited in place
+            return self.root
+        root = nbt.NBTFile()
+        root.tags.append(nbt.TAG_Int(name='DataVersion', value=self.version))
+        root.tags.append(level)
+        return root
+
+    @classmethod
+    def from_region(cls, region: str | Region, chunk_x: int, chunk_z: int) -> 'MutableChunk':
+        """
+        Reads a chunk to edit it, refer to :meth:`anvil.Chunk.from_region`
+        """
+        if isinstance(region, str):
+            region = Region.from_file(region)
+        nbt_data = region.chunk_data(chunk_x, chunk_z)
+        if nbt_data is None:
+            raise ChunkNotFound(f'Could not find chunk ({chunk_x}, {chunk_z})')
+        # Chunk only keeps the Level compound of older chunks
+        return cls(Chunk(nbt_data), root=nbt_data)
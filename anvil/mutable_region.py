@@ -0,0 +1,129 @@
+from pathlib import Path
+from typing import BinaryIO
+import time
+from .block import Block
+from .region import Region
+from .mutable_chunk import MutableChunk
+from .empty_region import chunk_record, pack_region
+
+class MutableRegion:
+    """
+    Editable view of a :class:`anvil.Region`
+
+    Chunks are only read when they are first used. When saving, only the chunks
+    that were changed are encoded again, every other chunk is copied
+    compressed and with its timestamp, exactly as it was in the region.
+
+    Attributes
+    ----------
+    region: :class:`anvil.Region`
+        The region being edited, which is never modified
+    chunks: dict[tuple[int, int], :class:`anvil.MutableChunk`]
+        The chunks read so far, keyed by their region-local ``(x, z)``
+    """
+    __slots__ = ('region', 'chunks')
+
+    def __init__(self, region: Region):
+        self.region = region
+        self.chunks: dict[tuple[int, int], MutableChunk] = {}
+
+    def get_chunk(self, chunk_x: int, chunk_z: int) -> MutableChunk:
+        """
+        Returns the chunk at given coordinates, ready to be edited
+
+        Parameters
+        ----------
+        chunk_x
+            Chunk's X value
+        chunk_z
+            Chunk's Z value
+
+        Raises
+        ----------
+        anvil.ChunkNotFound
+            If the chunk hasn't been generated yet
+        """
+        key = (chunk_x % 32, chunk_z % 32)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = MutableChunk.from_region(self.region, *key)
+            self.chunks[key] = chunk
+        return chunk
+
+    def get_block(self, x: int, y: int, z: int) -> Block:
+        """
+        Returns the block at given global coordinates, including any change made so far
+        """
+        return self.get_chunk(x // 16, z // 16).get_block(x % 16, y, z % 16)
+
+    def set_block(self, block: Block, x: int, y: int, z: int):
+        """
+        Sets the block at given global coordinates
+
+        Parameters
+        ----------
+        block
+            Block to set
+        int x, y, z
+            Coordinates
+
+        Raises
+        ----------
+        anvil.ChunkNotFound
+            If the chunk hasn't been generated yet
+        """
+        self.get_chunk(x // 16, z // 16).set_block(block, x % 16, y, z % 16)
+
+    def replace(self, old: Block, new: Block) -> int:
+        """
+        Replaces every ``old`` block in the region with ``new``,
+        refer to :meth:`anvil.MutableChunk.replace`
+
+        Returns
+        -------
+        int
+            How many blocks were replaced
+        """
+        return sum(
+            self.get_chunk(chunk_x, chunk_z).replace(old, new)
+            for chunk_x, chunk_z in self.region.generated_chunks()
+        )
+
+    def save(self, file: str | Path | BinaryIO | None = None) -> bytes:
+        """
+        Returns the edited region as bytes, in the anvil file format
+
+        Parameters
+        ----------
+        file
+            Either a path or a file object, if given region
+            will be saved there.
+        """
+        now = int(time.time())
+        records = []
+        timestamps = []
+        for chunk_z in range(32):
+            for chunk_x in range(32):
+                chunk = self.chunks.get((chunk_x, chunk_z))
+                if chunk is not None and chunk.dirty:
+                    records.append(chunk_record(chunk.save()))
+                    timestamps.append(now)
+                else:
+                    records.append(self.region.chunk_record(chunk_x, chunk_z))
+                    timestamps.append(self.region.chunk_timestamp(chunk_x, chunk_z))
+
+        final = pack_region(records, timestamps)
+        if file:
+            if isinstance(file, (str, Path)):
+                with open(file, 'wb') as f:
+                    f.write(final)
+            else:
+                file.write(final)
+        return final
+
+    @classmethod
+    def from_file(cls, file: str | Path | BinaryIO) -> 'MutableRegion':
+        """
+        Reads a region file to edit it, refer to :meth:`anvil.Region.from_file`
+        """
+        return cls(Region.from_file(file))
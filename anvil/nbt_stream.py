@@ -0,0 +1,314 @@
+"""
+Streaming NBT encoder, writing chunk data straight into a bytearray
+
+Writes the same bytes as ``nbt.NBTFile.write_file``, but without building tag objects first.
+Long arrays are written from numpy arrays in a single big-endian conversion, whether their
+values are signed or not, so writing doesn't depend on :func:`anvil.utils._update_fmt`.
+
+:func:`read_scalars` goes the other way for a few tags, skipping over everything else in encoded NBT.
+:func:`scan_compound` and :func:`skip_payload` go through encoded NBT the same way for other readers.
+"""
+from __future__ import annotations
+from collections.abc import Callable, Collection, Sequence
+from struct import Struct, error as StructError
+from nbt import nbt
+import numpy as np
+from .utils import as_uint64
+from .errors import CorruptedData
+
+TAG_END = 0
+TAG_BYTE = 1
+TAG_SHORT = 2
+TAG_INT = 3
+TAG_LONG = 4
+TAG_FLOAT = 5
+TAG_DOUBLE = 6
+TAG_BYTE_ARRAY = 7
+TAG_STRING = 8
+TAG_LIST = 9
+TAG_COMPOUND = 10
+TAG_INT_ARRAY = 11
+TAG_LONG_ARRAY = 12
+
+_HEADER = Struct('>bH')
+_SHORT_LENGTH = Struct('>H')
+_LIST = Struct('>bi')
+_INT = Struct('>i')
+_NUMBERS = {
+    TAG_BYTE: Struct('>b'),
+    TAG_SHORT: Struct('>h'),
+    TAG_INT: _INT,
+    TAG_LONG: Struct('>q'),
+    TAG_FLOAT: Struct('>f'),
+    TAG_DOUBLE: Struct('>d'),
+}
+_SIZES = {tag_type: number.size for tag_type, number in _NUMBERS.items()}
+_ARRAY_ITEM_SIZES = {TAG_BYTE_ARRAY: 1, TAG_INT_ARRAY: 4, TAG_LONG_ARRAY: 8}
+
+class NBTWriter:
+    """
+    Writes NBT tags one after the other into :attr:`buffer`
+
+    Compounds are written by calling :meth:`begin_compound`, then writing their tags, then
+    :meth:`end_compound`. Compounds inside lists have no name, so only their tags and
+    :meth:`end_compound` are written after :meth:`begin_list`::
+
+        writer = NBTWriter()
+        writer.begin_compound()
+        writer.write_int('DataVersion', 3465)
+        writer.begin_list('sections', TAG_COMPOUND, 1)
+        writer.write_byte('Y', 0)
+        writer.end_compound()
+        writer.end_compound()
+
+    Attributes
+    ----------
+    buffer: :class:`bytearray`
+        The encoded data
+    """
+    __slots__ = ('buffer',)
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def getvalue(self) -> bytes:
+        """Returns the encoded data"""
+        return bytes(self.buffer)
+
+    def _header(self, tag_type: int, name: str):
+        encoded = name.encode('utf-8')
+        self.buffer += _HEADER.pack(tag_type, len(encoded))
+        self.buffer += encoded
+
+    def begin_compound(self, name: str = ''):
+        self._header(TAG_COMPOUND, name)
+
+    def end_compound(self):
+        self.buffer.append(TAG_END)
+
+    def begin_list(self, name: str, tag_type: int, length: int):
+        """Starts a list of ``length`` tags of ``tag_type``, which are written next without names"""
+        self._header(TAG_LIST, name)
+        self.buffer += _LIST.pack(tag_type, length)
+
+    def write_byte(self, name: str, value: int):
+        self._header(TAG_BYTE, name)
+        self.buffer += _NUMBERS[TAG_BYTE].pack(value)
+
+    def write_short(self, name: str, value: int):
+        self._header(TAG_SHORT, name)
+        self.buffer += _NUMBERS[TAG_SHORT].pack(value)
+
+    def write_int(self, name: str, value: int):
+        self._header(TAG_INT, name)
+        self.buffer += _INT.pack(value)
+
+    def write_long(self, name: str, value: int):
+        self._header(TAG_LONG, name)
+        self.buffer += _NUMBERS[TAG_LONG].pack(value)
+
+    def write_string(self, name: str, value: str):
+        self._header(TAG_STRING, name)
+        self.write_string_value(value)
+
+    def write_string_value(self, value: str):
+        """Writes a string without a name, as done inside lists"""
+        encoded = value.encode('utf-8')
+        self.buffer += _SHORT_LENGTH.pack(len(encoded))
+        self.buffer += encoded
+
+    def write_byte_array(self, name: str, values: bytes | bytearray | np.ndarray):
+        self._header(TAG_BYTE_ARRAY, name)
+        data = values.astype(np.uint8, copy=False).tobytes() if isinstance(values, np.ndarray) else bytes(values)
+        self.buffer += _INT.pack(len(data))
+        self.buffer += data
+
+    def write_int_array(self, name: str, values: Sequence[int] | np.ndarray):
+        self._header(TAG_INT_ARRAY, name)
+        values = np.asarray(values, dtype=np.int64).reshape(-1)
+        self.buffer += _INT.pack(len(values))
+        self.buffer += values.astype('>i4').tobytes()
+
+    def write_long_array(self, name: str, values: Sequence[int] | np.ndarray):
+        """Writes a long array, from signed or unsigned 64 bit values"""
+        self._header(TAG_LONG_ARRAY, name)
+        values = as_uint64(values).reshape(-1)
+        self.buffer += _INT.pack(len(values))
+        # Same bytes as the signed values the game reads
+        self.buffer += values.astype('>u8').tobytes()
+
+    def write_tag(self, tag: nbt.TAG):
+        """Writes a tag made with the ``nbt`` library, with its name"""
+        self._header(tag.id, tag.name or '')
+        self._payload(tag)
+
+    def _payload(self, tag: nbt.TAG):
+        tag_id = tag.id
+        if tag_id in _NUMBERS:
+            self.buffer += _NUMBERS[tag_id].pack(tag.value)
+        elif tag_id == TAG_STRING:
+            self.write_string_value(tag.value)
+        elif tag_id == TAG_COMPOUND:
+            for child in tag.tags:
+                self.write_tag(child)
+            self.end_compound()
+        elif tag_id == TAG_LIST:
+            self.buffer += _LIST.pack(tag.tagID, len(tag.tags))
+            for child in tag.tags:
+                self._payload(child)
+        elif tag_id == TAG_BYTE_ARRAY:
+            self.buffer += _INT.pack(len(tag.value))
+            self.buffer += bytes(tag.value)
+        elif tag_id == TAG_INT_ARRAY:
+            values = np.asarray(tag.value, dtype=np.int64)
+            self.buffer += _INT.pack(len(values))
+            self.buffer += values.astype('>i4').tobytes()
+        elif tag_id == TAG_LONG_ARRAY:
+            values = as_uint64(tag.value)
+            self.buffer += _INT.pack(len(values))
+            self.buffer += values.astype('>u8').tobytes()
+        else:
+            raise ValueError(f'Unknown tag type {tag_id}')
+
+def encode(root: nbt.TAG_Compound) -> bytes:
+    """
+    Encodes a tag made with the ``nbt`` library, like a chunk's :class:`nbt.NBTFile`,
+    same as ``root.write_file(buffer=...)`` without compression
+    """
+    writer = NBTWriter()
+    writer.write_tag(root)
+    return writer.getvalue()
+
+#: Called by :func:`scan_compound` with a tag's name, type and where its payload starts.
+#: Returns where the payload ends if it went through it, otherwise None and the payload is skipped
+Visitor = Callable[[bytes, int, int], 'int | None']
+
+def skip_payload(data: bytes | bytearray, pos: int, tag_type: int) -> int:
+    """
+    Returns where the payload of a tag of ``tag_type`` starting at ``pos`` ends,
+    without decoding it
+
+    Raises
+    ------
+    ValueError
+        If a tag type is unknown
+    IndexError, struct.error
+        If the data ends too early
+    """
+    size = _SIZES.get(tag_type)
+    if size is not None:
+        return pos + size
+    size = _ARRAY_ITEM_SIZES.get(tag_type)
+    if size is not None:
+        return pos + 4 + _INT.unpack_from(data, pos)[0] * size
+    if tag_type == TAG_STRING:
+        return pos + 2 + _SHORT_LENGTH.unpack_from(data, pos)[0]
+    if tag_type == TAG_LIST:
+        item_type, length = _LIST.unpack_from(data, pos)
+        pos += 5
+        size = _SIZES.get(item_type)
+        if size is not None:
+            return pos + size * max(length, 0)
+        for _ in range(length):
+            pos = skip_payload(data, pos, item_type)
+        return pos
+    if tag_type == TAG_COMPOUND:
+        return scan_compound(data, pos, None)
+    raise ValueError(f'Unknown tag type {tag_type}')
+
+def scan_compound(data: bytes | bytearray, pos: int, visit: Visitor | None) -> int:
+    """
+    Goes through the tags of a compound's payload starting at ``pos``, returns where it ends
+
+    ``visit`` is called with every tag of the compound, but not with the tags
+    inside them unless it scans them itself. Refer to :data:`Visitor`.
+    Raises the same errors as :func:`skip_payload`
+    """
+    while True:
+        tag_type = data[pos]
+        if tag_type == TAG_END:
+            return pos + 1
+        length = _SHORT_LENGTH.unpack_from(data, pos + 1)[0]
+        name = bytes(data[pos + 3 : pos + 3 + length])
+        pos += 3 + length
+        end = visit(name, tag_type, pos) if visit is not None else None
+        pos = end if end is not None else skip_payload(data, pos, tag_type)
+
+def root_payload(data: bytes | bytearray) -> int:
+    """
+    Returns where the payload of the root compound starts in encoded NBT
+
+    Raises
+    ------
+    ValueError
+        If the root tag isn't a compound
+    """
+    if data[0] != TAG_COMPOUND:
+        raise ValueError(f'Root tag has type {data[0]}, not a compound')
+    return 3 + _SHORT_LENGTH.unpack_from(data, 1)[0]
+
+def list_header(data: bytes | bytearray, pos: int) -> tuple[int, int]:
+    """Returns the type of the items and the length of a list whose payload starts at ``pos``"""
+    return _LIST.unpack_from(data, pos)
+
+def _read_scalars(data: bytes, pos: int, wanted: dict[bytes, str], found: dict) -> int | None:
+    """Reads the wanted tags of a compound's payload, returns None once they are all found"""
+    while True:
+        tag_type = data[pos]
+        if tag_type == TAG_END:
+            return pos + 1
+        length = _SHORT_LENGTH.unpack_from(data, pos + 1)[0]
+        name = data[pos + 3 : pos + 3 + length]
+        pos += 3 + length
+        if tag_type == TAG_COMPOUND and name == b'Level':
+            pos = _read_scalars(data, pos, wanted, found)
+            if pos is None:
+                return None
+            continue
+        if name in wanted:
+            if tag_type in _NUMBERS:
+                found[wanted[name]] = _NUMBERS[tag_type].unpack_from(data, pos)[0]
+            elif tag_type == TAG_STRING:
+                end = pos + 2 + _SHORT_LENGTH.unpack_from(data, pos)[0]
+                found[wanted[name]] = data[pos + 2 : end].decode('utf-8')
+            if len(found) == len(wanted):
+                return None
+        pos = skip_payload(data, pos, tag_type)
+
+def read_scalars(data: bytes, names: Collection[str]) -> dict[str, int | float | str]:
+    """
+    Reads number and string tags of a chunk's root compound, or of its ``Level`` compound
+    for chunks older than 21w43a, without decoding anything else.
+    Stops as soon as every tag is found
+
+    Parameters
+    ----------
+    data
+        Uncompressed NBT data of the chunk, as returned by :meth:`anvil.Region.chunk_bytes`
+    names
+        Names of the tags to read, like ``InhabitedTime``
+
+    Raises
+    ------
+    anvil.errors.CorruptedData
+        If the data isn't valid NBT
+
+    Returns
+    -------
+    dict[str, int | float | str]
+        Values of the tags that were found, keyed by their names
+    """
+    wanted = {name.encode('utf-8'): name for name in names}
+    found: dict[str, int | float | str] = {}
+    if not wanted:
+        return found
+    data = bytes(data)
+    try:
+        _read_scalars(data, root_payload(data), wanted, found)
+    except (ValueError, IndexError, StructError, RecursionError) as e:
+        error = CorruptedData(f'Failed to parse chunk data: {e}', prefix=data[:16])
+    else:
+        error = None
+    if error is not None:
+        # Raised outside the except block, so it isn't chained to the original error
+        raise error
+    return found
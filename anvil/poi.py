@@ -0,0 +1,247 @@
+from __future__ import annotations
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from nbt import nbt
+import numpy as np
+from .region import Region
+from .errors import EmptyRegionFile, CorruptedData
+
+# Point of Interest Format - https://minecraft.wiki/w/Point_of_Interest
+# Stored in the poi folder since 19w11a, one compound per section keyed by its Y index
+
+def _record_position(record: nbt.TAG_Compound) -> tuple[int, int, int]:
+    pos = record['pos']
+    if isinstance(pos, nbt.TAG_Int_Array):
+        x, y, z = pos.value
+        return x, y, z
+    # Older snapshots stored the position as a compound
+    return pos['X'].value, pos['Y'].value, pos['Z'].value
+
+class PoiRecords:
+    """
+    Compact, array-backed collection of point of interest records
+
+    Attributes
+    ----------
+    type_names: tuple[:class:`str`, ...]
+        Palette of POI types, like ``minecraft:home`` or ``minecraft:armorer``
+    types: :class:`numpy.ndarray`
+        ``uint16`` index on ``type_names`` for each record
+    positions: :class:`numpy.ndarray`
+        ``(N, 3)`` ``int32`` array with the global ``x, y, z`` of each record
+    free_tickets: :class:`numpy.ndarray`
+        ``int16`` array with how many more villagers can claim each record
+    """
+    __slots__ = ('type_names', 'types', 'positions', 'free_tickets')
+    def __init__(self, type_names: Sequence[str], types: np.ndarray, positions: np.ndarray, free_tickets: np.ndarray):
+        self.type_names = tuple(type_names)
+        self.types = np.asarray(types, dtype=np.uint16)
+        self.positions = np.asarray(positions, dtype=np.int32).reshape(-1, 3)
+        self.free_tickets = np.asarray(free_tickets, dtype=np.int16)
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __repr__(self):
+        return f'PoiRecords({len(self)} records, {len(self.type_names)} types)'
+
+    def names(self) -> list[str]:
+        """Returns the type name of each record"""
+        return [self.type_names[i] for i in self.types]
+
+    def type_mask(self, types: str | Iterable[str]) -> np.ndarray:
+        """
+        Returns a boolean mask of the records that have any of the given types
+
+        Parameters
+        ----------
+        types
+            Type name or names, the ``minecraft`` namespace can be omitted
+        """
+        if isinstance(types, str):
+            types = (types,)
+        wanted = {t if ':' in t else 'minecraft:' + t for t in types}
+        indexes = [i for i, name in enumerate(self.type_names) if name in wanted]
+        return np.isin(self.types, indexes)
+
+    def select(self, mask: np.ndarray) -> PoiRecords:
+        """Returns the records selected by a boolean mask or an index array"""
+        return PoiRecords(self.type_names, self.types[mask], self.positions[mask], self.free_tickets[mask])
+
+    @classmethod
+    def empty(cls) -> PoiRecords:
+        """Returns a collection without any records"""
+        return cls((), np.empty(0, np.uint16), np.empty((0, 3), np.int32), np.empty(0, np.int16))
+
+    @classmethod
+    def concatenate(cls, records: Iterable[PoiRecords]) -> PoiRecords:
+        """
+        Merges many collections into one, merging their type palettes too
+        """
+        names: dict[str, int] = {}
+        types, positions, tickets = [], [], []
+        for rec in records:
+            lut = np.array([names.setdefault(name, len(names)) for name in rec.type_names], dtype=np.uint16)
+            types.append(lut[rec.types] if len(rec.type_names) else rec.types)
+            positions.append(rec.positions)
+            tickets.append(rec.free_tickets)
+        if not types:
+            return cls.empty()
+        return cls(tuple(names), np.concatenate(types), np.concatenate(positions), np.concatenate(tickets))
+
+    @classmethod
+    def from_nbt(cls, nbt_data: nbt.TAG_Compound, include_invalid: bool = False) -> PoiRecords:
+        """
+        Decodes the records of a single POI chunk
+
+        Parameters
+        ----------
+        nbt_data
+            Chunk NBT data from a ``poi/r.X.Z.mca`` file
+        include_invalid
+            Whether to include sections marked as not ``Valid``,
+            which Minecraft rebuilds from the terrain when loading the chunk
+        """
+        names: dict[str, int] = {}
+        types: list[int] = []
+        positions: list[tuple[int, int, int]] = []
+        tickets: list[int] = []
+        try:
+            sections = nbt_data['Sections']
+        except KeyError:
+            return cls.empty()
+
+        for section in sections.values():
+            if not include_invalid and 'Valid' in section and not section['Valid'].value:
+                continue
+            if 'Records' not in section:
+                continue
+            for record in section['Records']:
+                types.append(names.setdefault(record['type'].value, len(names)))
+                positions.append(_record_position(record))
+                tickets.append(record['free_tickets'].value if 'free_tickets' in record else 0)
+
+        return cls(tuple(names), np.array(types, dtype=np.uint16), np.array(positions, dtype=np.int32), np.array(tickets, dtype=np.int16))
+
+class PoiRegion(Region):
+    """
+    Read-only point of interest region (``poi/r.X.Z.mca``)
+    """
+    __slots__ = ()
+
+    def records(self, include_invalid: bool = False) -> PoiRecords:
+        """
+        Returns all the records of this region,
+        chunks that fail to decode are handled according to :attr:`errors`
+
+        Parameters
+        ----------
+        include_invalid
+            Refer to :meth:`PoiRecords.from_nbt`
+        """
+        records = []
+        for chunk_x, chunk_z in self.generated_chunks():
+            try:
+                nbt_data = self.chunk_data(chunk_x, chunk_z)
+            except CorruptedData as error:
+                self._on_corrupted(error)
+                continue
+            records.append(PoiRecords.from_nbt(nbt_data, include_invalid=include_invalid))
+        return PoiRecords.concatenate(records)
+
+def _read_poi_file(path: Path) -> PoiRecords:
+    try:
+        return PoiRegion.from_file(path).records()
+    except EmptyRegionFile:
+        # Minecraft leaves empty region files behind for areas without any POI
+        return PoiRecords.empty()
+
+class PoiIndex:
+    """
+    Index of the points of interest of a whole world, for nearest POI queries
+
+    Records are sorted by type, so queries for a type only look at its own records.
+
+    Attributes
+    ----------
+    records: :class:`PoiRecords`
+        All the indexed records, sorted by type
+    """
+    __slots__ = ('records', '_bounds')
+    def __init__(self, records: PoiRecords):
+        order = np.argsort(records.types, kind='stable')
+        self.records = records.select(order)
+        # Start and end of each type on the sorted records
+        counts = np.bincount(self.records.types, minlength=len(records.type_names))
+        ends = np.cumsum(counts)
+        self._bounds = np.stack((ends - counts, ends), axis=1)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def nearest(
+            self,
+            x: float, y: float, z: float,
+            types: str | Iterable[str] | None = None,
+            k: int = 1,
+            max_distance: float | None = None
+    ) -> PoiRecords:
+        """
+        Returns the ``k`` records closest to the given position, closest first
+
+        Parameters
+        ----------
+        int x, y, z
+            Global coordinates
+        types
+            Type name or names to look for, like ``home`` for beds.
+            If not given, looks at every record
+        k
+            Maximum amount of records to return
+        max_distance
+            If given, ignores records further away than this
+        """
+        if types is None:
+            candidates = np.arange(len(self.records))
+        else:
+            if isinstance(types, str):
+                types = (types,)
+            wanted = {t if ':' in t else 'minecraft:' + t for t in types}
+            candidates = np.concatenate([
+                np.arange(*self._bounds[i]) for i, name in enumerate(self.records.type_names) if name in wanted
+            ] or [np.empty(0, dtype=np.intp)])
+
+        deltas = self.records.positions[candidates] - np.array((x, y, z), dtype=np.float64)
+        distances = np.einsum('ij,ij->i', deltas, deltas)
+        if max_distance is not None:
+            keep = distances <= max_distance * max_distance
+            candidates, distances = candidates[keep], distances[keep]
+
+        if k < len(distances):
+            closest = np.argpartition(distances, k)[:k]
+        else:
+            closest = np.arange(len(distances))
+        closest = closest[np.argsort(distances[closest], kind='stable')]
+        return self.records.select(candidates[closest])
+
+    @classmethod
+    def from_world(cls, world: str | Path, jobs: int | None = None) -> PoiIndex:
+        """
+        Builds the index from every region file in a world's ``poi`` folder
+
+        Parameters
+        ----------
+        world
+            Path to the world (or dimension) folder, the one containing ``poi``
+        jobs
+            Number of processes used to read the region files.
+            Reads them in this process if not given
+        """
+        paths = sorted(Path(world, 'poi').glob('r.*.*.mca'))
+        if jobs is None or jobs <= 1:
+            records = [_read_poi_file(path) for path in paths]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                records = list(pool.map(_read_poi_file, paths))
+        return cls(PoiRecords.concatenate(records))
@@ -0,0 +1,264 @@
+"""
+Trimming worlds by dropping the chunks that players barely visited
+
+Chunks are judged on a few small tags, like ``InhabitedTime``, read with
+:func:`anvil.nbt_stream.read_scalars` without decoding the rest of the chunk.
+Without any tags to read, only the region's headers are used and no chunk is decompressed.
+"""
+from __future__ import annotations
+from collections.abc import Callable, Collection
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import functools
+import os
+import shutil
+import tempfile
+from .region import Region
+from .empty_region import pack_region
+from .nbt_stream import read_scalars
+from .relocate import region_position
+from .errors import CorruptedData, EmptyRegionFile
+
+#: Tags read by default for the predicate
+DEFAULT_TAGS = ('InhabitedTime', 'LastUpdate', 'Status')
+
+class ChunkSummary:
+    """
+    What is known about a chunk when deciding whether to keep it
+
+    Attributes
+    ----------
+    x: :class:`int`
+        Chunk's global X position
+    z: :class:`int`
+        Chunk's global Z position
+    timestamp: :class:`int`
+        When the chunk was last saved, in seconds since the epoch, from the region's header
+    sectors: :class:`int`
+        How many 4KiB sectors the chunk takes in the region file
+    tags: dict[:class:`str`, :class:`int` | :class:`float` | :class:`str`]
+        Values of the tags that were read, missing tags are left out
+    """
+    __slots__ = ('x', 'z', 'timestamp', 'sectors', 'tags')
+    def __init__(self, x: int, z: int, timestamp: int, sectors: int, tags: dict | None = None):
+        self.x = x
+        self.z = z
+        self.timestamp = timestamp
+        self.sectors = sectors
+        self.tags = tags or {}
+
+    @property
+    def inhabited_time(self) -> int:
+        """Ticks players have spent near the chunk, 0 if it wasn't read"""
+        return self.tags.get('InhabitedTime', 0)
+
+    @property
+    def last_update(self) -> int:
+        """Game tick of the chunk's last save, 0 if it wasn't read"""
+        return self.tags.get('LastUpdate', 0)
+
+    @property
+    def status(self) -> str | None:
+        """Generation status, like ``minecraft:full``, None if it wasn't read"""
+        return self.tags.get('Status')
+
+    def __repr__(self):
+        return f'ChunkSummary({self.x}, {self.z}, {self.tags!r})'
+
+class PruneReport:
+    """
+    Result of pruning a region file with :func:`prune_region`
+
+    Attributes
+    ----------
+    path: :class:`str`
+        The region file
+    kept: list[tuple[:class:`int`, :class:`int`]]
+        Region-local ``(x, z)`` of every chunk kept
+    removed: list[tuple[:class:`int`, :class:`int`]]
+        Region-local ``(x, z)`` of every chunk removed
+    reclaimed: :class:`int`
+        Bytes freed. With a compacted copy, how much smaller it is than the original file,
+        otherwise the size of the sectors freed, which Minecraft reuses for other chunks
+    errors: list[:class:`anvil.errors.CorruptedData`]
+        Chunks that couldn't be read with ``errors='collect'``, these are kept
+    """
+    __slots__ = ('path', 'kept', 'removed', 'reclaimed', 'errors')
+    def __init__(self, path: str):
+        self.path = path
+        self.kept: list[tuple[int, int]] = []
+        self.removed: list[tuple[int, int]] = []
+        self.reclaimed = 0
+        self.errors: list[CorruptedData] = []
+
+    def __repr__(self):
+        return f'PruneReport({self.path!r}, {len(self.removed)} removed, {len(self.kept)} kept, {self.reclaimed} bytes reclaimed)'
+
+    def to_dict(self) -> dict:
+        return {
+            'file': self.path,
+            'kept': len(self.kept),
+            'removed': len(self.removed),
+            'reclaimed': self.reclaimed,
+            'errors': [str(error) for error in self.errors],
+        }
+
+def _inhabited_for(chunk: ChunkSummary, ticks: int) -> bool:
+    return chunk.inhabited_time >= ticks
+
+def inhabited_for(ticks: int) -> Callable[[ChunkSummary], bool]:
+    """
+    Returns a predicate for :func:`prune_region` keeping chunks where players spent
+    at least ``ticks`` game ticks (20 per second), which works across processes
+    """
+    return functools.partial(_inhabited_for, ticks=ticks)
+
+def _replace_file(path: str | Path, data: bytes):
+    """
+    Writes a file through a temporary file in the same folder, so that a failed write,
+    like on a full disk, leaves the previous file as it was
+    """
+    fd, temporary = tempfile.mkstemp(prefix=Path(path).name + '.', suffix='.tmp', dir=Path(path).parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            # Temporary files are only readable by their owner
+            shutil.copymode(path, temporary)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+def prune_region(
+    path: str | Path, predicate: Callable[[ChunkSummary], bool], tags: Collection[str] = DEFAULT_TAGS,
+    output: str | Path | None = None, errors: str = 'raise'
+) -> PruneReport:
+    """
+    Removes the chunks of a region file that ``predicate`` rejects
+
+    Chunks that are kept are copied without being decompressed again.
+
+    Parameters
+    ----------
+    path
+        Path to the region file, named like ``r.X.Z.mca``
+    predicate
+        Called with a :class:`ChunkSummary` of each chunk, returns whether to keep it
+    tags
+        Tags to read from each chunk for the predicate. If empty, chunks aren't decompressed
+        and the predicate only gets what the headers hold
+    output
+        If not given, the removed chunks are cleared from the headers in place, which leaves
+        the file's size as it is. Otherwise a compacted copy is written there, which can be ``path`` itself.
+        The copy is written to a temporary file first, then moved over ``output``
+    errors
+        Refer to :class:`anvil.Region`, chunks that couldn't be read are kept
+
+    Raises
+    ------
+    ValueError
+        If the file isn't named like a region file
+    anvil.errors.EmptyRegionFile
+        If the region file is empty
+
+    Returns
+    -------
+    PruneReport
+    """
+    region_x, region_z = region_position(path)
+    report = PruneReport(str(path))
+    records: list[bytes | None] = [None] * 1024
+    timestamps = [0] * 1024
+    with Region.open(path, errors=errors) as region:
+        for chunk_x, chunk_z in region.generated_chunks():
+            sectors = region.chunk_location(chunk_x, chunk_z)[1]
+            summary = ChunkSummary(
+                region_x * 32 + chunk_x, region_z * 32 + chunk_z,
+                region.chunk_timestamp(chunk_x, chunk_z), sectors
+            )
+            keep = True
+            record = None
+            try:
+                # Only the headers are needed when no tags are read and nothing is copied
+                if tags or output is not None:
+                    record = region.chunk_record(chunk_x, chunk_z)
+                if tags:
+                    summary.tags = read_scalars(region.decompress_record(record), tags)
+            except CorruptedData as error:
+                region._describe(error, chunk_x, chunk_z, record)
+                region._on_corrupted(error)
+            else:
+                keep = predicate(summary)
+
+            if keep:
+                report.kept.append((chunk_x, chunk_z))
+                if output is not None:
+                    records[chunk_x + chunk_z * 32] = record
+                    timestamps[chunk_x + chunk_z * 32] = summary.timestamp
+            else:
+                report.removed.append((chunk_x, chunk_z))
+                report.reclaimed += sectors * 4096
+        report.errors = region.corrupted
+
+    if output is not None:
+        data = pack_region(records, timestamps)
+        report.reclaimed = os.path.getsize(path) - len(data)
+        _replace_file(output, data)
+    elif report.removed:
+        with open(path, 'r+b') as f:
+            for chunk_x, chunk_z in report.removed:
+                offset = Region.header_offset(chunk_x, chunk_z)
+                f.seek(offset)
+                f.write(bytes(4))
+                f.seek(4096 + offset)
+                f.write(bytes(4))
+    return report
+
+def _prune_file(path: Path, predicate: Callable[[ChunkSummary], bool], tags: Collection[str], compact: bool, errors: str) -> PruneReport | None:
+    try:
+        return prune_region(path, predicate, tags=tags, output=path if compact else None, errors=errors)
+    except EmptyRegionFile:
+        # Nothing to prune in the empty region files Minecraft leaves behind
+        return None
+
+def prune_world(
+    folder: str | Path, predicate: Callable[[ChunkSummary], bool], tags: Collection[str] = DEFAULT_TAGS,
+    compact: bool = False, errors: str = 'raise', jobs: int | None = None
+) -> list[PruneReport]:
+    """
+    Prunes every region file of a folder (like ``world/region``) with :func:`prune_region`
+
+    Parameters
+    ----------
+    folder
+        Folder containing the ``.mca`` files
+    predicate
+        Refer to :func:`prune_region`. Has to be picklable when using ``jobs``,
+        like a module level function or :func:`inhabited_for`
+    tags
+        Refer to :func:`prune_region`
+    compact
+        Whether to rewrite each region file without the removed chunks,
+        instead of only clearing them from the headers
+    errors
+        Refer to :func:`prune_region`
+    jobs
+        Number of processes pruning regions at once.
+        Prunes them in this process if not given
+
+    Returns
+    -------
+    list[PruneReport]
+        One report per region file, empty region files are skipped
+    """
+    paths = sorted(Path(folder).glob('r.*.*.mca'))
+    prune = functools.partial(_prune_file, predicate=predicate, tags=tuple(tags), compact=compact, errors=errors)
+    if jobs is None or jobs <= 1:
+        reports = [prune(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            reports = list(pool.map(prune, paths))
+    return [report for report in reports if report is not None]
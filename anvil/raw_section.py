@@ -1,50 +1,56 @@
-from collections.abc import Sequence, Iterable
+from collections.abc import Sequence, Iterable, Iterator
 
-from .utils import bin_append
 from . import Block
 from .base_section import BaseSection
-import array
+from .utils import pack_states
+import numpy as np
 
 class RawSection(BaseSection):
     """
     Same as :class:`EmptySection` but you manually
     set the palette and the blocks array (which instead
     of :class:`Block`, it's indexes on the palette)
-    
+
+    Arrays supporting the buffer protocol (like numpy arrays or :class:`array.array`)
+    are used as is, without copying or iterating over them.
+
     Attributes
     ----------
     y: :class:`int`
         Section's Y index
-    blocks: Iterable[:class:`int`]
-        Array of palette indexes
+    blocks: :class:`numpy.ndarray`
+        1D array of 4096 palette indexes, in YZX order
     _palette: Sequence[:class:`Block`]
         Section's palette
+
+    Raises
+    ------
+    ValueError
+        If there aren't 4096 blocks or any of them is not a valid index on the palette
     """
     __slots__ = ('y', '_palette', 'blocks')
-    def __init__(self, y: int, blocks: Iterable[int], palette: Sequence[Block]):
+    def __init__(self, y: int, blocks: Iterable[int] | np.ndarray, palette: Sequence[Block]):
         super().__init__(y)
-        self.blocks: Iterable[int] = blocks
+        if isinstance(blocks, Iterator):
+            blocks = np.fromiter(blocks, dtype=np.int64)
+        blocks = np.asarray(blocks).reshape(-1)
+
+        if blocks.size != 4096:
+            raise ValueError(f'A section has 4096 blocks, got {blocks.size}')
+        if blocks.dtype.kind not in 'iu':
+            raise ValueError(f'Blocks must be integer palette indexes, got {blocks.dtype}')
+        if blocks.min() < 0 or blocks.max() >= len(palette):
+            raise ValueError(f'Blocks must be in range of 0 to {len(palette) - 1} to be valid palette indexes')
+
+        self.blocks: np.ndarray = blocks
         self._palette: Sequence[Block] = palette
 
     def palette(self) -> tuple[Block | None, ...]:
         """Returns ``self._palette``"""
         return tuple(self._palette)
 
-    def blockstates(self, palette: tuple[Block | None, ...] | None = None) -> array.array:
+    def blockstates(self, palette: tuple[Block | None, ...] | None = None, stretches: bool = True) -> np.ndarray:
         """Refer to :class:`EmptySection.blockstates()`"""
         _ = palette
         bits = max((len(self._palette) - 1).bit_length(), 4)
-        states = array.array('Q')
-        current = 0
-        current_len = 0
-        for index in self.blocks:
-            if current_len + bits > 64:
-                leftover = 64 - current_len
-                states.append(bin_append(index & ((1 << leftover) - 1), current, length=current_len))
-                current = index >> leftover
-                current_len = bits - leftover
-            else:
-                current = bin_append(index, current, length=current_len)
-                current_len += bits
-        states.append(current)
-        return states
+        return pack_states(self.blocks, bits, stretches=stretches)
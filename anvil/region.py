@@ -1,19 +1,63 @@
+from collections import Counter
+from collections.abc import Callable, Generator
 from pathlib import Path
 from typing import BinaryIO
 from nbt import nbt
+import functools
 import zlib
 from io import BytesIO
+import os
+import threading
+import time
+import numpy as np
 import anvil
-from .errors import GZipChunkData, EmptyRegionFile, CorruptedData, InvalidFileType
+from . import metrics
+from .utils import remap_palette
+from .errors import GZipChunkData, EmptyRegionFile, CorruptedData, InvalidFileType, OutOfBoundsCoordinates
+
+# Only used where os.pread is missing (Windows), to keep seek and read together
+_seek_lock = threading.Lock()
+
+def _read_at(fd: int, length: int, offset: int) -> bytes:
+    """
+    Reads ``length`` bytes at ``offset`` of a file descriptor (less if the file ends first),
+    without using or moving the file position, so many threads can read the same descriptor at once
+    """
+    if not hasattr(os, 'pread'):
+        with _seek_lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            return os.read(fd, length)
+    data = os.pread(fd, length, offset)
+    while len(data) < length:
+        more = os.pread(fd, length - len(data), offset + len(data))
+        if not more:
+            break
+        data += more
+    return data
 
 class Region:
     """
     Read-only region
 
+    Regions are safe to share between threads: nothing is changed after they are created,
+    and regions made with :meth:`open` read chunks with positional reads (``os.pread``),
+    which don't depend on a shared file position. Don't :meth:`close` a region other threads are still reading.
+
     Attributes
     ----------
     data: :class:`bytes`
-        Region file (``.mca``) as bytes
+        Region file (``.mca``) as bytes, or only its headers (the first 8KiB) for regions made with :meth:`open`
+    path: :class:`str` | None
+        Path of the region file, when read with :meth:`open` or :meth:`from_file`
+    errors: :class:`str`
+        What iterating over many chunks (like :meth:`iter_chunks` or :meth:`count_blocks`) does
+        with chunks that fail to decode: ``raise`` the :class:`anvil.errors.CorruptedData`,
+        ``skip`` the chunk, or skip it and ``collect`` the error in :attr:`corrupted`.
+        Reading a single chunk always raises
+    include_raw: :class:`bool`
+        Whether :class:`anvil.errors.CorruptedData` errors keep the chunk's raw record in their ``data``
+    corrupted: list[:class:`anvil.errors.CorruptedData`]
+        Errors collected with ``errors='collect'``, without their tracebacks
 
     Raises
     ------
@@ -26,15 +70,43 @@ class Region:
     anvil.errors.InvalidFileType
         If the from_file method receives invalid input
     """
-    __slots__ = ('data',)
-    def __init__(self, data: bytes):
+    __slots__ = ('data', 'path', 'errors', 'include_raw', 'corrupted', '_fd')
+    def __init__(self, data: bytes, errors: str = 'raise', include_raw: bool = False):
         """Makes a Region object from data, which is the region file content"""
+        if errors not in ('raise', 'skip', 'collect'):
+            raise ValueError(f"errors must be 'raise', 'skip' or 'collect', got {errors!r}")
+        self._fd = None
+        self.path = None
+        self.errors = errors
+        self.include_raw = include_raw
+        self.corrupted: list[CorruptedData] = []
         if not data:
             self.data = None
             raise EmptyRegionFile('Region file is empty. There\'s no data to process')
 
         self.data = data
 
+    def _read(self, offset: int, length: int) -> bytes | memoryview:
+        """Reads ``length`` bytes of the region file at ``offset``"""
+        if self._fd is None:
+            return memoryview(self.data)[offset : offset + length]
+        data = _read_at(self._fd, length, offset)
+        if metrics.enabled:
+            metrics.record('bytes_read', len(data))
+        return data
+
+    def close(self):
+        """Closes the file of a region made with :meth:`open`, does nothing otherwise"""
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            os.close(fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     @staticmethod
     def header_offset(chunk_x: int, chunk_z: int) -> int:
         """
@@ -76,10 +148,32 @@ class Region:
         else:
             raise EmptyRegionFile('Region file is empty. There\'s no data to process')
 
-    def chunk_data(self, chunk_x: int, chunk_z: int) -> nbt.NBTFile | None:
+    def generated_chunks(self) -> list[tuple[int, int]]:
         """
-        Returns the NBT data for a chunk
-        
+        Returns the region-local coordinates of every chunk that has been generated,
+        read straight from the location header without decoding any chunk
+
+        Returns
+        -------
+        list[tuple[int, int]]
+            ``(chunk_x, chunk_z)`` pairs in the range of 0 to 31
+        """
+        if not self.data:
+            raise EmptyRegionFile('Region file is empty. There\'s no data to process')
+        header = self.data[:4096]
+        coords = []
+        for i in range(0, len(header) - 3, 4):
+            if header[i : i + 4] != b'\x00\x00\x00\x00':
+                index = i // 4
+                coords.append((index % 32, index // 32))
+        return coords
+
+    def chunk_bytes(self, chunk_x: int, chunk_z: int) -> bytes | None:
+        """
+        Returns the decompressed (but not yet parsed) NBT data for a chunk
+
+        Useful for cheaply inspecting a chunk's raw payload before paying for a full NBT decode.
+
         Parameters
         ----------
         chunk_x
@@ -94,7 +188,78 @@ class Region:
         anvil.errors.EmptyRegionFile
             If region file has no data to process
         anvil.errors.CorruptedData
-            If the chunk data is corrupted or cannot be decoded
+            If the chunk data cannot be decompressed
+        """
+        record = self.chunk_record(chunk_x, chunk_z)
+        if record is None:
+            return None
+        try:
+            return self.decompress_record(record)
+        except CorruptedData as error:
+            self._describe(error, chunk_x, chunk_z, record)
+            raise
+
+    @staticmethod
+    def decompress_record(record: bytes) -> bytes:
+        """
+        Decompresses a chunk record, as returned by :meth:`chunk_record`,
+        into the NBT data that :meth:`parse_chunk_bytes` reads
+
+        Raises
+        ------
+        anvil.errors.GZipChunkData
+            If the chunk's compression is 1 (GZip). Only Zlib compression (type 2) is supported
+        anvil.errors.CorruptedData
+            If the data cannot be decompressed
+        """
+        if len(record) < 5:
+            raise CorruptedData('Chunk record is truncated', prefix=bytes(record[:16]))
+        length = int.from_bytes(record[:4], byteorder='big')
+        compression = record[4] # 2 most of the time
+
+        if compression == 1:
+            raise GZipChunkData('GZip is not supported')
+
+        start = time.perf_counter() if metrics.enabled else 0
+        try:
+            data = zlib.decompress(record[5 : 4 + length])
+        except zlib.error as e:
+            error = CorruptedData(
+                f'Failed to decompress chunk data: {e}',
+                length=length, compression=compression, prefix=record[5:21]
+            )
+        else:
+            error = None
+        if error is not None:
+            # Raised outside the except block, so it isn't chained to the original error
+            raise error
+
+        if not metrics.enabled:
+            return data
+        metrics.record('decompress_seconds', time.perf_counter() - start)
+        metrics.record('bytes_decompressed', len(data))
+        return data
+
+    def chunk_record(self, chunk_x: int, chunk_z: int) -> bytes | None:
+        """
+        Returns the chunk exactly as it is stored in the region file, without decompressing it:
+        its 4 byte length, compression type and compressed data
+
+        Used to copy chunks that haven't changed into another region as they are.
+
+        Parameters
+        ----------
+        chunk_x
+            Chunk's X value
+        chunk_z
+            Chunk's Z value
+
+        Raises
+        ------
+        anvil.errors.EmptyRegionFile
+            If region file has no data to process
+        anvil.errors.CorruptedData
+            If the record is cut short, or starts past the end of the file
         """
         off = self.chunk_location(chunk_x, chunk_z)
 
@@ -102,29 +267,118 @@ class Region:
         if off is None or off == (0, 0):
             return None
 
-        off = off[0] * 4096
-        if self.data:
-            length = int.from_bytes(self.data[off:off + 4], byteorder='big')
-            compression = self.data[off + 4] # 2 most of the time
+        # The sector count is usually right, so most chunks only take a single read
+        offset, sectors = off[0] * 4096, max(off[1], 1)
+        record = self._read(offset, sectors * 4096)
+        length = int.from_bytes(record[:4], byteorder='big')
+        if 4 + length > len(record) and len(record) >= 5:
+            record = self._read(offset, 4 + length)
+        if len(record) < 5 or len(record) < 4 + length:
+            error = CorruptedData('Chunk record is truncated or past the end of the file', prefix=bytes(record[:16]))
+            self._describe(error, chunk_x, chunk_z, bytes(record))
+            raise error
+        return bytes(record[: 4 + length])
 
-            if compression == 1:
-                raise GZipChunkData('GZip is not supported')
+    def chunk_timestamp(self, chunk_x: int, chunk_z: int) -> int:
+        """
+        Returns when the chunk was last saved, in seconds since the epoch.
+        ``0`` if it hasn't been generated yet
 
-            compressed_data = self.data[off + 5 : off + 5 + length - 1]
-            decompressed_data = zlib.decompress(compressed_data)
-        else:
+        Parameters
+        ----------
+        chunk_x
+            Chunk's X value
+        chunk_z
+            Chunk's Z value
+        """
+        if not self.data:
             raise EmptyRegionFile('Region file is empty. There\'s no data to process')
+        b_off = 4096 + self.header_offset(chunk_x, chunk_z)
+        return int.from_bytes(self.data[b_off : b_off + 4], byteorder='big')
+
+    def chunk_data(self, chunk_x: int, chunk_z: int) -> nbt.NBTFile | None:
+        """
+        Returns the NBT data for a chunk
+        
+        Parameters
+        ----------
+        chunk_x
+            Chunk's X value
+        chunk_z
+            Chunk's Z value
+
+        Raises
+        ------
+        anvil.errors.GZipChunkData
+            If the chunk's compression is 1 (GZip). Only Zlib compression (type 2) is supported
+        anvil.errors.EmptyRegionFile
+            If region file has no data to process
+        anvil.errors.CorruptedData
+            If the chunk data is corrupted or cannot be decoded
+        """
+        record = self.chunk_record(chunk_x, chunk_z)
+        if record is None:
+            return None
+        try:
+            return self.parse_chunk_bytes(self.decompress_record(record))
+        except CorruptedData as error:
+            self._describe(error, chunk_x, chunk_z, record)
+            raise
+
+    def _describe(self, error: CorruptedData, chunk_x: int, chunk_z: int, record: bytes | None):
+        """Fills in where the corrupted chunk is, with what its record holds if it was read"""
+        error.path = self.path
+        error.chunk = (chunk_x % 32, chunk_z % 32)
+        error.offset = self.chunk_location(chunk_x, chunk_z)[0] * 4096
+        if record is None:
+            return
+        # Truncated records may not even hold their length and compression type
+        if len(record) >= 4:
+            error.length = int.from_bytes(record[:4], byteorder='big')
+        if len(record) >= 5:
+            error.compression = record[4]
+        if self.include_raw:
+            error.data = record
+
+    def _on_corrupted(self, error: CorruptedData):
+        """Handles a chunk that failed to decode while iterating, according to :attr:`errors`"""
+        if self.errors == 'raise':
+            raise error
+        if self.errors == 'collect':
+            # The traceback's frames would keep the chunk's buffers alive
+            self.corrupted.append(error.with_traceback(None))
+
+    @staticmethod
+    def parse_chunk_bytes(decompressed_data: bytes) -> nbt.NBTFile:
+        """
+        Parses the decompressed data returned by :meth:`chunk_bytes` into NBT
 
+        Raises
+        ------
+        anvil.errors.CorruptedData
+            If the chunk data is corrupted or cannot be decoded
+        """
+        start = time.perf_counter() if metrics.enabled else 0
         try:
             nbt_data = nbt.NBTFile(buffer=BytesIO(decompressed_data))
         except UnicodeDecodeError:
-            # with open("corrupted.nbt", "wb") as corrupted_nbt_data:
-            #     corrupted_nbt_data.write(decompressed_data)
-                
-            raise CorruptedData({'message':'Failed to read decompressed NBT data with UnicodeDecodeError','data':decompressed_data})
-        except Exception:
-            raise CorruptedData({'message':'Failed to read decompressed NBT data','data':decompressed_data})
+            error = CorruptedData(
+                'Failed to read decompressed NBT data with UnicodeDecodeError', prefix=decompressed_data[:16]
+            )
+        except Exception as e:
+            error = CorruptedData(
+                f'Failed to read decompressed NBT data: {type(e).__name__}', prefix=decompressed_data[:16]
+            )
+        else:
+            error = None
+        if error is not None:
+            # Raised outside the except block, so it isn't chained to the original
+            # error, which can hold the whole decompressed data (like UnicodeDecodeError.object)
+            raise error
 
+        if metrics.enabled:
+            metrics.record('nbt_decode_seconds', time.perf_counter() - start)
+            metrics.record('chunks_parsed')
         return nbt_data
 
     def get_chunk(self, chunk_x: int, chunk_z: int) -> 'anvil.Chunk':
@@ -144,8 +398,201 @@ class Region:
         """
         return anvil.Chunk.from_region(self, chunk_x, chunk_z)
 
+    def iter_chunks(self) -> Generator['anvil.Chunk', None, None]:
+        """
+        Returns a generator for every generated chunk in the region, in the order of the header.
+        Chunks that fail to decode are handled according to :attr:`errors`
+
+        :rtype: Generator[:class:`anvil.Chunk`]
+        """
+        for chunk_x, chunk_z in self.generated_chunks():
+            try:
+                chunk = self.get_chunk(chunk_x, chunk_z)
+            except CorruptedData as error:
+                self._on_corrupted(error)
+                continue
+            yield chunk
+
+    def to_array(
+            self,
+            lowest: int | None = None,
+            highest: int | None = None,
+            force_new: bool = False
+    ) -> tuple[np.ndarray, tuple['anvil.Block | anvil.OldBlock', ...]]:
+        """
+        Returns all the blocks in the region as a single contiguous array of indexes
+        on a region-wide palette. Missing chunks and sections are filled with air.
+
+        Parameters
+        ----------
+        lowest
+            Y index of the lowest section to include, defaults to the lowest section holding blocks in any chunk
+        highest
+            Y index of the highest section to include, defaults to the highest section holding blocks in any chunk
+        force_new
+            Refer to :meth:`anvil.Chunk.to_array`
+
+        Returns
+        -------
+        tuple[numpy.ndarray, tuple[Block | OldBlock, ...]]
+            A ``(height, 512, 512)`` ``uint16`` array in YZX order, using region-local X and Z,
+            and the palette. Air is always index 0
+        """
+        chunks = {}
+        legacy = False
+        for chunk in self.iter_chunks():
+            legacy = legacy or chunk.version is None or chunk.version < anvil.chunk._VERSION_17w47a
+            chunks[chunk.x % 32, chunk.z % 32] = chunk.section_arrays(force_new=force_new)
+
+        section_ys = [y for arrays in chunks.values() for y in arrays]
+        if lowest is None:
+            lowest = min(section_ys, default=0)
+        if highest is None:
+            highest = max(section_ys, default=lowest - 1)
+
+        air = anvil.OldBlock(0) if legacy and not force_new else anvil.Block('minecraft', 'air')
+        merged: dict = {air: 0}
+
+        blocks = np.zeros((max(highest - lowest + 1, 0) * 16, 512, 512), dtype=np.uint16)
+        for (chunk_x, chunk_z), arrays in chunks.items():
+            for y, (indexes, palette) in arrays.items():
+                if lowest <= y <= highest:
+                    start = (y - lowest) * 16
+                    blocks[start : start + 16, chunk_z * 16 : chunk_z * 16 + 16, chunk_x * 16 : chunk_x * 16 + 16] = \
+                        remap_palette(indexes, palette, merged)
+        return blocks, tuple(merged)
+
+    def count_blocks(self, force_new: bool = False) -> Counter:
+        """
+        Returns how many of each block are in the region,
+        refer to :meth:`anvil.Chunk.count_blocks`
+        """
+        counts: Counter = Counter()
+        for chunk in self.iter_chunks():
+            counts.update(chunk.count_blocks(force_new=force_new))
+        return counts
+
+    def find_blocks(self, predicate: Callable[[str], bool]) -> np.ndarray:
+        """
+        Returns the global coordinates of every block in the region whose name matches
+        the predicate, refer to :meth:`anvil.Chunk.find_blocks`
+
+        The predicate is only called once per distinct block name in the whole region.
+
+        Returns
+        -------
+        numpy.ndarray
+            ``(N, 3)`` ``int32`` array of global ``x, y, z`` coordinates
+        """
+        predicate = functools.cache(predicate)
+        found = []
+        for chunk in self.iter_chunks():
+            coords = chunk.find_blocks(predicate)
+            coords[:, 0] += chunk.x * 16
+            coords[:, 2] += chunk.z * 16
+            found.append(coords)
+        if not found:
+            return np.empty((0, 3), dtype=np.int32)
+        return np.concatenate(found)
+
+    def find_dark_spaces(
+            self,
+            max_light: int = 0,
+            include_sky: bool = True,
+            solid: Callable[[str], bool] | None = None
+    ) -> np.ndarray:
+        """
+        Returns the global coordinates of every dark air block standing on a solid block in the region,
+        refer to :meth:`anvil.Chunk.find_dark_spaces`
+
+        Returns
+        -------
+        numpy.ndarray
+            ``(N, 3)`` ``int32`` array of global ``x, y, z`` coordinates
+        """
+        if solid is not None:
+            solid = functools.cache(solid)
+        found = []
+        for chunk in self.iter_chunks():
+            coords = chunk.find_dark_spaces(max_light, include_sky=include_sky, solid=solid)
+            coords[:, 0] += chunk.x * 16
+            coords[:, 2] += chunk.z * 16
+            found.append(coords)
+        if not found:
+            return np.empty((0, 3), dtype=np.int32)
+        return np.concatenate(found)
+
+    def biome_map(self, y: int = 63, force_new: bool = False) -> tuple[np.ndarray, tuple[str | int | None, ...]]:
+        """
+        Returns the biomes of a horizontal layer of the region at block resolution, e.g. for rendering a map
+
+        Parameters
+        ----------
+        y
+            Block Y of the layer, defaults to sea level. Ignored for chunks from before 19w36a,
+            which only have one biome per block column
+        force_new
+            Refer to :meth:`anvil.Chunk.get_biomes`
+
+        Returns
+        -------
+        tuple[numpy.ndarray, tuple[str | int | None, ...]]
+            A ``(512, 512)`` ``uint16`` array in ZX order, using region-local X and Z,
+            and the palette. Index 0 is always None, used where there is no biome data
+        """
+        merged: dict = {None: 0}
+        biomes = np.zeros((512, 512), dtype=np.uint16)
+        for chunk in self.iter_chunks():
+            try:
+                decoded = chunk.get_biomes(y // 16, force_new=force_new)
+            except OutOfBoundsCoordinates:
+                continue
+            if decoded is None:
+                continue
+            indexes, palette = decoded
+            if indexes.shape[0] == 1:
+                layer = indexes[0]
+            else:
+                # Each cell covers 4x4 blocks
+                layer = indexes[y % 16 // 4].repeat(4, axis=0).repeat(4, axis=1)
+            x, z = chunk.x % 32 * 16, chunk.z % 32 * 16
+            biomes[z : z + 16, x : x + 16] = remap_palette(layer, palette, merged)
+        return biomes, tuple(merged)
+
     @classmethod
-    def from_file(cls, file: str | BinaryIO | Path) -> 'anvil.Region':
+    def open(cls, path: str | Path, *args, **kwargs) -> 'anvil.Region':
+        """
+        Opens a region file, only reading its headers. Chunks are read from
+        the file when they are used, so the file must stay open until :meth:`close`.
+        Can be used as a context manager to close it
+
+        Parameters
+        ----------
+        path
+            Path to the region file
+        *args, **kwargs
+            Passed on to the constructor after the headers
+
+        Raises
+        ------
+        anvil.errors.EmptyRegionFile
+            If region file has no data to process
+        """
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            header = _read_at(fd, 8192, 0)
+            if metrics.enabled:
+                metrics.record('bytes_read', len(header))
+            region = cls(header, *args, **kwargs)
+        except BaseException:
+            os.close(fd)
+            raise
+        region._fd = fd
+        region.path = str(path)
+        return region
+
+    @classmethod
+    def from_file(cls, file: str | BinaryIO | Path, errors: str = 'raise', include_raw: bool = False) -> 'anvil.Region':
         """
         Creates a new region with the data from reading the given file
 
@@ -153,6 +600,9 @@ class Region:
         ----------
         file
             Either a file path or a file object
+        errors, include_raw
+            Refer to :class:`anvil.Region`
+
         Raises
         ------
         anvil.errors.InvalidFileType
@@ -163,13 +613,21 @@ class Region:
             The region inside the given file
         """
 
+        path = None
         if isinstance(file, (str, Path)):
+            path = str(file)
             with open(file, 'rb') as f:
-                return cls(data=f.read())
+                data = f.read()
         elif hasattr(file, 'read'):
-            return cls(data=file.read())
+            data = file.read()
         else:
             raise InvalidFileType({
                 'message':f"Expected str, Path, or file-like object, got {type(file).__name__}",
                 'data' : file
             })
+
+        if metrics.enabled:
+            metrics.record('bytes_read', len(data))
+        region = cls(data, errors=errors, include_raw=include_raw)
+        region.path = path
+        return region
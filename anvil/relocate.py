@@ -0,0 +1,351 @@
+"""
+Moving chunks and whole regions to other coordinates
+
+Chunks are moved by patching the coordinates in their NBT data in place. Everything
+else, like block states and biomes, is skipped over without being decoded, so
+moving a region costs about as much as decompressing and compressing it again.
+These coordinates are rewritten:
+
+- ``xPos`` and ``zPos`` of chunks, and ``Position`` of entity chunks
+- ``x`` and ``z`` of block entities and of scheduled block and fluid ticks
+- ``Pos``, ``TileX`` and ``TileZ`` of entities and their passengers
+- ``pos`` of points of interest
+
+Other positions are kept as they are, like structure starts and references,
+or positions stored by some block entities and entities (a bee's hive, a portal's exit).
+
+Minecraft drops entities whose UUID is already used, so copies of a chunk placed next to the original
+need new UUIDs for their entities, with ``fresh_uuids``. References to other entities by UUID,
+like a leash, aren't updated.
+"""
+from __future__ import annotations
+from collections.abc import Iterable, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from struct import Struct, error as StructError
+from typing import BinaryIO
+import functools
+import re
+import uuid
+from nbt import nbt
+from .chunk import Chunk, _VERSION_21w43a
+from .region import Region
+from .empty_region import chunk_record, pack_region
+from .nbt_stream import (
+    encode, Visitor, scan_compound, root_payload, list_header,
+    TAG_INT, TAG_LONG, TAG_DOUBLE, TAG_LIST, TAG_COMPOUND, TAG_INT_ARRAY
+)
+from .errors import CorruptedData, EmptyRegionFile
+
+_INT = Struct('>i')
+_DOUBLE = Struct('>d')
+
+# Lists of compounds with the x, y, z of a block
+_BLOCK_LISTS = frozenset((
+    b'block_entities', b'TileEntities', b'block_ticks', b'fluid_ticks', b'TileTicks', b'LiquidTicks'
+))
+
+_REGION_NAME = re.compile(r'r\.(-?\d+)\.(-?\d+)\.mca$')
+
+class _Relocation:
+    """Patches the coordinates found in one chunk's NBT data"""
+    __slots__ = ('data', 'dx', 'dz', 'fresh_uuids')
+    def __init__(self, data: bytearray, dx: int, dz: int, fresh_uuids: bool = False):
+        self.data = data
+        self.dx = dx
+        self.dz = dz
+        self.fresh_uuids = fresh_uuids
+
+    def add_int(self, pos: int, delta: int):
+        _INT.pack_into(self.data, pos, _INT.unpack_from(self.data, pos)[0] + delta)
+
+    def add_double(self, pos: int, delta: float):
+        _DOUBLE.pack_into(self.data, pos, _DOUBLE.unpack_from(self.data, pos)[0] + delta)
+
+    def items(self, pos: int, visit: Visitor) -> int | None:
+        """Visits every compound of a list"""
+        item_type, length = list_header(self.data, pos)
+        if item_type != TAG_COMPOUND:
+            return None
+        pos += 5
+        for _ in range(length):
+            pos = scan_compound(self.data, pos, visit)
+        return pos
+
+    def chunk_tag(self, name: bytes, tag_type: int, pos: int) -> int | None:
+        if tag_type == TAG_INT and name in (b'xPos', b'zPos'):
+            self.add_int(pos, self.dx if name == b'xPos' else self.dz)
+            return pos + 4
+        if tag_type == TAG_INT_ARRAY and name == b'Position' and _INT.unpack_from(self.data, pos)[0] == 2:
+            # Entity chunks
+            self.add_int(pos + 4, self.dx)
+            self.add_int(pos + 8, self.dz)
+            return pos + 12
+        if tag_type == TAG_COMPOUND and name == b'Level':
+            return scan_compound(self.data, pos, self.chunk_tag)
+        if tag_type == TAG_COMPOUND and name == b'Sections':
+            # Point of interest chunks, sections are a compound keyed by their Y index
+            return scan_compound(self.data, pos, self.poi_section_tag)
+        if tag_type == TAG_LIST and name in _BLOCK_LISTS:
+            return self.items(pos, self.block_tag)
+        if tag_type == TAG_LIST and name == b'Entities':
+            return self.items(pos, self.entity_tag)
+        return None
+
+    def block_tag(self, name: bytes, tag_type: int, pos: int) -> int | None:
+        if tag_type == TAG_INT and name in (b'x', b'z'):
+            self.add_int(pos, (self.dx if name == b'x' else self.dz) * 16)
+            return pos + 4
+        return None
+
+    def entity_tag(self, name: bytes, tag_type: int, pos: int) -> int | None:
+        if tag_type == TAG_LIST and name == b'Pos' and list_header(self.data, pos) == (TAG_DOUBLE, 3):
+            self.add_double(pos + 5, self.dx * 16)
+            self.add_double(pos + 21, self.dz * 16)
+            return pos + 29
+        if tag_type == TAG_INT and name in (b'TileX', b'TileZ'):
+            # Paintings and item frames
+            self.add_int(pos, (self.dx if name == b'TileX' else self.dz) * 16)
+            return pos + 4
+        if tag_type == TAG_LIST and name == b'Passengers':
+            return self.items(pos, self.entity_tag)
+        if not self.fresh_uuids:
+            return None
+        if tag_type == TAG_INT_ARRAY and name == b'UUID' and _INT.unpack_from(self.data, pos)[0] == 4:
+            self.data[pos + 4 : pos + 20] = uuid.uuid4().bytes
+            return pos + 20
+        if tag_type == TAG_LONG and name in (b'UUIDMost', b'UUIDLeast'):
+            # Before 20w12a
+            random = uuid.uuid4().bytes
+            self.data[pos : pos + 8] = random[:8] if name == b'UUIDMost' else random[8:]
+            return pos + 8
+        return None
+
+    def poi_section_tag(self, name: bytes, tag_type: int, pos: int) -> int | None:
+        if tag_type == TAG_COMPOUND:
+            return scan_compound(self.data, pos, self.poi_tag)
+        return None
+
+    def poi_tag(self, name: bytes, tag_type: int, pos: int) -> int | None:
+        if tag_type == TAG_LIST and name == b'Records':
+            return self.items(pos, self.record_tag)
+        return None
+
+    def record_tag(self, name: bytes, tag_type: int, pos: int) -> int | None:
+        if tag_type == TAG_INT_ARRAY and name == b'pos' and _INT.unpack_from(self.data, pos)[0] == 3:
+            self.add_int(pos + 4, self.dx * 16)
+            self.add_int(pos + 12, self.dz * 16)
+            return pos + 16
+        return None
+
+def translate_chunk_data(data: bytes, dx: int, dz: int, fresh_uuids: bool = False) -> bytes:
+    """
+    Moves a chunk by a number of chunks, refer to the module's description for what gets moved
+
+    Works on chunks, entity chunks and point of interest chunks of any version.
+
+    Parameters
+    ----------
+    data
+        Uncompressed NBT data of the chunk, as returned by :meth:`anvil.Region.chunk_bytes`
+    dx
+        How many chunks to move the chunk by on the X axis
+    dz
+        How many chunks to move the chunk by on the Z axis
+    fresh_uuids
+        Whether to give the chunk's entities and their passengers new random UUIDs,
+        for copies of a chunk that is also kept where it was
+
+    Raises
+    ------
+    anvil.errors.CorruptedData
+        If the data isn't valid NBT
+
+    Returns
+    -------
+    bytes
+        The moved chunk's NBT data
+    """
+    patched = bytearray(data)
+    relocation = _Relocation(patched, dx, dz, fresh_uuids)
+    try:
+        scan_compound(patched, root_payload(patched), relocation.chunk_tag)
+    except (ValueError, IndexError, StructError, RecursionError) as e:
+        error = CorruptedData(f'Failed to parse chunk data: {e}', prefix=bytes(data[:16]))
+    else:
+        error = None
+    if error is not None:
+        # Raised outside the except block, so it isn't chained to the original error
+        raise error
+    return bytes(patched)
+
+def translate_chunk(chunk: Chunk, dx: int, dz: int, fresh_uuids: bool = False) -> Chunk:
+    """
+    Returns a copy of a chunk moved by a number of chunks, which can be added
+    to an :class:`anvil.EmptyRegion` at its new position
+
+    Parameters
+    ----------
+    chunk
+        The chunk to move, it isn't changed
+    dx
+        How many chunks to move the chunk by on the X axis
+    dz
+        How many chunks to move the chunk by on the Z axis
+    fresh_uuids
+        Refer to :func:`translate_chunk_data`
+    """
+    if chunk.version is not None and chunk.version >= _VERSION_21w43a:
+        root = chunk.data
+    else:
+        root = nbt.NBTFile()
+        if chunk.version is not None:
+            root.tags.append(nbt.TAG_Int(name='DataVersion', value=chunk.version))
+        root.tags.append(chunk.data)
+    return Chunk(Region.parse_chunk_bytes(translate_chunk_data(encode(root), dx, dz, fresh_uuids)))
+
+def region_position(path: str | Path) -> tuple[int, int]:
+    """
+    Returns the region coordinates in a region file's name, like ``(-1, 2)`` for ``r.-1.2.mca``
+
+    Raises
+    ------
+    ValueError
+        If the name isn't the one of a region file
+    """
+    match = _REGION_NAME.search(Path(path).name)
+    if match is None:
+        raise ValueError(f'{Path(path).name!r} is not named like a region file (r.X.Z.mca)')
+    return int(match[1]), int(match[2])
+
+def relocate_region(
+    source: Region | str | Path, region_x: int, region_z: int,
+    file: str | Path | BinaryIO | None = None, fresh_uuids: bool = False
+) -> bytes:
+    """
+    Moves every chunk of a region file to another region, with :func:`translate_chunk_data`
+
+    Chunks keep their place inside the region and their timestamps.
+    When the region doesn't move and keeps its UUIDs, chunks are copied without decompressing them.
+    Chunks that fail to decompress are handled according to the region's :attr:`anvil.Region.errors`.
+
+    Parameters
+    ----------
+    source
+        The region, opened from its file so its position is known, or the path to its file.
+        Works with region, entity and point of interest files
+    region_x
+        X coordinate of the region to move to
+    region_z
+        Z coordinate of the region to move to
+    file
+        Either a path or a file object, if given the moved region will be saved there
+    fresh_uuids
+        Whether to give every entity new UUIDs, refer to :func:`translate_chunk_data`
+
+    Raises
+    ------
+    ValueError
+        If the source's position isn't known from its file name
+    anvil.errors.EmptyRegionFile
+        If the region file is empty
+
+    Returns
+    -------
+    bytes
+        The moved region file
+    """
+    if isinstance(source, (str, Path)):
+        with Region.open(source) as region:
+            data = _relocated(region, region_x, region_z, fresh_uuids)
+    else:
+        data = _relocated(source, region_x, region_z, fresh_uuids)
+
+    if file is not None:
+        if isinstance(file, (str, Path)):
+            with open(file, 'wb') as f:
+                f.write(data)
+        else:
+            file.write(data)
+    return data
+
+def _relocated(region: Region, region_x: int, region_z: int, fresh_uuids: bool) -> bytes:
+    if region.path is None:
+        raise ValueError('Region position is unknown, open it from a file named like r.X.Z.mca')
+    source_x, source_z = region_position(region.path)
+    dx, dz = (region_x - source_x) * 32, (region_z - source_z) * 32
+
+    records: list[bytes | None] = []
+    timestamps = []
+    generated = set(region.generated_chunks())
+    for index in range(1024):
+        chunk_x, chunk_z = index % 32, index // 32
+        timestamps.append(region.chunk_timestamp(chunk_x, chunk_z))
+        if (chunk_x, chunk_z) not in generated:
+            records.append(None)
+            continue
+        try:
+            if dx == dz == 0 and not fresh_uuids:
+                records.append(region.chunk_record(chunk_x, chunk_z))
+                continue
+            data = region.chunk_bytes(chunk_x, chunk_z)
+            records.append(chunk_record(translate_chunk_data(data, dx, dz, fresh_uuids)))
+        except CorruptedData as error:
+            region._on_corrupted(error)
+            records.append(None)
+    return pack_region(records, timestamps)
+
+def _relocate_file(move: tuple[Path, tuple[int, int], bool], output: Path) -> Path | None:
+    path, (region_x, region_z), fresh_uuids = move
+    destination = output / f'r.{region_x}.{region_z}{path.suffix}'
+    try:
+        relocate_region(path, region_x, region_z, destination, fresh_uuids)
+    except EmptyRegionFile:
+        # Nothing to move in the empty region files Minecraft leaves behind
+        return None
+    return destination
+
+def relocate_regions(
+    moves: Mapping[str | Path, tuple[int, int]] | Iterable[tuple[str | Path, tuple[int, int]]],
+    output: str | Path, jobs: int | None = None
+) -> list[Path]:
+    """
+    Moves many region files at once with :func:`relocate_region`, like
+    for stitching template regions together into a new world
+
+    Parameters
+    ----------
+    moves
+        Region coordinates to move each region file to, keyed by the file's path.
+        Pairs of a path and coordinates work too, for placing a region file more than once.
+        Every placement of a file after the first gives its entities new UUIDs,
+        so that Minecraft keeps all the copies
+    output
+        Folder where to write the moved regions as ``r.X.Z.mca`` files, created if needed
+    jobs
+        Number of processes moving regions at once.
+        Moves them in this process if not given
+
+    Returns
+    -------
+    list[pathlib.Path]
+        The files written, empty region files are skipped
+    """
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    if isinstance(moves, Mapping):
+        moves = moves.items()
+    items = []
+    placed = set()
+    for path, position in moves:
+        path = Path(path)
+        key = path.resolve()
+        items.append((path, tuple(position), key in placed))
+        placed.add(key)
+    relocate = functools.partial(_relocate_file, output=output)
+    if jobs is None or jobs <= 1:
+        written = [relocate(item) for item in items]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            written = list(pool.map(relocate, items))
+    return [path for path in written if path is not None]
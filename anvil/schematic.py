@@ -0,0 +1,606 @@
+"""
+Reading and writing builds as vanilla structure files (``.nbt``) and Sponge schematics (``.schem``)
+
+Blocks are kept as a single index array on a palette, the same layout as :meth:`anvil.Region.to_array`,
+and converted to and from each format's own packed layout with numpy instead of one block at a time:
+
+- Structure files list every block as a compound with its position and palette index.
+  Runs of blocks with the same layout are read and written in bulk,
+  only blocks with a block entity are handled one by one
+- Sponge schematics store indexes as varints in YZX order, versions 1 to 3 are read
+
+Entities are not kept.
+"""
+from __future__ import annotations
+from collections.abc import Sequence
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO
+import gzip
+from nbt import nbt
+import numpy as np
+from .block import Block
+from .chunk import Chunk
+from .region import Region
+from .base_section import write_palette_entry
+from .export import block_state, parse_block_state
+from .nbt_stream import (
+    NBTWriter, scan_compound, skip_payload, root_payload, list_header, TAG_INT, TAG_LIST, TAG_COMPOUND
+)
+from .utils import remap_palette
+from .errors import OutOfBoundsCoordinates, CorruptedData
+
+#: Placed where a structure file has no block, which leaves the world's block as it is
+STRUCTURE_VOID = Block('minecraft', 'structure_void')
+
+# Rows of blocks compared at once when reading runs of structure blocks, doubled every time all match
+_RUN_WINDOW = 256
+
+def _read_file(file: str | Path | BinaryIO | bytes) -> bytes:
+    """Reads a gzip compressed or plain NBT file"""
+    if isinstance(file, (str, Path)):
+        data = Path(file).read_bytes()
+    elif isinstance(file, (bytes, bytearray, memoryview)):
+        data = bytes(file)
+    else:
+        data = file.read()
+    if data[:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+    return data
+
+def _write_file(data: bytes, file: str | Path | BinaryIO | None) -> bytes:
+    # Same level as zlib's default used for chunks, gzip's default of 9 is a lot slower
+    compressed = gzip.compress(data, compresslevel=6)
+    if file is not None:
+        if isinstance(file, (str, Path)):
+            Path(file).write_bytes(compressed)
+        else:
+            file.write(compressed)
+    return compressed
+
+def _decode(data: bytes, pos: int, tag_type: int) -> tuple[nbt.TAG, int]:
+    """Decodes the payload of a tag with the ``nbt`` library, returns it and where it ends"""
+    end = skip_payload(data, pos, tag_type)
+    return nbt.TAGLIST[tag_type](buffer=BytesIO(data[pos:end])), end
+
+def _to_short(value: int) -> int:
+    # Sizes are unsigned shorts stored in signed tags
+    return value - 0x10000 if value > 0x7FFF else value
+
+def _block_entity(entity_id: str, position: Sequence[int], tags: Sequence[nbt.TAG]) -> nbt.TAG_Compound:
+    """Builds a block entity in the format used by chunks"""
+    compound = nbt.TAG_Compound()
+    compound.tags.append(nbt.TAG_String(name='id', value=entity_id))
+    for name, value in zip('xyz', position):
+        compound.tags.append(nbt.TAG_Int(name=name, value=int(value)))
+    compound.tags.extend(tag for tag in tags if tag.name not in ('id', 'x', 'y', 'z'))
+    return compound
+
+def _entity_data(block_entity: nbt.TAG_Compound) -> list[nbt.TAG]:
+    return [tag for tag in block_entity.tags if tag.name not in ('id', 'x', 'y', 'z')]
+
+def _entity_id(block_entity: nbt.TAG_Compound) -> str:
+    return block_entity['id'].value if 'id' in block_entity else ''
+
+def _entity_position(block_entity: nbt.TAG_Compound) -> tuple[int, int, int]:
+    return block_entity['x'].value, block_entity['y'].value, block_entity['z'].value
+
+def decode_varints(data: bytes | np.ndarray, count: int | None = None) -> np.ndarray:
+    """
+    Decodes unsigned varints (7 bits per byte, lowest first), as used by Sponge schematics
+
+    Parameters
+    ----------
+    data
+        The encoded bytes
+    count
+        How many values are expected
+
+    Raises
+    ------
+    anvil.errors.CorruptedData
+        If the data ends in the middle of a value, or doesn't hold ``count`` values
+
+    Returns
+    -------
+    numpy.ndarray
+        ``uint32`` array of the values
+    """
+    raw = np.frombuffer(bytes(data), dtype=np.uint8) if not isinstance(data, np.ndarray) else data.view(np.uint8)
+    if raw.size and raw[-1] & 0x80:
+        raise CorruptedData('Varint data ends in the middle of a value', prefix=bytes(raw[:16]))
+    last = raw < 0x80
+    if last.all():
+        # Palettes of up to 128 blocks only take a byte per value
+        values = raw.astype(np.uint32)
+    else:
+        ends = np.flatnonzero(last)
+        starts = np.concatenate(([0], ends[:-1] + 1))
+        shifts = (np.arange(raw.size) - np.repeat(starts, ends - starts + 1)) * 7
+        if shifts.max() > 28:
+            raise CorruptedData('Varint is too long', prefix=bytes(raw[:16]))
+        parts = (raw & 0x7F).astype(np.uint32) << shifts.astype(np.uint32)
+        # Bits of the parts don't overlap, so adding them up is the same as or-ing them
+        values = np.add.reduceat(parts, starts)
+    if count is not None and values.size != count:
+        raise CorruptedData(f'Expected {count} varints, found {values.size}', prefix=bytes(raw[:16]))
+    return values
+
+def encode_varints(values: np.ndarray) -> bytes:
+    """Encodes unsigned values as varints, the reverse of :func:`decode_varints`"""
+    values = np.asarray(values, dtype=np.uint32).reshape(-1)
+    if values.size == 0 or values.max() < 0x80:
+        return values.astype(np.uint8).tobytes()
+    lengths = np.ones(values.size, dtype=np.int64)
+    for bits in (7, 14, 21, 28):
+        lengths += values >= (1 << bits)
+    offsets = np.cumsum(lengths) - lengths
+    out = np.empty(int(lengths.sum()), dtype=np.uint8)
+    for byte in range(int(lengths.max())):
+        has = lengths > byte
+        part = (values[has] >> (7 * byte)) & 0x7F
+        more = lengths[has] > byte + 1
+        out[offsets[has] + byte] = part | (more.astype(np.uint32) << 7)
+    return out.tobytes()
+
+class _StructureEntry:
+    """Layout of one compound in a structure's list of blocks"""
+    __slots__ = ('data', 'end', 'pos', 'state', 'nbt')
+    def __init__(self, data: bytes, start: int):
+        self.data = data
+        self.pos = self.state = None
+        self.nbt: nbt.TAG_Compound | None = None
+        self.end = scan_compound(data, start, self.tag)
+        if self.pos is None or self.state is None:
+            raise ValueError('Structure block without a position or state')
+
+    def tag(self, name: bytes, tag_type: int, pos: int) -> int | None:
+        if name == b'pos' and tag_type == TAG_LIST and list_header(self.data, pos) == (TAG_INT, 3):
+            self.pos = pos + 5
+        elif name == b'state' and tag_type == TAG_INT:
+            self.state = pos
+        elif name == b'nbt' and tag_type == TAG_COMPOUND:
+            self.nbt, end = _decode(self.data, pos, tag_type)
+            return end
+        return None
+
+def _structure_blocks(data: bytes, pos: int, count: int) -> tuple[np.ndarray, np.ndarray, dict[int, nbt.TAG_Compound], int]:
+    """
+    Reads a structure's list of blocks, returns the ``(count, 3)`` positions, the palette indexes,
+    the block entity data by index in the list, and where the list ends
+    """
+    array = np.frombuffer(data, dtype=np.uint8)
+    positions = np.empty((count, 3), dtype=np.int32)
+    states = np.empty(count, dtype=np.int32)
+    entities = {}
+    i = 0
+    while i < count:
+        entry = _StructureEntry(data, pos)
+        positions[i] = np.frombuffer(data, dtype='>i4', count=3, offset=entry.pos)
+        states[i] = int.from_bytes(data[entry.state : entry.state + 4], 'big', signed=True)
+        if entry.nbt is not None:
+            entities[i] = entry.nbt
+            pos = entry.end
+            i += 1
+            continue
+        i += 1
+
+        # The next blocks most likely have the same layout, only their values differ
+        stride = entry.end - pos
+        pos_offset, state_offset = entry.pos - pos, entry.state - pos
+        template = array[pos : entry.end]
+        same_layout = np.ones(stride, dtype=bool)
+        same_layout[pos_offset : pos_offset + 12] = False
+        same_layout[state_offset : state_offset + 4] = False
+        pos = entry.end
+        window = _RUN_WINDOW
+        while i < count:
+            rows = min(window, count - i, (len(data) - pos) // stride)
+            if rows == 0:
+                break
+            view = array[pos : pos + rows * stride].reshape(rows, stride)
+            matches = (view[:, same_layout] == template[same_layout]).all(axis=1)
+            run = rows if matches.all() else int(matches.argmin())
+            if run:
+                positions[i : i + run] = view[:run, pos_offset : pos_offset + 12].copy().view('>i4')
+                states[i : i + run] = view[:run, state_offset : state_offset + 4].copy().view('>i4')[:, 0]
+                i += run
+                pos += run * stride
+            if run < rows:
+                break
+            window *= 2
+    return positions, states, entities, pos
+
+class Schematic:
+    """
+    A build's blocks, as an index array on a palette, and its block entities
+
+    Can be pasted into an :class:`anvil.EmptyRegion` with :meth:`anvil.EmptyRegion.paste`.
+
+    Attributes
+    ----------
+    blocks: :class:`numpy.ndarray`
+        ``(height, length, width)`` ``uint16`` array of indexes on :attr:`palette`, in YZX order
+    palette: tuple[:class:`anvil.Block`, ...]
+        The blocks the indexes refer to
+    block_entities: list[:class:`nbt.TAG_Compound`]
+        Block entities in the format used by chunks, with ``x``, ``y`` and ``z`` relative to the schematic's corner
+    version: :class:`int`
+        DataVersion of the blocks and block entities
+    offset: tuple[:class:`int`, :class:`int`, :class:`int`]
+        Position of the schematic's corner relative to where it was copied from, only used by Sponge schematics
+    """
+    __slots__ = ('blocks', 'palette', 'block_entities', 'version', 'offset')
+    def __init__(
+        self, blocks: np.ndarray, palette: Sequence[Block], block_entities: list[nbt.TAG_Compound] | None = None,
+        version: int = 1976, offset: tuple[int, int, int] = (0, 0, 0)
+    ):
+        self.blocks = np.asarray(blocks, dtype=np.uint16)
+        if self.blocks.ndim != 3:
+            raise ValueError(f'Blocks must be a 3D array, not {self.blocks.ndim}D')
+        self.palette = tuple(palette)
+        self.block_entities = block_entities if block_entities is not None else []
+        self.version = version
+        self.offset = tuple(offset)
+
+    @property
+    def size(self) -> tuple[int, int, int]:
+        """Width (X), height (Y) and length (Z) of the schematic"""
+        height, length, width = self.blocks.shape
+        return width, height, length
+
+    def __repr__(self):
+        return f'Schematic({self.size}, {len(self.palette)} blocks in palette)'
+
+    def to_array(self) -> tuple[np.ndarray, tuple[Block, ...]]:
+        """Returns :attr:`blocks` and :attr:`palette`, so it can be pasted like a region"""
+        return self.blocks, self.palette
+
+    @classmethod
+    def from_region(
+        cls, region: Region, x1: int, y1: int, z1: int, x2: int, y2: int, z2: int, force_new: bool = True
+    ) -> 'Schematic':
+        """
+        Copies the blocks and block entities of a box out of a region.
+        Missing chunks and sections are filled with air
+
+        Parameters
+        ----------
+        region
+            The region to copy from
+        int x1, y1, z1
+            Global coordinates of one corner of the box
+        int x2, y2, z2
+            Global coordinates of the opposite corner, included in the box
+        force_new
+            Refer to :meth:`anvil.Chunk.to_array`, structures and schematics only hold 1.13+ blocks
+
+        Raises
+        ------
+        anvil.OutOfBoundsCoordinates
+            If the box isn't inside the region
+        """
+        x1, x2 = sorted((x1, x2))
+        y1, y2 = sorted((y1, y2))
+        z1, z2 = sorted((z1, z2))
+        if x1 // 512 != x2 // 512 or z1 // 512 != z2 // 512:
+            raise OutOfBoundsCoordinates(f'Box from ({x1}, {z1}) to ({x2}, {z2}) is in more than one region')
+        lowest, highest = y1 // 16, y2 // 16
+
+        air = Block('minecraft', 'air')
+        merged: dict = {air: 0}
+        blocks = np.zeros((y2 - y1 + 1, z2 - z1 + 1, x2 - x1 + 1), dtype=np.uint16)
+        block_entities = []
+        version = None
+        for chunk_z in range(z1 // 16, z2 // 16 + 1):
+            for chunk_x in range(x1 // 16, x2 // 16 + 1):
+                nbt_data = region.chunk_data(chunk_x, chunk_z)
+                if nbt_data is None:
+                    continue
+                chunk = Chunk(nbt_data)
+                if (chunk.x, chunk.z) != (chunk_x, chunk_z):
+                    raise OutOfBoundsCoordinates(f'Chunk ({chunk_x}, {chunk_z}) is not in this region')
+                version = chunk.version if version is None else max(version, chunk.version or 0)
+
+                cx1, cx2 = max(x1, chunk_x * 16), min(x2, chunk_x * 16 + 15)
+                cz1, cz2 = max(z1, chunk_z * 16), min(z2, chunk_z * 16 + 15)
+                indexes, palette = chunk.to_array(lowest, highest, force_new=force_new)
+                part = indexes[
+                    y1 - lowest * 16 : y2 - lowest * 16 + 1,
+                    cz1 - chunk_z * 16 : cz2 - chunk_z * 16 + 1,
+                    cx1 - chunk_x * 16 : cx2 - chunk_x * 16 + 1,
+                ]
+                blocks[:, cz1 - z1 : cz2 - z1 + 1, cx1 - x1 : cx2 - x1 + 1] = remap_palette(part, palette, merged)
+
+                for entity in chunk.tile_entities or ():
+                    x, y, z = _entity_position(entity)
+                    if cx1 <= x <= cx2 and y1 <= y <= y2 and cz1 <= z <= cz2:
+                        block_entities.append(_block_entity(
+                            _entity_id(entity), (x - x1, y - y1, z - z1), _entity_data(entity)
+                        ))
+        return cls(blocks, tuple(merged), block_entities, version=version or 1976)
+
+    @classmethod
+    def from_structure(cls, file: str | Path | BinaryIO | bytes) -> 'Schematic':
+        """
+        Reads a vanilla structure file (``.nbt``), as saved by structure blocks.
+        Positions without a block are filled with :data:`STRUCTURE_VOID`
+
+        Parameters
+        ----------
+        file
+            Path to the file, file object or contents, gzip compressed or not
+
+        Raises
+        ------
+        anvil.errors.CorruptedData
+            If the file isn't a valid structure
+        """
+        data = _read_file(file)
+        tags: dict[bytes, nbt.TAG] = {}
+        listed = None
+
+        def visit(name: bytes, tag_type: int, pos: int) -> int | None:
+            nonlocal listed
+            if name == b'blocks' and tag_type == TAG_LIST and data[pos] == TAG_COMPOUND:
+                listed = _structure_blocks(data, pos + 5, list_header(data, pos)[1])
+                return listed[3]
+            if name in (b'size', b'palette', b'palettes', b'DataVersion'):
+                tags[name], end = _decode(data, pos, tag_type)
+                return end
+            return None
+
+        try:
+            scan_compound(data, root_payload(data), visit)
+            width, height, length = (tag.value for tag in tags[b'size'].tags)
+            palette_tag = tags[b'palette'] if b'palette' in tags else tags[b'palettes'][0]
+        except Exception as e:
+            error = CorruptedData(f'Failed to read structure file: {type(e).__name__}', prefix=data[:16])
+        else:
+            error = None
+        if error is not None:
+            # Raised outside the except block, so it isn't chained to the original error
+            raise error
+
+        palette = [Block.from_palette(tag) for tag in palette_tag.tags]
+        void = len(palette)
+        indexes = np.full((height, length, width), void, dtype=np.uint16)
+        block_entities = []
+        if listed is not None:
+            positions, states, entities, _ = listed
+            x, y, z = positions.T
+            inside = (x >= 0) & (x < width) & (y >= 0) & (y < height) & (z >= 0) & (z < length) \
+                & (states >= 0) & (states < len(palette))
+            if not inside.all():
+                raise CorruptedData('Structure block outside of its size or palette')
+            indexes[y, z, x] = states
+            for i, entity in entities.items():
+                block_entities.append(_block_entity(_entity_id(entity), positions[i].tolist(), entity.tags))
+        if (indexes == void).any():
+            palette.append(STRUCTURE_VOID)
+        version = tags[b'DataVersion'].value if b'DataVersion' in tags else 1976
+        return cls(indexes, palette, block_entities, version=version)
+
+    def to_structure(self, file: str | Path | BinaryIO | None = None) -> bytes:
+        """
+        Writes the schematic as a vanilla structure file (``.nbt``).
+        :data:`STRUCTURE_VOID` blocks are left out
+
+        Parameters
+        ----------
+        file
+            Either a path or a file object, if given the structure will be saved there
+
+        Returns
+        -------
+        bytes
+            The gzip compressed structure file
+        """
+        width, height, length = self.size
+        voids = [i for i, block in enumerate(self.palette) if block == STRUCTURE_VOID]
+        entities = {}
+        for entity in self.block_entities:
+            x, y, z = _entity_position(entity)
+            if 0 <= x < width and 0 <= y < height and 0 <= z < length:
+                entities[x, y, z] = entity
+
+        placed = np.ones(self.blocks.shape, dtype=bool) if not voids else ~np.isin(self.blocks, voids)
+        for x, y, z in entities:
+            placed[y, z, x] = False
+        y, z, x = np.nonzero(placed)
+        states = self.blocks[y, z, x]
+
+        writer = NBTWriter()
+        writer.begin_compound()
+        writer.write_int('DataVersion', self.version)
+        writer.begin_list('size', TAG_INT, 3)
+        writer.buffer += np.array(self.size, dtype='>i4').tobytes()
+        writer.begin_list('palette', TAG_COMPOUND, len(self.palette))
+        for block in self.palette:
+            write_palette_entry(writer, block)
+        writer.begin_list('entities', TAG_COMPOUND, 0)
+
+        writer.begin_list('blocks', TAG_COMPOUND, len(states) + len(entities))
+        # Every block without a block entity has the same layout, written all at once
+        row = NBTWriter()
+        row.begin_list('pos', TAG_INT, 3)
+        pos_offset = len(row.buffer)
+        row.buffer += bytes(12)
+        row.write_int('state', 0)
+        state_offset = len(row.buffer) - 4
+        row.end_compound()
+        rows = np.empty((len(states), len(row.buffer)), dtype=np.uint8)
+        rows[:] = np.frombuffer(bytes(row.buffer), dtype=np.uint8)
+        rows[:, pos_offset : pos_offset + 12] = np.stack((x, y, z), axis=1).astype('>i4').view(np.uint8)
+        rows[:, state_offset : state_offset + 4] = states.astype('>i4').reshape(-1, 1).view(np.uint8)
+        writer.buffer += rows.tobytes()
+
+        for (x, y, z), entity in entities.items():
+            writer.begin_list('pos', TAG_INT, 3)
+            writer.buffer += np.array((x, y, z), dtype='>i4').tobytes()
+            writer.write_int('state', int(self.blocks[y, z, x]))
+            writer.begin_compound('nbt')
+            if 'id' in entity:
+                writer.write_tag(entity['id'])
+            for tag in _entity_data(entity):
+                writer.write_tag(tag)
+            writer.end_compound()
+            writer.end_compound()
+        writer.end_compound()
+        return _write_file(writer.getvalue(), file)
+
+    @classmethod
+    def from_sponge(cls, file: str | Path | BinaryIO | bytes) -> 'Schematic':
+        """
+        Reads a Sponge schematic (``.schem``), as saved by WorldEdit and other tools
+
+        Parameters
+        ----------
+        file
+            Path to the file, file object or contents, gzip compressed or not
+
+        Raises
+        ------
+        anvil.errors.CorruptedData
+            If the file isn't a valid schematic
+        """
+        data = _read_file(file)
+        try:
+            root = nbt.NBTFile(buffer=BytesIO(data))
+            # Version 3 wraps everything in a Schematic compound
+            schematic = root['Schematic'] if 'Schematic' in root else root
+            width, height, length = (schematic[name].value & 0xFFFF for name in ('Width', 'Height', 'Length'))
+            container = schematic['Blocks'] if 'Blocks' in schematic else schematic
+            palette_tag = container['Palette']
+            states = container['Data' if 'Data' in container else 'BlockData'].value
+            entity_tags = container.get('BlockEntities') or container.get('TileEntities') or ()
+            version = schematic['DataVersion'].value if 'DataVersion' in schematic else 1976
+            offset = tuple(schematic['Offset'].value) if 'Offset' in schematic else (0, 0, 0)
+            palette_indexes = {tag.name: tag.value for tag in palette_tag.tags}
+        except Exception as e:
+            error = CorruptedData(f'Failed to read schematic: {type(e).__name__}', prefix=data[:16])
+        else:
+            error = None
+        if error is not None:
+            # Raised outside the except block, so it isn't chained to the original error
+            raise error
+
+        palette: list[Block] = [Block('minecraft', 'air')] * (max(palette_indexes.values(), default=-1) + 1)
+        for state, index in palette_indexes.items():
+            palette[index] = parse_block_state(state)
+        values = decode_varints(states, width * height * length)
+        if values.size and values.max() >= len(palette):
+            raise CorruptedData('Schematic block outside of its palette')
+        blocks = values.astype(np.uint16).reshape(height, length, width)
+
+        block_entities = []
+        for entity in entity_tags:
+            position = entity['Pos'].value
+            # Version 3 moved the block entity's data into a Data compound
+            tags = entity['Data'].tags if 'Data' in entity else entity.tags
+            block_entities.append(_block_entity(entity['Id'].value, position, [
+                tag for tag in tags if tag.name not in ('Pos', 'Id')
+            ]))
+        return cls(blocks, palette, block_entities, version=version, offset=offset)
+
+    def to_sponge(self, file: str | Path | BinaryIO | None = None, version: int = 3) -> bytes:
+        """
+        Writes the schematic as a Sponge schematic (``.schem``)
+
+        Parameters
+        ----------
+        file
+            Either a path or a file object, if given the schematic will be saved there
+        version
+            Version of the Sponge format, 2 or 3
+
+        Raises
+        ------
+        ValueError
+            If the version isn't supported, or the schematic is bigger than 65535 blocks on a side
+
+        Returns
+        -------
+        bytes
+            The gzip compressed schematic
+        """
+        if version not in (2, 3):
+            raise ValueError(f'Unsupported Sponge schematic version {version}')
+        if max(self.size) > 0xFFFF:
+            raise ValueError(f'Schematic of size {self.size} is too big, sides are at most 65535 blocks')
+
+        # Identical block states share the same index
+        keys: dict[str, int] = {}
+        lut = np.array([keys.setdefault(block_state(block), len(keys)) for block in self.palette], dtype=np.uint32)
+        values = lut[self.blocks] if self.blocks.size else np.zeros(0, dtype=np.uint32)
+
+        writer = NBTWriter()
+        if version == 3:
+            writer.begin_compound()
+            writer.begin_compound('Schematic')
+        else:
+            writer.begin_compound('Schematic')
+        writer.write_int('Version', version)
+        writer.write_int('DataVersion', self.version)
+        for name, value in zip(('Width', 'Height', 'Length'), self.size):
+            writer.write_short(name, _to_short(value))
+        writer.write_int_array('Offset', self.offset)
+        if version == 3:
+            writer.begin_compound('Blocks')
+        else:
+            writer.write_int('PaletteMax', len(keys))
+        writer.begin_compound('Palette')
+        for key, index in keys.items():
+            writer.write_int(key, index)
+        writer.end_compound()
+        writer.write_byte_array('Data' if version == 3 else 'BlockData', encode_varints(values))
+
+        writer.begin_list('BlockEntities', TAG_COMPOUND, len(self.block_entities))
+        for entity in self.block_entities:
+            writer.write_int_array('Pos', _entity_position(entity))
+            writer.write_string('Id', _entity_id(entity))
+            if version == 3:
+                writer.begin_compound('Data')
+            for tag in _entity_data(entity):
+                writer.write_tag(tag)
+            if version == 3:
+                writer.end_compound()
+            writer.end_compound()
+        if version == 3:
+            writer.end_compound()
+            writer.end_compound()
+        writer.end_compound()
+        return _write_file(writer.getvalue(), file)
+
+    @classmethod
+    def from_file(cls, file: str | Path) -> 'Schematic':
+        """
+        Reads a structure (``.nbt``) or Sponge schematic (``.schem``), depending on the file's extension
+
+        Raises
+        ------
+        ValueError
+            If the extension is neither
+        """
+        suffix = Path(file).suffix.lower()
+        if suffix == '.nbt':
+            return cls.from_structure(file)
+        if suffix == '.schem':
+            return cls.from_sponge(file)
+        raise ValueError(f'Unknown schematic extension {suffix!r}, expected .nbt or .schem')
+
+    def save(self, file: str | Path) -> bytes:
+        """
+        Writes a structure (``.nbt``) or Sponge schematic (``.schem``), depending on the file's extension
+
+        Raises
+        ------
+        ValueError
+            If the extension is neither
+        """
+        suffix = Path(file).suffix.lower()
+        if suffix == '.nbt':
+            return self.to_structure(file)
+        if suffix == '.schem':
+            return self.to_sponge(file)
+        raise ValueError(f'Unknown schematic extension {suffix!r}, expected .nbt or .schem')
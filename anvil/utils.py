@@ -1,9 +1,16 @@
+from collections.abc import Sequence
 from struct import Struct
+from nbt import nbt
+import numpy as np
 
 # Dirty mixin to change q to Q
 def _update_fmt(self, length: int) -> None:
     self.fmt = Struct(f'>{length}Q')
 
+# Applied here since every module reading or writing NBT imports this one,
+# so long arrays are always read and written the same way
+nbt.TAG_Long_Array.update_fmt = _update_fmt
+
 def bin_append(a: int, b: int, length: int | None = None) -> int:
     length = length or b.bit_length()
     return (a << length) | b
@@ -14,3 +21,134 @@ def nibble(byte_array: bytearray, index: int) -> int:
         return value >> 4
     else:
         return value & 0b1111
+
+def unpack_nibbles(byte_array: bytes | bytearray | np.ndarray) -> np.ndarray:
+    """
+    Returns all the 4 bit values of a nibble array (such as a legacy section's ``Data``) at once,
+    same as calling :func:`nibble` for every index
+
+    Returns
+    -------
+    numpy.ndarray
+        ``uint8`` array twice as long as ``byte_array``
+    """
+    packed = np.frombuffer(bytes(byte_array), dtype=np.uint8) if not isinstance(byte_array, np.ndarray) else byte_array.astype(np.uint8, copy=False)
+    nibbles = np.empty(len(packed) * 2, dtype=np.uint8)
+    # Even indexes are on the low bits
+    nibbles[0::2] = packed & 0x0F
+    nibbles[1::2] = packed >> 4
+    return nibbles
+
+def pack_nibbles(values: np.ndarray) -> bytearray:
+    """
+    Packs 4 bit values into a nibble array (such as a section's ``SkyLight``),
+    the inverse of :func:`unpack_nibbles`
+    """
+    values = np.asarray(values, dtype=np.uint8).reshape(-1)
+    return bytearray((values[0::2] & 0x0F | values[1::2] << 4).tobytes())
+
+def as_uint64(values: Sequence[int] | np.ndarray) -> np.ndarray:
+    """
+    Returns the values of a ``TAG_Long_Array`` as an unsigned 64 bit array,
+    no matter if they were read as signed or unsigned numbers
+    """
+    if isinstance(values, np.ndarray):
+        return values.astype(np.uint64, copy=False)
+    try:
+        return np.array(values, dtype=np.int64).astype(np.uint64)
+    except OverflowError:
+        pass
+    try:
+        return np.array(values, dtype=np.uint64)
+    except OverflowError:
+        # Mixed signed and unsigned numbers
+        return np.array([value & 0xFFFF_FFFF_FFFF_FFFF for value in values], dtype=np.uint64)
+
+def unpack_states(states: Sequence[int] | np.ndarray, bits: int, count: int = 4096, stretches: bool = False) -> np.ndarray:
+    """
+    Unpacks the palette indexes packed in an array of longs, such as ``BlockStates``,
+    in a single vectorized pass
+
+    Parameters
+    ----------
+    states
+        The packed longs
+    bits
+        How many bits each value uses
+    count
+        How many values are packed
+    stretches
+        Whether values can be split between two longs, which is the layout
+        used before 20w17a. Otherwise each long is padded with unused bits
+
+    Returns
+    -------
+    numpy.ndarray
+        ``count`` values, as ``uint16``
+    """
+    longs = as_uint64(states)
+    if stretches:
+        stream = np.unpackbits(longs.astype('<u8').view(np.uint8), bitorder='little')
+        needed = count * bits
+        if len(stream) < needed:
+            stream = np.concatenate((stream, np.zeros(needed - len(stream), dtype=np.uint8)))
+        values = stream[:needed].reshape(count, bits)
+        weights = np.left_shift(1, np.arange(bits, dtype=np.uint32), dtype=np.uint32)
+        return (values @ weights).astype(np.uint16)
+
+    per_long = 64 // bits
+    needed = -(-count // per_long)
+    if len(longs) < needed:
+        longs = np.concatenate((longs, np.zeros(needed - len(longs), dtype=np.uint64)))
+    shifts = np.arange(per_long, dtype=np.uint64) * np.uint64(bits)
+    values = (longs[:needed, None] >> shifts) & np.uint64((1 << bits) - 1)
+    return values.reshape(-1)[:count].astype(np.uint16)
+
+def remap_palette(indexes: np.ndarray, palette: Sequence, merged: dict) -> np.ndarray:
+    """
+    Maps indexes on ``palette`` to indexes on a bigger ``merged`` palette,
+    adding to it the entries it doesn't have yet
+
+    Parameters
+    ----------
+    indexes
+        Array of indexes on ``palette``
+    palette
+        The palette ``indexes`` refer to
+    merged
+        Palette entry to index dict, updated in place
+    """
+    lut = np.fromiter((merged.setdefault(entry, len(merged)) for entry in palette), dtype=np.uint16, count=len(palette))
+    return lut[indexes]
+
+def pack_states(values: Sequence[int] | np.ndarray, bits: int, stretches: bool = False) -> np.ndarray:
+    """
+    Packs palette indexes into an array of longs, such as ``BlockStates``,
+    in a single vectorized pass. This is the inverse of :func:`unpack_states`
+
+    Parameters
+    ----------
+    values
+        The palette indexes
+    bits
+        How many bits each value uses
+    stretches
+        Whether values can be split between two longs, which is the layout
+        used before 20w17a. Otherwise each long is padded with unused bits
+
+    Returns
+    -------
+    numpy.ndarray
+        The packed longs, as ``uint64``
+    """
+    values = np.asarray(values, dtype=np.uint64).reshape(-1)
+    if stretches:
+        shifts = np.arange(bits, dtype=np.uint64)
+        stream = ((values[:, None] >> shifts) & np.uint64(1)).astype(np.uint8).reshape(-1)
+        stream = np.concatenate((stream, np.zeros(-len(stream) % 64, dtype=np.uint8)))
+        return np.packbits(stream, bitorder='little').view('<u8').astype(np.uint64)
+
+    per_long = 64 // bits
+    values = np.concatenate((values, np.zeros(-len(values) % per_long, dtype=np.uint64)))
+    shifts = np.arange(per_long, dtype=np.uint64) * np.uint64(bits)
+    return np.bitwise_or.reduce(values.reshape(-1, per_long) << shifts, axis=1)
@@ -0,0 +1,237 @@
+"""
+Integrity checks for region files, and salvaging the chunks that are still readable
+
+Only the headers and the compressed streams are checked, chunks are decompressed
+and thrown away without parsing their NBT data, so checking is about as fast as reading the files.
+"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import os
+import zlib
+from .empty_region import pack_region
+
+# Compression types - https://minecraft.wiki/w/Region_file_format#Payload
+_GZIP = 1
+_ZLIB = 2
+_UNCOMPRESSED = 3
+# Set on the compression type when the chunk is too big and is stored in a c.X.Z.mcc file instead
+_EXTERNAL = 128
+
+class VerifyIssue:
+    """
+    A problem found in a region file
+
+    Attributes
+    ----------
+    chunk: tuple[:class:`int`, :class:`int`] | None
+        Region-local ``(x, z)`` of the chunk, None for problems with the whole file
+    kind: :class:`str`
+        One of ``file``, ``header``, ``past_eof``, ``overlap``, ``length``, ``compression`` or ``zlib``
+    message: :class:`str`
+        Description of the problem
+    """
+    __slots__ = ('chunk', 'kind', 'message')
+    def __init__(self, chunk: tuple[int, int] | None, kind: str, message: str):
+        self.chunk = chunk
+        self.kind = kind
+        self.message = message
+
+    def __repr__(self):
+        return f'VerifyIssue({self.chunk}, {self.kind!r}, {self.message!r})'
+
+    def to_dict(self) -> dict:
+        return {'chunk': list(self.chunk) if self.chunk else None, 'kind': self.kind, 'message': self.message}
+
+class RegionReport:
+    """
+    Result of checking a region file with :func:`verify_region`
+
+    Attributes
+    ----------
+    path: :class:`str` | None
+        The file checked, if it was given as a path
+    chunks: :class:`int`
+        How many chunks the header lists
+    valid: list[tuple[:class:`int`, :class:`int`]]
+        Region-local ``(x, z)`` of every chunk that passed all the checks
+    issues: list[:class:`VerifyIssue`]
+        Every problem found
+    """
+    __slots__ = ('path', 'chunks', 'valid', 'issues')
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.chunks = 0
+        self.valid: list[tuple[int, int]] = []
+        self.issues: list[VerifyIssue] = []
+
+    @property
+    def ok(self) -> bool:
+        """Whether no problems were found"""
+        return not self.issues
+
+    def __repr__(self):
+        return f'RegionReport({self.path!r}, {len(self.valid)}/{self.chunks} valid chunks, {len(self.issues)} issues)'
+
+    def to_dict(self) -> dict:
+        return {
+            'file': self.path,
+            'ok': self.ok,
+            'chunks': self.chunks,
+            'valid': len(self.valid),
+            'issues': [issue.to_dict() for issue in self.issues],
+        }
+
+def _check_stream(payload: memoryview, compression: int) -> str | None:
+    """Decompresses a chunk's payload and throws the output away, returning what's wrong with it if anything"""
+    if compression == _UNCOMPRESSED:
+        return None
+    decompressor = zlib.decompressobj(31 if compression == _GZIP else 15)
+    try:
+        data = payload
+        # Bounded output, so a corrupt length can't make it allocate huge buffers
+        while data:
+            decompressor.decompress(data, 1 << 20)
+            data = decompressor.unconsumed_tail
+        decompressor.flush()
+    except zlib.error as e:
+        return str(e)
+    if not decompressor.eof:
+        return 'Compressed stream ends early'
+    return None
+
+def _check_chunk(data: memoryview, index: int, offset: int, sectors: int) -> VerifyIssue | None:
+    chunk = (index % 32, index // 32)
+    start = offset * 4096
+    length = int.from_bytes(data[start : start + 4], 'big')
+    if length == 0:
+        return VerifyIssue(chunk, 'length', 'Chunk length is 0')
+    if 4 + length > sectors * 4096:
+        return VerifyIssue(chunk, 'length', f'Chunk length {length} is more than its {sectors} sectors')
+    compression = data[start + 4]
+    if compression & _EXTERNAL:
+        # The data is in another file, there's nothing else to check here
+        return None
+    if compression not in (_GZIP, _ZLIB, _UNCOMPRESSED):
+        return VerifyIssue(chunk, 'compression', f'Unknown compression type {compression}')
+    problem = _check_stream(data[start + 5 : start + 4 + length], compression)
+    if problem:
+        return VerifyIssue(chunk, 'zlib', problem)
+    return None
+
+def _check_region(data: bytes | memoryview, report: RegionReport, jobs: int | None):
+    size = len(data)
+    if size == 0:
+        # Minecraft leaves empty region files behind, they are fine
+        return
+    if size < 8192:
+        report.issues.append(VerifyIssue(None, 'file', f'File is {size} bytes, too small for the 8KiB of headers'))
+        return
+    if size % 4096:
+        report.issues.append(VerifyIssue(None, 'file', f'File size {size} is not a multiple of 4KiB'))
+    file_sectors = -(-size // 4096)
+
+    data = memoryview(data)
+    candidates = []
+    for index in range(1024):
+        entry = data[index * 4 : index * 4 + 4]
+        offset = int.from_bytes(entry[:3], 'big')
+        sectors = entry[3]
+        if offset == 0 and sectors == 0:
+            continue
+        report.chunks += 1
+        chunk = (index % 32, index // 32)
+        if offset < 2:
+            report.issues.append(VerifyIssue(chunk, 'header', f'Chunk starts at sector {offset}, inside the headers'))
+        elif sectors == 0:
+            report.issues.append(VerifyIssue(chunk, 'header', 'Chunk has a length of 0 sectors'))
+        elif offset + sectors > file_sectors:
+            report.issues.append(VerifyIssue(
+                chunk, 'past_eof', f'Chunk ends at sector {offset + sectors}, past the end of the file at {file_sectors}'
+            ))
+        else:
+            candidates.append((offset, sectors, index))
+
+    # Chunks sharing sectors, at most one of them can be right
+    overlapping = set()
+    candidates.sort()
+    end, last = 0, None
+    for offset, sectors, index in candidates:
+        if offset < end:
+            overlapping.update((index, last))
+        if offset + sectors > end:
+            end, last = offset + sectors, index
+    for index in sorted(overlapping):
+        report.issues.append(VerifyIssue((index % 32, index // 32), 'overlap', 'Chunk shares sectors with another chunk'))
+
+    # zlib releases the GIL, so threads are enough to check chunks in parallel
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        results = pool.map(lambda c: (c[2], _check_chunk(data, c[2], c[0], c[1])), candidates)
+        for index, issue in sorted(results):
+            if issue is not None:
+                report.issues.append(issue)
+            elif index not in overlapping:
+                report.valid.append((index % 32, index // 32))
+
+def verify_region(region: str | Path | bytes, jobs: int | None = None) -> RegionReport:
+    """
+    Checks a region file's headers and every chunk's compressed data
+
+    Checks that chunks start after the headers and end before the end of the file, that no two chunks
+    share sectors, that each chunk's length fits its sectors, and that its data decompresses completely.
+
+    Parameters
+    ----------
+    region
+        Path to the region file, or its contents
+    jobs
+        Number of threads decompressing chunks, defaults to one per CPU
+    """
+    if isinstance(region, (str, Path)):
+        report = RegionReport(str(region))
+        data = Path(region).read_bytes()
+    else:
+        report = RegionReport()
+        data = region
+    _check_region(data, report, jobs)
+    return report
+
+def salvage_region(source: str | Path | bytes, destination: str | Path | None = None, jobs: int | None = None) -> tuple[bytes, RegionReport]:
+    """
+    Builds a clean region file out of the chunks of another one that pass :func:`verify_region`
+
+    Valid chunks are copied as they are, along with their timestamps, everything else is left out.
+
+    Parameters
+    ----------
+    source
+        Path to the damaged region file, or its contents
+    destination
+        If given, the clean region is written there
+    jobs
+        Refer to :func:`verify_region`
+
+    Returns
+    -------
+    tuple[bytes, RegionReport]
+        The clean region file, and the report on the damaged one
+    """
+    data = Path(source).read_bytes() if isinstance(source, (str, Path)) else source
+    report = verify_region(data, jobs=jobs)
+    if isinstance(source, (str, Path)):
+        report.path = str(source)
+
+    records: list[bytes | None] = [None] * 1024
+    timestamps = [0] * 1024
+    view = memoryview(data)
+    for x, z in report.valid:
+        index = x + z * 32
+        start = int.from_bytes(view[index * 4 : index * 4 + 3], 'big') * 4096
+        length = int.from_bytes(view[start : start + 4], 'big')
+        records[index] = bytes(view[start : start + 4 + length])
+        timestamps[index] = int.from_bytes(view[4096 + index * 4 : 4096 + index * 4 + 4], 'big')
+
+    clean = pack_region(records, timestamps)
+    if destination is not None:
+        Path(destination).write_bytes(clean)
+    return clean, report
@@ -0,0 +1,278 @@
+"""
+Benchmarks for the read and write hot paths, on synthetic regions of every chunk format generation
+
+Run from the repository root::
+
+    python -m scripts.benchmark --output results.json
+    python -m scripts.benchmark --compare results.json --threshold 0.15
+
+Results are printed (and optionally saved) as JSON, one entry per ``era.benchmark`` with
+the best time out of ``--repeat`` runs and the resulting throughput.
+With ``--compare``, exits with status 1 if any throughput dropped more than ``--threshold``
+(a fraction) from the baseline file.
+"""
+from collections.abc import Callable
+from pathlib import Path
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+from nbt import nbt
+from anvil import Region, EmptyRegion, EmptyChunk, Block
+from anvil.empty_region import chunk_record, pack_region
+
+# DataVersion used for each chunk format generation
+ERAS = {
+    # Numeric ids with Blocks and Data arrays (1.12)
+    'legacy': 1343,
+    # Palettes with block states stretching across longs (1.14)
+    'stretched': 1976,
+    # Palettes with padded longs (1.16)
+    'padded': 2586,
+    # No Level tag and block_states containers (1.18)
+    'modern': 2975,
+}
+
+PALETTE = (
+    Block('minecraft', 'air'),
+    Block('minecraft', 'stone'),
+    Block('minecraft', 'dirt'),
+    Block('minecraft', 'grass_block', {'snowy': 'false'}),
+    Block('minecraft', 'bedrock'),
+    Block('minecraft', 'water', {'level': '0'}),
+    Block('minecraft', 'iron_ore'),
+    Block('minecraft', 'coal_ore'),
+    Block('minecraft', 'oak_log', {'axis': 'y'}),
+)
+# Same blocks as PALETTE, as pre-flattening (id, data)
+LEGACY_PALETTE = ((0, 0), (1, 0), (3, 0), (2, 0), (7, 0), (9, 0), (15, 0), (16, 0), (17, 0))
+
+# Water reaches the top section, so no chunk is missing any section
+SECTIONS = 5
+SEA_LEVEL = 66
+
+def terrain(chunk_x: int, chunk_z: int) -> np.ndarray:
+    """Returns a ``(SECTIONS * 16, 16, 16)`` array of indexes on :data:`PALETTE` for a chunk"""
+    rng = np.random.default_rng(chunk_x * 7919 + chunk_z)
+    xs = np.arange(16) + chunk_x * 16
+    zs = np.arange(16) + chunk_z * 16
+    heights = (56 + 12 * np.sin(xs[None, :] * 0.07) * np.cos(zs[:, None] * 0.05)).astype(np.int64)
+
+    y = np.arange(SECTIONS * 16)[:, None, None]
+    blocks = np.zeros((SECTIONS * 16, 16, 16), dtype=np.uint16)
+    blocks[y < heights] = 1
+    ores = rng.random(blocks.shape)
+    blocks[(blocks == 1) & (ores < 0.01)] = 6
+    blocks[(blocks == 1) & (ores > 0.98)] = 7
+    blocks[(y >= heights - 3) & (y < heights)] = 2
+    blocks[y == heights] = 3
+    blocks[(y > heights) & (y <= SEA_LEVEL)] = 5
+    blocks[0] = 4
+    trees = rng.random((16, 16)) < 0.01
+    for z, x in np.argwhere(trees & (heights > SEA_LEVEL)):
+        blocks[heights[z, x] + 1 : heights[z, x] + 6, z, x] = 8
+    return blocks
+
+def legacy_chunk(chunk_x: int, chunk_z: int, blocks: np.ndarray) -> nbt.NBTFile:
+    """Builds a pre-flattening chunk out of indexes on :data:`PALETTE`"""
+    ids = np.array([i for i, _ in LEGACY_PALETTE], dtype=np.uint8)[blocks]
+    data = np.array([d for _, d in LEGACY_PALETTE], dtype=np.uint8)[blocks]
+
+    root = nbt.NBTFile()
+    root.tags.append(nbt.TAG_Int(name='DataVersion', value=ERAS['legacy']))
+    level = nbt.TAG_Compound()
+    level.name = 'Level'
+    level.tags.append(nbt.TAG_Int(name='xPos', value=chunk_x))
+    level.tags.append(nbt.TAG_Int(name='zPos', value=chunk_z))
+    sections = nbt.TAG_List(name='Sections', type=nbt.TAG_Compound)
+    for y in range(SECTIONS):
+        section = nbt.TAG_Compound()
+        section.tags.append(nbt.TAG_Byte(name='Y', value=y))
+        section_ids = ids[y * 16 : y * 16 + 16].reshape(-1)
+        section_data = data[y * 16 : y * 16 + 16].reshape(-1)
+        for name, value in (
+            ('Blocks', section_ids),
+            # Two blocks per byte, the first one in the low nibble
+            ('Data', section_data[0::2] | (section_data[1::2] << 4)),
+        ):
+            tag = nbt.TAG_Byte_Array(name=name)
+            tag.value = bytearray(value.tobytes())
+            section.tags.append(tag)
+        sections.tags.append(section)
+    level.tags.append(sections)
+    level.tags.append(nbt.TAG_List(name='TileEntities', type=nbt.TAG_Compound))
+    root.tags.append(level)
+    return root
+
+def make_chunks(era: str, count: int) -> list[EmptyChunk | nbt.NBTFile]:
+    """Returns ``count`` chunks of the given era, as NBT for legacy chunks"""
+    side = math.ceil(math.sqrt(count))
+    chunks = []
+    for i in range(count):
+        chunk_x, chunk_z = i % side, i // side
+        blocks = terrain(chunk_x, chunk_z)
+        if era == 'legacy':
+            chunks.append(legacy_chunk(chunk_x, chunk_z, blocks))
+        else:
+            chunk = EmptyChunk.from_array(chunk_x, chunk_z, blocks, PALETTE)
+            chunk.version = ERAS[era]
+            chunks.append(chunk)
+    return chunks
+
+def make_region(era: str, count: int) -> bytes:
+    """Returns a region file with ``count`` chunks of the given era"""
+    chunks = make_chunks(era, count)
+    if era == 'legacy':
+        records: list[bytes | None] = [None] * 1024
+        for chunk in chunks:
+            level = chunk['Level']
+            records[level['xPos'].value + level['zPos'].value * 32] = chunk_record(chunk)
+        return pack_region(records)
+    region = EmptyRegion(0, 0)
+    for chunk in chunks:
+        region.add_chunk(chunk)
+    return region.save()
+
+# Each benchmark gets the region file and its chunks, and returns a function to time
+# along with how many units of work one call of it does
+Benchmark = Callable[[bytes, list], tuple[Callable[[], object], int, str]]
+
+def bench_chunk_data(data, chunks):
+    region = Region(data)
+    coords = region.generated_chunks()
+    return lambda: [region.chunk_data(x, z) for x, z in coords], len(coords), 'chunks/s'
+
+def bench_get_block(data, chunks):
+    chunk = Region(data).get_chunk(0, 0)
+    rng = random.Random(0)
+    # Below the top section, as get_block checks against its start
+    coords = [(rng.randrange(16), rng.randrange((SECTIONS - 1) * 16), rng.randrange(16)) for _ in range(2000)]
+    return lambda: [chunk.get_block(x, y, z) for x, y, z in coords], len(coords), 'blocks/s'
+
+def bench_stream_blocks(data, chunks):
+    chunk = Region(data).get_chunk(0, 0)
+    return lambda: [list(chunk.stream_blocks(section=y)) for y in range(SECTIONS)], SECTIONS * 4096, 'blocks/s'
+
+def bench_stream_chunk(data, chunks):
+    chunk = Region(data).get_chunk(0, 0)
+    return lambda: list(chunk.stream_chunk()), SECTIONS * 4096, 'blocks/s'
+
+def bench_get_palette(data, chunks):
+    region = Region(data)
+    loaded = [region.get_chunk(x, z) for x, z in region.generated_chunks()]
+    return lambda: [chunk.get_palette(y) for chunk in loaded for y in range(SECTIONS)], len(loaded) * SECTIONS, 'sections/s'
+
+def bench_save(data, chunks):
+    region = EmptyRegion(0, 0)
+    for chunk in chunks:
+        region.add_chunk(chunk)
+    return region.save, len(chunks), 'chunks/s'
+
+def bench_scan(data, chunks):
+    region = Region(data)
+    return region.count_blocks, len(region.generated_chunks()), 'chunks/s'
+
+BENCHMARKS: dict[str, Benchmark] = {
+    'chunk_data': bench_chunk_data,
+    'get_block': bench_get_block,
+    'stream_blocks': bench_stream_blocks,
+    'stream_chunk': bench_stream_chunk,
+    'get_palette': bench_get_palette,
+    'save': bench_save,
+    'scan': bench_scan,
+}
+
+# Not available for pre-flattening chunks: they have no palettes and can't be written
+UNSUPPORTED = {('legacy', 'get_palette'), ('legacy', 'save')}
+
+def run(
+        eras: list[str] | None = None,
+        benchmarks: list[str] | None = None,
+        chunks: int = 64,
+        repeat: int = 3
+) -> dict:
+    """
+    Runs the benchmarks and returns the results
+
+    Returns
+    -------
+    dict
+        ``{'environment': {...}, 'results': {'era.benchmark': {'seconds', 'rate', 'unit'}}}``,
+        ``seconds`` being the best time out of ``repeat`` runs
+    """
+    results = {}
+    for era in eras or list(ERAS):
+        era_chunks = make_chunks(era, chunks)
+        data = make_region(era, chunks)
+        for name in benchmarks or list(BENCHMARKS):
+            if (era, name) in UNSUPPORTED:
+                continue
+            func, work, unit = BENCHMARKS[name](data, era_chunks)
+            best = math.inf
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func()
+                best = min(best, time.perf_counter() - start)
+            results[f'{era}.{name}'] = {'seconds': best, 'rate': work / best, 'unit': unit}
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'numpy': np.__version__,
+            'chunks': chunks,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Returns a message for every benchmark whose throughput dropped
+    more than ``threshold`` (a fraction) from the baseline
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        change = result['rate'] / before['rate'] - 1
+        if change < -threshold:
+            regressions.append(
+                f'{name}: {result["rate"]:.1f} {result["unit"]} vs {before["rate"]:.1f} ({change:+.1%})'
+            )
+    return regressions
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--era', action='append', choices=list(ERAS), help='Only run these eras (repeatable)')
+    parser.add_argument('--bench', action='append', choices=list(BENCHMARKS), help='Only run these benchmarks (repeatable)')
+    parser.add_argument('--chunks', type=int, default=64, help='Chunks in each synthetic region')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of each benchmark, the best one is kept')
+    parser.add_argument('--output', type=Path, help='Also save the results to this JSON file')
+    parser.add_argument('--compare', type=Path, help='Baseline results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Allowed throughput drop, as a fraction')
+    args = parser.parse_args(argv)
+
+    results = run(args.era, args.bench, chunks=args.chunks, repeat=args.repeat)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.threshold)
+        for message in regressions:
+            print(f'REGRESSION {message}', file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
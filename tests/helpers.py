@@ -0,0 +1,92 @@
+from nbt import nbt
+from io import BytesIO
+import zlib
+
+def compress_nbt(root: nbt.NBTFile) -> bytes:
+    """Serializes and zlib compresses a chunk's NBT, as stored in a region file"""
+    buffer = BytesIO()
+    root.write_file(buffer=buffer)
+    return zlib.compress(buffer.getvalue())
+
+def make_region(chunks: dict[tuple[int, int], bytes]) -> bytes:
+    """Builds a region file from zlib compressed chunk payloads keyed by region-local chunk coordinates"""
+    header = bytearray(8192)
+    body = bytearray()
+    for (chunk_x, chunk_z), data in chunks.items():
+        record = (len(data) + 1).to_bytes(4, 'big') + b'\x02' + data
+        record += bytes(-len(record) % 4096)
+        offset = 4 * (chunk_x + chunk_z * 32)
+        header[offset : offset + 4] = (2 + len(body) // 4096).to_bytes(3, 'big') + bytes([len(record) // 4096])
+        body += record
+    return bytes(header + body)
+
+def pack_padded(values: list[int], bits: int) -> list[int]:
+    """Packs values into signed longs without splitting any value between two longs (20w17a and newer)"""
+    per_long = 64 // bits
+    longs = []
+    for start in range(0, len(values), per_long):
+        long = 0
+        for i, value in enumerate(values[start : start + per_long]):
+            long |= value << (i * bits)
+        longs.append(long - (1 << 64) if long >= 1 << 63 else long)
+    return longs
+
+def make_modern_chunk(x: int, z: int, sections: dict[int, tuple[list[int], list[str]]], y_pos: int = -4) -> nbt.NBTFile:
+    """Builds a 1.18+ chunk, where each section is given as a list of 4096 palette indexes and its palette of block names"""
+    root = nbt.NBTFile()
+    root.tags.append(nbt.TAG_Int(name='DataVersion', value=2975))
+    root.tags.append(nbt.TAG_Int(name='xPos', value=x))
+    root.tags.append(nbt.TAG_Int(name='zPos', value=z))
+    root.tags.append(nbt.TAG_Int(name='yPos', value=y_pos))
+    tag = nbt.TAG_List(name='sections', type=nbt.TAG_Compound)
+    for y, (indexes, names) in sorted(sections.items()):
+        section = nbt.TAG_Compound()
+        section.tags.append(nbt.TAG_Byte(name='Y', value=y))
+        states = nbt.TAG_Compound()
+        states.name = 'block_states'
+        palette = nbt.TAG_List(name='palette', type=nbt.TAG_Compound)
+        for name in names:
+            entry = nbt.TAG_Compound()
+            entry.tags.append(nbt.TAG_String(name='Name', value=name))
+            palette.tags.append(entry)
+        states.tags.append(palette)
+        if len(names) > 1:
+            data = nbt.TAG_Long_Array(name='data')
+            data.value = pack_padded(indexes, max((len(names) - 1).bit_length(), 4))
+            states.tags.append(data)
+        section.tags.append(states)
+        tag.tags.append(section)
+    root.tags.append(tag)
+    root.tags.append(nbt.TAG_List(name='block_entities', type=nbt.TAG_Compound))
+    return root
+
+def make_legacy_chunk(x: int, z: int, sections: dict[int, list[tuple[int, int]]], version: int | None = 1343) -> nbt.NBTFile:
+    """Builds a pre-1.13 chunk, where each section is given as a list of 4096 ``(block_id, data)`` pairs"""
+    root = nbt.NBTFile()
+    if version is not None:
+        root.tags.append(nbt.TAG_Int(name='DataVersion', value=version))
+    level = nbt.TAG_Compound()
+    level.name = 'Level'
+    level.tags.append(nbt.TAG_Int(name='xPos', value=x))
+    level.tags.append(nbt.TAG_Int(name='zPos', value=z))
+    tag = nbt.TAG_List(name='Sections', type=nbt.TAG_Compound)
+    for y, blocks in sorted(sections.items()):
+        section = nbt.TAG_Compound()
+        section.tags.append(nbt.TAG_Byte(name='Y', value=y))
+        ids = bytearray(block_id & 0xFF for block_id, _ in blocks)
+        data = bytearray(2048)
+        add = bytearray(2048)
+        for i, (block_id, value) in enumerate(blocks):
+            data[i // 2] |= value << (4 * (i % 2))
+            add[i // 2] |= (block_id >> 8) << (4 * (i % 2))
+        for name, array in (('Blocks', ids), ('Data', data), ('Add', add)):
+            if name == 'Add' and not any(add):
+                continue
+            array_tag = nbt.TAG_Byte_Array(name=name)
+            array_tag.value = array
+            section.tags.append(array_tag)
+        tag.tags.append(section)
+    level.tags.append(tag)
+    level.tags.append(nbt.TAG_List(name='TileEntities', type=nbt.TAG_Compound))
+    root.tags.append(level)
+    return root
@@ -0,0 +1,89 @@
+import context as _
+import asyncio
+import time
+from anvil import Chunk, aio
+from anvil.aio import AsyncRegion, AsyncWorld
+from anvil.errors import ChunkNotFound, EmptyRegionFile
+from helpers import compress_nbt, make_region, make_modern_chunk
+import pytest
+
+def write_region(path, coords: list[tuple[int, int]], region_x: int = 0, region_z: int = 0) -> None:
+    path.write_bytes(make_region({
+        (x, z): compress_nbt(make_modern_chunk(region_x * 32 + x, region_z * 32 + z, {0: ([0] * 4096, ['minecraft:stone'])}))
+        for x, z in coords
+    }))
+
+def test_region_chunk(tmp_path) -> None:
+    write_region(tmp_path / 'r.0.0.mca', [(0, 0), (3, 1)])
+
+    async def main():
+        async with await AsyncRegion.open(tmp_path / 'r.0.0.mca') as region:
+            chunk = await region.chunk(3, 1)
+            with pytest.raises(ChunkNotFound):
+                await region.chunk(1, 1)
+            return chunk
+
+    chunk = asyncio.run(main())
+    assert isinstance(chunk, Chunk)
+    assert (chunk.x, chunk.z) == (3, 1)
+
+def test_region_chunks_in_order(tmp_path) -> None:
+    coords = [(x, z) for z in range(3) for x in range(4)]
+    write_region(tmp_path / 'r.0.0.mca', coords)
+
+    async def main():
+        async with await AsyncRegion.open(tmp_path / 'r.0.0.mca', concurrency=2) as region:
+            return [(chunk.x, chunk.z) async for chunk in region.chunks()]
+
+    assert asyncio.run(main()) == coords
+
+def test_empty_region(tmp_path) -> None:
+    (tmp_path / 'r.0.0.mca').write_bytes(b'')
+    with pytest.raises(EmptyRegionFile):
+        asyncio.run(AsyncRegion.open(tmp_path / 'r.0.0.mca'))
+
+def test_world(tmp_path) -> None:
+    write_region(tmp_path / 'r.0.0.mca', [(0, 0)])
+    write_region(tmp_path / 'r.-1.0.mca', [(31, 2)], region_x=-1)
+    (tmp_path / 'r.5.5.mca').write_bytes(b'')
+
+    async def main():
+        async with AsyncWorld(tmp_path) as world:
+            chunk = await world.chunk(-1, 2)
+            with pytest.raises(ChunkNotFound):
+                await world.chunk(500, 500)
+            return (chunk.x, chunk.z), sorted([(c.x, c.z) async for c in world.chunks()])
+
+    first, every = asyncio.run(main())
+    assert first == (-1, 2)
+    assert every == [(-1, 2), (0, 0)]
+
+def test_close_waits_for_reads(tmp_path, monkeypatch) -> None:
+    write_region(tmp_path / 'r.0.0.mca', [(x, 0) for x in range(16)])
+    running = []
+    finished = []
+
+    def slow_read(region, chunk_x, chunk_z):
+        running.append((chunk_x, chunk_z))
+        time.sleep(0.05)
+        # Still open, so the file descriptor can't belong to another file yet
+        assert region._fd is not None
+        chunk = read_chunk(region, chunk_x, chunk_z)
+        finished.append((chunk_x, chunk_z))
+        return chunk
+    read_chunk = aio._read_chunk
+    monkeypatch.setattr(aio, '_read_chunk', slow_read)
+
+    async def main():
+        region = await AsyncRegion.open(tmp_path / 'r.0.0.mca', concurrency=4)
+        chunks = region.chunks()
+        async for chunk in chunks:
+            break
+        await chunks.aclose()
+        await region.close()
+        assert region.region._fd is None
+        with pytest.raises(ValueError):
+            await region.chunk(0, 0)
+
+    asyncio.run(main())
+    assert len(running) > 1 and sorted(finished) == sorted(running)
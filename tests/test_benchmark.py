@@ -1,5 +1,6 @@
 import context as _
 from anvil import EmptyRegion, Block, RawSection
+from scripts.benchmark import run, compare, BENCHMARKS, UNSUPPORTED, ERAS
 import math
 import time
 import logging
@@ -18,23 +19,23 @@ def test_benchmark() -> None:
     scale = 0.05
     y_scale = 15
 
-    start = time.time()
+    start = time.perf_counter()
     for x in range(w):
         for z in range(w):
             u = x - w / 2
             v = z - w / 2
             y = int(func(u * scale, v * scale) * y_scale)
             region.set_block(block, x, y, z)
-    end = time.time()
+    end = time.perf_counter()
 
     LOGGER.info(f'Generating took: {end - start:.3f}s')
 
     times = []
     n = 3
     for _ in range(n):
-        start = time.time()
+        start = time.perf_counter()
         region.save()
-        end = time.time()
+        end = time.perf_counter()
         times.append(end - start)
 
     LOGGER.info(f'Saving (average of {n}) took: {sum(times) / len(times):.3f}s')
@@ -54,7 +55,7 @@ def test_raw_section() -> None:
     scale = 0.05
     y_scale = 15
 
-    start = time.time()
+    start = time.perf_counter()
 
     # from 0 to y_scale
     heights = array.array('B')
@@ -81,16 +82,16 @@ def test_raw_section() -> None:
                             blocks.append(0)
             region.add_section(RawSection(0, blocks, palette), chunk_x, chunk_z)
 
-    end = time.time()
+    end = time.perf_counter()
 
     LOGGER.info(f'Generating took: {end - start:.3f}s')
 
     times = []
     n = 3
     for _ in range(n):
-        start = time.time()
+        start = time.perf_counter()
         region.save()
-        end = time.time()
+        end = time.perf_counter()
         times.append(end - start)
 
     LOGGER.info(f'Saving (average of {n}) took: {sum(times) / len(times):.3f}s')
@@ -122,3 +123,26 @@ def test_raw_section_simple() -> None:
     region.add_section(section, 0, 0)
 
     region.save()
+
+def test_suite_runs_every_era() -> None:
+    results = run(chunks=2, repeat=1)
+    expected = {f'{era}.{name}' for era in ERAS for name in BENCHMARKS if (era, name) not in UNSUPPORTED}
+    assert set(results['results']) == expected
+    for name, result in results['results'].items():
+        assert result['rate'] > 0, name
+        LOGGER.info(f'{name}: {result["rate"]:.1f} {result["unit"]}')
+
+def test_compare_detects_regressions() -> None:
+    baseline = {'results': {
+        'modern.scan': {'seconds': 1.0, 'rate': 100.0, 'unit': 'chunks/s'},
+        'modern.save': {'seconds': 1.0, 'rate': 100.0, 'unit': 'chunks/s'},
+    }}
+    current = {'results': {
+        'modern.scan': {'seconds': 1.0, 'rate': 95.0, 'unit': 'chunks/s'},
+        'modern.save': {'seconds': 2.0, 'rate': 50.0, 'unit': 'chunks/s'},
+        'legacy.scan': {'seconds': 1.0, 'rate': 1.0, 'unit': 'chunks/s'},
+    }}
+    regressions = compare(current, baseline, threshold=0.1)
+    assert len(regressions) == 1
+    assert regressions[0].startswith('modern.save')
+    assert compare(current, baseline, threshold=0.6) == []
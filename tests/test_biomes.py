@@ -0,0 +1,109 @@
+import context as _
+from anvil import Chunk, Region
+from helpers import compress_nbt, make_region, make_modern_chunk, make_legacy_chunk, pack_padded
+from nbt import nbt
+import numpy as np
+
+def add_biomes(root: nbt.NBTFile, y: int, indexes: list[int], names: list[str]) -> nbt.NBTFile:
+    """Adds a 1.18+ biomes container to the section at Y, given as 64 palette indexes"""
+    section = next(section for section in root['sections'] if section['Y'].value == y)
+    container = nbt.TAG_Compound()
+    container.name = 'biomes'
+    palette = nbt.TAG_List(name='palette', type=nbt.TAG_String)
+    for name in names:
+        palette.tags.append(nbt.TAG_String(name))
+    container.tags.append(palette)
+    if len(names) > 1:
+        data = nbt.TAG_Long_Array(name='data')
+        data.value = pack_padded(indexes, (len(names) - 1).bit_length())
+        container.tags.append(data)
+    section.tags.append(container)
+    return root
+
+def make_biome_chunk(x: int = 0, z: int = 0) -> nbt.NBTFile:
+    stone = ([1] * 4096, ['minecraft:air', 'minecraft:stone'])
+    root = make_modern_chunk(x, z, {-1: stone, 0: stone, 3: stone})
+    cells = [0] * 64
+    # Cell at x=1, y=2, z=3
+    cells[(2 * 4 + 3) * 4 + 1] = 2
+    add_biomes(root, -1, [0] * 64, ['minecraft:deep_dark'])
+    add_biomes(root, 0, cells, ['minecraft:plains', 'minecraft:river', 'minecraft:forest'])
+    add_biomes(root, 3, [0] * 64, ['minecraft:plains'])
+    return root
+
+def test_modern_biomes() -> None:
+    chunk = Chunk(make_biome_chunk())
+    indexes, palette = chunk.get_biomes(0)
+    assert indexes.shape == (4, 4, 4)
+    assert palette[indexes[2, 3, 1]] == 'minecraft:forest'
+    assert (indexes == 0).sum() == 63
+
+    indexes, palette = chunk.get_biomes(-1)
+    assert palette == ('minecraft:deep_dark',) and not indexes.any()
+
+def test_modern_biome_array() -> None:
+    biomes, palette = Chunk(make_biome_chunk()).biome_array()
+    assert palette[0] is None
+    assert biomes.shape == (20, 4, 4)
+    assert set(palette[i] for i in biomes[:4].reshape(-1)) == {'minecraft:deep_dark'}
+    assert palette[biomes[6, 3, 1]] == 'minecraft:forest'
+    # Sections 1 and 2 are missing
+    assert (biomes[8:16] == 0).all()
+    assert palette[biomes[19, 0, 0]] == 'minecraft:plains'
+
+def test_legacy_column_biomes() -> None:
+    root = make_legacy_chunk(0, 0, {0: [(1, 0)] * 4096})
+    tag = nbt.TAG_Byte_Array(name='Biomes')
+    tag.value = bytearray([1] * 255 + [6])
+    root['Level'].tags.append(tag)
+    chunk = Chunk(root)
+
+    indexes, palette = chunk.get_biomes(0)
+    assert indexes.shape == (1, 16, 16)
+    assert palette == (1, 6)
+    assert indexes[0, 15, 15] == 1
+    assert chunk.get_biomes(5, force_new=True)[1] == ('minecraft:plains', 'minecraft:swamp')
+
+    biomes, palette = chunk.biome_array(force_new=True)
+    assert palette == (None, 'minecraft:plains', 'minecraft:swamp')
+    assert biomes.shape == (1, 16, 16)
+
+def test_cell_biomes_before_sections() -> None:
+    # 1.16 chunks store 4x4x4 cells for the whole chunk in Level.Biomes
+    root = nbt.NBTFile()
+    root.tags.append(nbt.TAG_Int(name='DataVersion', value=2586))
+    level = nbt.TAG_Compound()
+    level.name = 'Level'
+    level.tags.append(nbt.TAG_Int(name='xPos', value=0))
+    level.tags.append(nbt.TAG_Int(name='zPos', value=0))
+    sections = nbt.TAG_List(name='Sections', type=nbt.TAG_Compound)
+    section = nbt.TAG_Compound()
+    section.tags.append(nbt.TAG_Byte(name='Y', value=0))
+    sections.tags.append(section)
+    level.tags.append(sections)
+    tag = nbt.TAG_Int_Array(name='Biomes')
+    tag.value = [24] * 512 + [0] * 512
+    level.tags.append(tag)
+    root.tags.append(level)
+    chunk = Chunk(root)
+
+    indexes, palette = chunk.get_biomes(8)
+    assert palette == (0,) and indexes.shape == (4, 4, 4)
+    assert chunk.get_biomes(16) is None
+    biomes, palette = chunk.biome_array(force_new=True)
+    assert biomes.shape == (64, 4, 4)
+    assert palette[biomes[0, 0, 0]] == 'minecraft:deep_ocean'
+    assert palette[biomes[63, 0, 0]] == 'minecraft:ocean'
+
+def test_region_biome_map() -> None:
+    region = Region(make_region({(0, 0): compress_nbt(make_biome_chunk()), (2, 1): compress_nbt(make_biome_chunk(2, 1))}))
+    biomes, palette = region.biome_map(y=9)
+    assert biomes.shape == (512, 512)
+    assert palette[0] is None
+    # Cell x=1, z=3 covers blocks 4-7 and 12-15
+    assert {palette[i] for i in np.unique(biomes[12:16, 4:8])} == {'minecraft:forest'}
+    assert palette[biomes[16 + 12, 32 + 4]] == 'minecraft:forest'
+    assert palette[biomes[0, 0]] == 'minecraft:plains'
+    # Chunks that aren't generated
+    assert biomes[100, 100] == 0
+    assert (np.array(palette, dtype=object)[biomes[:16, :16]] == 'minecraft:plains').sum() == 256 - 16
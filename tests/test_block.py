@@ -1,6 +1,8 @@
 import context as _
 from anvil import Block, OldBlock
+from anvil.block import legacy_block_table
 from nbt import nbt
+import pytest
 
 # TODO: Implement tests for anvil/block.py
 #
@@ -13,3 +15,16 @@ from nbt import nbt
 # TestOldBlock class:
 #   - A test to verify that OldBlock.convert() correctly converts an OldBlock to a Block.
 #   - A test for the __eq__ and __hash__ methods.
+
+def test_legacy_block_table() -> None:
+    table = legacy_block_table()
+    assert len(table) == 65536
+    assert table[1 << 4 | 1] == Block('granite')
+    assert table[4000 << 4] is None
+    assert legacy_block_table() is table
+
+def test_old_block_convert() -> None:
+    assert OldBlock(35, 14).convert() == Block('red_wool')
+    assert Block.from_numeric_id(17, 0) == Block('oak_log', properties={'axis': 'y'})
+    with pytest.raises(KeyError):
+        Block.from_numeric_id(4000)
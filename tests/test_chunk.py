@@ -1,6 +1,8 @@
 import context as _
-from anvil import Chunk, Region
+from anvil import Chunk, Region, EmptyRegion, Block, OldBlock
 from anvil.errors import GZipChunkData, CorruptedData
+from helpers import make_modern_chunk, make_legacy_chunk
+import pytest
 
 # TODO: Implement tests for anvil/chunk.py
 #
@@ -11,3 +13,146 @@ from anvil.errors import GZipChunkData, CorruptedData
 #   - A test that attempts to read a chunk from a region that uses GZip compression to ensure the GZipChunkData exception is raised.
 #   - A test that attempts to read a corrupted chunk to ensure the CorruptedData exception is raised.
 #   - Tests for the version-specific logic. This is the most critical and complex part. You would need to create or find region files from different Minecraft versions (especially around the "Flattening" and the 20w17a snapshot) and write tests to ensure that get_block and other methods correctly parse the data.
+
+def test_to_array_fills_missing_sections() -> None:
+    region = EmptyRegion(0, 0)
+    region.set_block(Block('stone'), 1, 2, 3)
+    region.set_block(Block('dirt'), 4, 40, 5)
+    chunk = Region(region.save()).get_chunk(0, 0)
+
+    blocks, palette = chunk.to_array()
+    assert blocks.shape == (48, 16, 16)
+    assert palette[0] == Block('air')
+    assert palette[blocks[2, 3, 1]] == Block('stone')
+    assert palette[blocks[40, 5, 4]] == Block('dirt')
+    assert (blocks != 0).sum() == 2
+    assert chunk.section_range() == (0, 2)
+
+def test_stream_chunk_matches_to_array() -> None:
+    region = EmptyRegion(0, 0)
+    region.set_block(Block('stone'), 0, 0, 0)
+    region.set_block(Block('dirt'), 15, 35, 15)
+    chunk = Region(region.save()).get_chunk(0, 0)
+
+    blocks = list(chunk.stream_chunk())
+    assert len(blocks) == 3 * 4096
+    assert blocks[0] == Block('stone')
+    assert blocks[35 * 256 + 15 * 16 + 15] == Block('dirt')
+    assert list(chunk.stream_chunk(index=35 * 256 + 15 * 16 + 15))[0] == Block('dirt')
+
+def test_to_array_modern_chunk() -> None:
+    indexes = [0] * 4096
+    indexes[7] = 1
+    chunk = Chunk(make_modern_chunk(2, 3, {
+        -4: ([0] * 4096, ['minecraft:deepslate']),
+        -3: (indexes, ['minecraft:air', 'minecraft:diamond_ore']),
+    }))
+    assert (chunk.x, chunk.z) == (2, 3)
+
+    blocks, palette = chunk.to_array()
+    assert blocks.shape == (32, 16, 16)
+    assert {palette[i].id for i in blocks[:16].reshape(-1).tolist()} == {'deepslate'}
+    assert palette[blocks[16, 0, 7]] == Block('diamond_ore')
+
+    blocks, palette = chunk.to_array(lowest=-5, highest=-3)
+    assert blocks.shape == (48, 16, 16)
+    assert not blocks[:16].any()
+
+def test_stream_blocks_modern_chunk() -> None:
+    indexes = [0] * 4096
+    indexes[7] = 1
+    chunk = Chunk(make_modern_chunk(0, 0, {
+        0: (indexes, ['minecraft:air', 'minecraft:diamond_ore']),
+        1: ([0] * 4096, ['minecraft:deepslate']),
+    }, y_pos=0))
+    blocks = list(chunk.stream_blocks(section=0))
+    assert len(blocks) == 4096
+    assert blocks[7] == Block('diamond_ore')
+    assert blocks[8] == Block('air')
+    assert list(chunk.stream_blocks(index=7, section=0))[0] == Block('diamond_ore')
+    # Single block sections don't store any states
+    assert set(chunk.stream_blocks(section=1)) == {Block('deepslate')}
+
+def test_count_blocks() -> None:
+    region = EmptyRegion(0, 0)
+    region.fill(Block('stone'), 0, 0, 0, 15, 1, 15)
+    region.set_block(Block('diamond_ore'), 3, 20, 4)
+    chunk = Region(region.save()).get_chunk(0, 0)
+
+    counts = chunk.count_blocks()
+    assert counts[Block('stone')] == 512
+    assert counts[Block('diamond_ore')] == 1
+    assert counts[Block('air')] == 2 * 4096 - 513
+
+def test_count_blocks_with_properties() -> None:
+    log = Block('minecraft', 'oak_log', {'axis': 'x'})
+    region = EmptyRegion(0, 0)
+    region.fill(log, 0, 0, 0, 1, 0, 0)
+    saved = Region(region.save())
+    assert saved.get_chunk(0, 0).count_blocks()[log] == 2
+    assert saved.count_blocks()[log] == 2
+
+def test_find_blocks() -> None:
+    region = EmptyRegion(0, 0)
+    region.set_block(Block('diamond_ore'), 3, 20, 4)
+    region.set_block(Block('iron_ore'), 15, 0, 0)
+    region.set_block(Block('stone'), 1, 1, 1)
+    chunk = Region(region.save()).get_chunk(0, 0)
+
+    seen = []
+    def is_ore(name: str) -> bool:
+        seen.append(name)
+        return name.endswith('_ore')
+
+    coords = chunk.find_blocks(is_ore)
+    assert sorted(map(tuple, coords.tolist())) == [(3, 20, 4), (15, 0, 0)]
+    assert len(seen) == len(set(seen))
+    assert len(chunk.find_blocks(lambda name: name == 'minecraft:gold_ore')) == 0
+
+def legacy_sample() -> Chunk:
+    blocks = [(0, 0)] * 4096
+    blocks[0] = (1, 0) # stone
+    blocks[1] = (1, 1) # granite
+    blocks[17] = (35, 14) # red wool
+    blocks[4095] = (7, 0) # bedrock
+    return Chunk(make_legacy_chunk(0, 0, {0: blocks, 2: [(3, 0)] * 4096}))
+
+def test_legacy_stream_blocks() -> None:
+    chunk = legacy_sample()
+    blocks = list(chunk.stream_blocks(section=0))
+    assert blocks[:2] == [OldBlock(1, 0), OldBlock(1, 1)]
+    assert blocks[17] == OldBlock(35, 14)
+
+    blocks = list(chunk.stream_blocks(index=17, section=0, force_new=True))
+    assert blocks[0] == Block('red_wool')
+    assert blocks[-1] == Block('bedrock')
+    assert len(blocks) == 4096 - 17
+
+def test_legacy_section_values_with_add() -> None:
+    blocks = [(0, 0)] * 4096
+    blocks[3] = (300, 5)
+    chunk = Chunk(make_legacy_chunk(0, 0, {0: blocks}))
+    values = Chunk.legacy_section_values(chunk.get_section(0))
+    assert values[3] == 300 << 4 | 5
+    assert list(chunk.stream_blocks(section=0))[3] == OldBlock(300, 5)
+
+def test_legacy_to_array() -> None:
+    chunk = legacy_sample()
+    blocks, palette = chunk.to_array(force_new=True)
+    assert blocks.shape == (48, 16, 16)
+    assert palette[blocks[0, 0, 1]] == Block('granite')
+    assert palette[blocks[15, 15, 15]] == Block('bedrock')
+    assert not blocks[16:32].any()
+    assert {palette[i] for i in blocks[32:].reshape(-1).tolist()} == {Block('dirt')}
+
+    blocks, palette = chunk.to_array()
+    assert palette[0] == OldBlock(0)
+    assert palette[blocks[0, 1, 1]] == OldBlock(35, 14)
+    assert chunk.count_blocks(force_new=True)[Block('dirt')] == 4096
+
+def test_legacy_unknown_block() -> None:
+    blocks = [(0, 0)] * 4096
+    blocks[0] = (4000, 0)
+    chunk = Chunk(make_legacy_chunk(0, 0, {0: blocks}))
+    with pytest.raises(KeyError):
+        chunk.to_array(force_new=True)
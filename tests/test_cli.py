@@ -0,0 +1,71 @@
+import context as _
+import json
+from anvil.cli import main
+from helpers import compress_nbt, make_region, make_modern_chunk
+from nbt import nbt
+import pytest
+
+@pytest.fixture
+def world(tmp_path):
+    indexes = [0] * 4096
+    indexes[5] = 1
+    chunk = make_modern_chunk(1, 0, {0: (indexes, ['minecraft:stone', 'minecraft:chest'])}, y_pos=0)
+    entity = nbt.TAG_Compound()
+    entity.tags.append(nbt.TAG_String(name='id', value='minecraft:chest'))
+    for axis, value in zip('xyz', (21, 0, 0)):
+        entity.tags.append(nbt.TAG_Int(name=axis, value=value))
+    chunk['block_entities'].tags.append(entity)
+
+    (tmp_path / 'r.0.0.mca').write_bytes(make_region({
+        (0, 0): compress_nbt(make_modern_chunk(0, 0, {0: ([0] * 4096, ['minecraft:stone'])}, y_pos=0)),
+        (1, 0): compress_nbt(chunk),
+    }))
+    (tmp_path / 'r.1.0.mca').write_bytes(b'')
+    return tmp_path
+
+def run(capsys, *argv) -> tuple[int, list[dict]]:
+    code = main(list(argv) + ['--quiet'])
+    lines = capsys.readouterr().out.splitlines()
+    return code, [json.loads(line) for line in lines]
+
+def test_info(world, capsys) -> None:
+    code, results = run(capsys, 'info', str(world))
+    assert code == 0
+    info, empty = sorted(results, key=lambda r: r['file'])
+    assert info['chunks'] == 2
+    assert info['used_sectors'] == 2
+    assert info['gaps'] == 0
+    assert empty['empty']
+
+def test_count_in_parallel(world, capsys) -> None:
+    code, results = run(capsys, 'count', str(world / 'r.0.0.mca'), '--jobs', '2')
+    assert code == 0
+    assert results[-1] == {'total': {'minecraft:stone': 8191, 'minecraft:chest': 1}}
+
+def test_find(world, capsys) -> None:
+    code, results = run(capsys, 'find', str(world / 'r.0.0.mca'), '-b', 'chest', '-e', 'chest')
+    assert code == 0
+    found = results[0]['found']
+    assert {'type': 'block', 'x': 21, 'y': 0, 'z': 0} in found
+    assert {'type': 'block_entity', 'id': 'minecraft:chest', 'x': 21, 'y': 0, 'z': 0} in found
+
+def test_render(world, tmp_path, capsys) -> None:
+    code, results = run(capsys, 'render', str(world / 'r.0.0.mca'), '-o', str(tmp_path / 'images'))
+    assert code == 0
+    assert (tmp_path / 'images' / 'r.0.0.png').read_bytes().startswith(b'\x89PNG')
+
+def test_verify_reports_bad_chunks(world, capsys) -> None:
+    data = bytearray((world / 'r.0.0.mca').read_bytes())
+    # Break the compressed data of the first chunk
+    data[8192 + 10 : 8192 + 20] = bytes(10)
+    (world / 'r.0.0.mca').write_bytes(bytes(data))
+    code, results = run(capsys, 'verify', str(world / 'r.0.0.mca'))
+    assert code == 1
+    assert results[0]['ok'] is False
+    assert results[0]['issues'][0]['chunk'] == [0, 0]
+
+    code, results = run(capsys, 'verify', str(world / 'r.0.0.mca'), '--salvage', str(world / 'clean'))
+    assert results[0]['valid'] == 1
+    code, results = run(capsys, 'verify', str(world / 'clean' / 'r.0.0.mca'))
+    assert code == 0
+    assert results[0]['chunks'] == 1
@@ -1,8 +1,129 @@
 import context as _
-from anvil import EmptyChunk, EmptySection, Block
+from anvil import EmptyChunk, EmptySection, Block, Region
+from anvil.errors import OutOfBoundsCoordinates
+from anvil.utils import unpack_states, unpack_nibbles
+import numpy as np
+import pytest
 
 # TODO: Implement tests for anvil/empty_chunk.py
 #
 # TestEmptyChunk class:
 #   - A test for add_section() to ensure it correctly adds a section and handles the `replace` parameter.
 #   - A test for set_block() and get_block() to verify that blocks are correctly set and retrieved.
+
+def test_fill_across_sections() -> None:
+    chunk = EmptyChunk(0, 0)
+    stone = Block('stone')
+    chunk.fill(stone, 2, 10, 3, 4, 20, 5)
+    assert chunk.get_block(2, 10, 3) == stone
+    assert chunk.get_block(4, 20, 5) == stone
+    assert chunk.get_block(4, 21, 5) in (None, Block('air'))
+    assert chunk.get_block(1, 15, 3) == Block('air')
+
+    blocks, palette = chunk.to_array()
+    assert blocks.shape == (32, 16, 16)
+    assert (blocks != 0).sum() == 3 * 11 * 3
+
+def test_fill_array() -> None:
+    chunk = EmptyChunk(0, 0)
+    palette = (Block('air'), Block('stone'), Block('dirt'))
+    indexes = np.zeros((20, 2, 3), dtype=np.uint16)
+    indexes[:, 0, :] = 1
+    indexes[-1, 1, 2] = 2
+    chunk.fill_array((13, 0, 14), indexes, palette)
+    assert chunk.get_block(13, 0, 14) == Block('stone')
+    assert chunk.get_block(15, 19, 15) == Block('dirt')
+    assert chunk.sections[1].palette() == (Block('air'), Block('stone'), Block('dirt'))
+
+def test_fill_out_of_bounds() -> None:
+    chunk = EmptyChunk(0, 0)
+    with pytest.raises(OutOfBoundsCoordinates):
+        chunk.fill(Block('stone'), 0, 0, 0, 16, 0, 0)
+    with pytest.raises(OutOfBoundsCoordinates):
+        chunk.fill_array((10, 0, 0), np.zeros((1, 1, 7), dtype=np.uint16), (Block('air'),))
+
+def heightmap(root, name: str, stretches: bool) -> np.ndarray:
+    tag = root['Heightmaps'][name] if 'Heightmaps' in root else root['Level']['Heightmaps'][name]
+    return unpack_states(tag.value, 9, count=256, stretches=stretches).reshape(16, 16)
+
+def make_terrain() -> EmptyChunk:
+    chunk = EmptyChunk(0, 0)
+    chunk.fill(Block('stone'), 0, 0, 0, 15, 10, 15)
+    chunk.fill(Block('water'), 0, 11, 0, 3, 12, 3)
+    chunk.set_block(Block('oak_leaves'), 5, 20, 6)
+    chunk.set_block(Block('oak_sapling'), 7, 11, 7)
+    return chunk
+
+def test_save_heightmaps() -> None:
+    chunk = make_terrain()
+    root = chunk.save(compute_heightmaps=True)
+    surface = heightmap(root, 'WORLD_SURFACE', stretches=True)
+    assert surface[0, 0] == 13
+    assert surface[6, 5] == 21
+    assert surface[7, 7] == 12
+    assert surface[15, 15] == 11
+    assert heightmap(root, 'MOTION_BLOCKING', stretches=True)[6, 5] == 21
+    assert heightmap(root, 'MOTION_BLOCKING_NO_LEAVES', stretches=True)[6, 5] == 11
+    assert heightmap(root, 'OCEAN_FLOOR', stretches=True)[0, 0] == 11
+    assert heightmap(root, 'MOTION_BLOCKING', stretches=True)[7, 7] == 11
+
+    # Padded longs, counted from the bottom of the world at -64
+    chunk.version = 2975
+    root = chunk.save(compute_heightmaps=True)
+    assert len(root['Heightmaps']['WORLD_SURFACE']) == 37
+    assert heightmap(root, 'WORLD_SURFACE', stretches=False)[15, 15] == 64 + 11
+
+def test_save_skylight() -> None:
+    chunk = make_terrain()
+    # Roof over the corner
+    chunk.fill(Block('stone'), 8, 30, 8, 15, 30, 15)
+    root = chunk.save(compute_skylight=True)
+    light = np.concatenate([
+        unpack_nibbles(section['SkyLight'].value).reshape(16, 16, 16) for section in root['Level']['Sections']
+    ])
+    assert light.shape == (32, 16, 16)
+    assert light[25, 0, 0] == 15
+    assert light[5, 0, 0] == 0
+    # Water and leaves dim light by a level each
+    assert light[12, 0, 0] == 14 and light[11, 0, 0] == 13
+    assert light[19, 6, 5] == 14
+    # Under the roof, lit from the side
+    assert light[29, 8, 8] == 14
+    assert light[29, 15, 15] == 7
+    assert 'Heightmaps' not in root['Level']
+
+def saved_skylight(chunk: EmptyChunk) -> np.ndarray:
+    root = chunk.save(compute_skylight=True)
+    return np.concatenate([
+        unpack_nibbles(section['SkyLight'].value).reshape(16, 16, 16) for section in root['Level']['Sections']
+    ])
+
+def test_save_skylight_under_cover() -> None:
+    # Whole chunk covered, so no light comes from the side
+    chunk = EmptyChunk(0, 0)
+    chunk.fill(Block('stone'), 0, 0, 0, 15, 10, 15)
+    chunk.fill(Block('oak_leaves'), 0, 20, 0, 15, 20, 15)
+    light = saved_skylight(chunk)
+    assert (light[21:] == 15).all()
+    assert (light[20] == 14).all()
+    # Once dimmed, light loses a level per block going down
+    assert (light[19] == 13).all()
+    assert (light[11] == 5).all()
+    assert not light[10].any()
+
+    chunk = EmptyChunk(0, 0)
+    chunk.fill(Block('stone'), 0, 0, 0, 15, 10, 15)
+    chunk.fill(Block('water'), 0, 20, 0, 15, 27, 15)
+    light = saved_skylight(chunk)
+    assert (light[27] == 14).all()
+    assert (light[20] == 7).all()
+    assert (light[19] == 6).all()
+
+def test_save_world_bottom_y_pos() -> None:
+    chunk = EmptyChunk(0, 0)
+    chunk.version = 3465
+    chunk.set_block(Block('stone'), 0, 10, 0)
+    root = chunk.save()
+    assert root['yPos'].value == -4
+    assert [section['Y'].value for section in root['sections']] == [0]
+    assert Region.parse_chunk_bytes(chunk.encode())['yPos'].value == -4
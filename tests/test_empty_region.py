@@ -0,0 +1,38 @@
+import context as _
+from anvil import EmptyRegion, Region, Block
+from anvil.errors import OutOfBoundsCoordinates
+import numpy as np
+import pytest
+
+def test_fill_matches_set_block() -> None:
+    stone = Block('stone')
+    filled = EmptyRegion(0, 0)
+    filled.fill(stone, 30, 2, 7, 14, 18, 40)
+
+    expected = EmptyRegion(0, 0)
+    for y in range(2, 19):
+        for z in range(7, 41):
+            for x in range(14, 31):
+                expected.set_block(stone, x, y, z)
+
+    assert np.array_equal(filled.to_array()[0], expected.to_array()[0])
+
+def test_fill_ignore_outside() -> None:
+    region = EmptyRegion(0, 0)
+    with pytest.raises(OutOfBoundsCoordinates):
+        region.fill(Block('stone'), -5, 0, 0, 5, 0, 5)
+    region.fill(Block('stone'), -5, 0, 0, 5, 0, 5, ignore_outside=True)
+    assert (region.to_array()[0] != 0).sum() == 6 * 6
+
+def test_paste_region() -> None:
+    source = EmptyRegion(0, 0)
+    source.set_block(Block('stone'), 0, 0, 0)
+    source.set_block(Block('dirt'), 20, 5, 1)
+
+    target = EmptyRegion(0, 0)
+    target.paste(Region(source.save()), (100, 32, 200), ignore_outside=True)
+    assert target.get_chunk(6, 12).get_block(4, 32, 8) == Block('stone')
+    assert target.get_chunk(7, 12).get_block(8, 37, 9) == Block('dirt')
+
+    saved = Region(target.save())
+    assert saved.count_blocks()[Block('dirt')] == 1
@@ -6,3 +6,35 @@ from anvil import EmptySection, Block
 # TestEmptySection class:
 #   - A test for set_block() and get_block() to verify that blocks are correctly set and retrieved within a section.
 #   - A test for the palette() and blockstates() methods to ensure they generate the correct data structures.
+
+def test_set_and_get_block() -> None:
+    section = EmptySection(0)
+    stone = Block('stone')
+    section.set_block(stone, 1, 2, 3)
+    assert section.get_block(1, 2, 3) == stone
+    assert section.get_block(0, 0, 0) == Block('air')
+    assert section.blocks[2 * 256 + 3 * 16 + 1] == section.palette().index(stone)
+
+def test_palette_is_incremental() -> None:
+    section = EmptySection(0)
+    stone, dirt = Block('stone'), Block('dirt')
+    assert section.palette() == (Block('air'),)
+    section.set_block(stone, 0, 0, 0)
+    section.set_block(dirt, 1, 0, 0)
+    section.set_block(Block('stone'), 2, 0, 0)
+    assert section.palette() == (Block('air'), stone, dirt)
+
+    # Overwritten blocks are dropped from the palette
+    section.set_block(Block('air'), 1, 0, 0)
+    assert section.palette() == (Block('air'), stone)
+    assert section.get_block(2, 0, 0) == stone
+
+def test_blockstates_with_given_palette() -> None:
+    section = EmptySection(0)
+    stone, dirt = Block('stone'), Block('dirt')
+    section.set_block(stone, 0, 0, 0)
+    section.set_block(dirt, 1, 0, 0)
+    states = section.blockstates(palette=(dirt, Block('air'), stone))
+    # 4 bits per block, first long holds the first 16 blocks
+    assert int(states[0]) == sum(index << (4 * i) for i, index in enumerate([2, 0] + [1] * 14))
+    assert len(states) == 256
@@ -0,0 +1,78 @@
+import context as _
+from anvil import EntityRegion, EntityChunk
+from helpers import compress_nbt, make_region
+from nbt import nbt
+import pytest
+
+def make_entity(entity_id: str, x: float, y: float, z: float) -> nbt.TAG_Compound:
+    entity = nbt.TAG_Compound()
+    entity.tags.append(nbt.TAG_String(name='id', value=entity_id))
+    pos = nbt.TAG_List(name='Pos', type=nbt.TAG_Double)
+    pos.tags.extend(nbt.TAG_Double(value=v) for v in (x, y, z))
+    entity.tags.append(pos)
+    return entity
+
+def make_entity_chunk(chunk_x: int, chunk_z: int, entities: list[tuple[str, float, float, float]]) -> bytes:
+    root = nbt.NBTFile()
+    root.tags.append(nbt.TAG_Int(name='DataVersion', value=2975))
+    position = nbt.TAG_Int_Array(name='Position')
+    position.value = [chunk_x, chunk_z]
+    root.tags.append(position)
+    tag = nbt.TAG_List(name='Entities', type=nbt.TAG_Compound)
+    tag.tags.extend(make_entity(*entity) for entity in entities)
+    root.tags.append(tag)
+    return compress_nbt(root)
+
+def sample_region() -> EntityRegion:
+    return EntityRegion(make_region({
+        (0, 0): make_entity_chunk(0, 0, [('minecraft:zombie', 1.5, 64, 1.5), ('minecraft:cow', 4, 70, 4)]),
+        (1, 0): make_entity_chunk(1, 0, [('minecraft:zombie', 20, 10, 3)]),
+        (0, 2): make_entity_chunk(0, 2, [('minecraft:sheep', 5, 64, 40)]),
+    }), 0, 0)
+
+def test_entity_chunk() -> None:
+    region = sample_region()
+    chunk = region.get_entity_chunk(0, 0)
+    assert isinstance(chunk, EntityChunk)
+    assert (chunk.x, chunk.z) == (0, 0)
+    assert [e['id'].value for e in chunk.entities] == ['minecraft:zombie', 'minecraft:cow']
+    assert [e['id'].value for e in chunk.filter(ids='cow')] == ['minecraft:cow']
+
+def test_generated_chunks() -> None:
+    assert sorted(sample_region().generated_chunks()) == [(0, 0), (0, 2), (1, 0)]
+
+def test_count_entities() -> None:
+    region = sample_region()
+    assert region.count_entities() == {'minecraft:zombie': 2, 'minecraft:cow': 1, 'minecraft:sheep': 1}
+    assert region.count_entities(ids={'zombie'}) == {'minecraft:zombie': 2}
+    assert region.count_entities(ids='minecraft:pig') == {}
+
+def test_iter_entities_bbox() -> None:
+    region = sample_region()
+    entities = list(region.iter_entities(bbox=((0, 0, 0), (15, 100, 15))))
+    assert sorted(e['id'].value for e in entities) == ['minecraft:cow', 'minecraft:zombie']
+
+    entities = list(region.iter_entities(ids='zombie', bbox=((16, 0, 0), (31, 100, 15))))
+    assert [tuple(p.value for p in e['Pos']) for e in entities] == [(20, 10, 3)]
+
+def test_from_file_reads_position(tmp_path) -> None:
+    path = tmp_path / 'r.-1.2.mca'
+    path.write_bytes(make_region({(0, 0): make_entity_chunk(-32, 64, [])}))
+    region = EntityRegion.from_file(path)
+    assert (region.x, region.z) == (-1, 2)
+
+def test_errors_policy(tmp_path) -> None:
+    path = tmp_path / 'r.0.0.mca'
+    path.write_bytes(make_region({
+        (0, 0): make_entity_chunk(0, 0, [('minecraft:zombie', 1.5, 64, 1.5)]),
+        (1, 0): b'not zlib data at all',
+    }))
+    region = EntityRegion.from_file(path, errors='collect', include_raw=True)
+    assert region.count_entities() == {'minecraft:zombie': 1}
+    assert region.corrupted[0].chunk == (1, 0) and region.corrupted[0].data is not None
+
+    with EntityRegion.open(path, errors='skip') as region:
+        assert (region.x, region.z) == (0, 0)
+        assert region.count_entities() == {'minecraft:zombie': 1}
+    with pytest.raises(ValueError):
+        EntityRegion.open(path, errors='ignore')
@@ -0,0 +1,48 @@
+import context as _
+from anvil import Region, EmptyRegion, Block
+from anvil.export import region_to_npz, world_to_npz, load_npz, block_state
+import numpy as np
+
+def make_region_file(path, region_x: int = 0) -> Region:
+    region = EmptyRegion(region_x, 0)
+    region.set_block(Block('stone'), region_x * 512 + 1, 2, 3)
+    region.set_block(Block('minecraft', 'oak_log', {'axis': 'x'}), region_x * 512 + 20, 40, 5)
+    region.save(str(path))
+    return Region.from_file(path)
+
+def test_region_to_npz(tmp_path) -> None:
+    region = make_region_file(tmp_path / 'r.0.0.mca')
+    region_to_npz(region, tmp_path / 'out.npz')
+
+    arrays = load_npz(tmp_path / 'out.npz')
+    assert isinstance(arrays['blocks'], np.memmap)
+    assert arrays['blocks'].shape == (2, 16, 16, 16)
+    palette = list(arrays['palette'])
+    assert palette[arrays['blocks'][0, 2, 3, 1]] == 'minecraft:stone'
+    assert palette[arrays['blocks'][1, 8, 5, 4]] == 'minecraft:oak_log[axis=x]'
+    assert arrays['section_y'].tolist() == [0, 2]
+    assert arrays['x'][arrays['section_chunk']].tolist() == [0, 1]
+    assert arrays['x'].tolist() == [0, 1] and arrays['z'].tolist() == [0, 0]
+    assert arrays['version'].tolist() == [1976, 1976]
+    assert arrays['inhabited_time'].tolist() == [0, 0]
+
+    loaded = np.load(tmp_path / 'out.npz')
+    for name, array in arrays.items():
+        assert np.array_equal(loaded[name], array)
+
+def test_world_to_npz(tmp_path) -> None:
+    world = tmp_path / 'region'
+    world.mkdir()
+    make_region_file(world / 'r.0.0.mca')
+    make_region_file(world / 'r.1.0.mca', region_x=1)
+    (world / 'r.5.5.mca').write_bytes(b'')
+
+    written = world_to_npz(world, tmp_path / 'out', jobs=2)
+    assert [path.name for path in written] == ['r.0.0.npz', 'r.1.0.npz']
+    arrays = load_npz(written[1])
+    assert arrays['x'].tolist() == [32, 33]
+
+def test_block_state() -> None:
+    block = Block('minecraft', 'oak_stairs', {'half': 'top', 'facing': 'east'})
+    assert block_state(block) == 'minecraft:oak_stairs[facing=east,half=top]'
+    assert block_state(Block('air')) == 'minecraft:air'
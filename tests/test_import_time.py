@@ -0,0 +1,42 @@
+import context as _
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Generous limit, importing the package itself should take a few milliseconds.
+# Guards against eagerly importing submodules or dependencies again
+MAX_IMPORT_SECONDS = 0.1
+
+def run(code: str) -> dict:
+    """Runs code in a fresh interpreter, which must print a JSON object"""
+    script = f'import sys, time, json\nsys.path.insert(0, {ROOT!r})\n{code}'
+    output = subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+def test_import_is_lazy() -> None:
+    result = run(
+        'import anvil\n'
+        'print(json.dumps({m: m in sys.modules for m in ("nbt", "numpy", "frozendict", "anvil.chunk", "anvil.legacy")}))'
+    )
+    assert not any(result.values()), result
+
+def test_legacy_map_loads_on_first_use() -> None:
+    result = run(
+        'import anvil\n'
+        'anvil.Block("stone")\n'
+        'before = "LEGACY_ID_MAP" in vars(sys.modules["anvil.legacy"]) or "numpy" in sys.modules\n'
+        'block = anvil.OldBlock(1, 1).convert()\n'
+        'print(json.dumps({"before": before, "block": block.id}))'
+    )
+    assert result == {'before': False, 'block': 'granite'}
+
+def test_import_time() -> None:
+    result = run(
+        'start = time.perf_counter()\n'
+        'import anvil\n'
+        'print(json.dumps({"seconds": time.perf_counter() - start}))'
+    )
+    assert result['seconds'] < MAX_IMPORT_SECONDS, result
@@ -0,0 +1,75 @@
+import context as _
+from anvil import Chunk, Region
+from anvil.light import is_solid
+from helpers import compress_nbt, make_region, make_modern_chunk
+from nbt import nbt
+import numpy as np
+
+def add_light(section: nbt.TAG_Compound, name: str, values: np.ndarray):
+    """Adds a light nibble array to a section, from 4096 values in YZX order"""
+    values = values.reshape(-1).astype(np.uint8)
+    tag = nbt.TAG_Byte_Array(name=name)
+    tag.value = bytearray((values[0::2] | values[1::2] << 4).tobytes())
+    section.tags.append(tag)
+
+def make_cave_chunk(x: int = 0, z: int = 0) -> nbt.NBTFile:
+    """Stone in section 0 with a single air block at (3, 5, 7), lit by a torch in its corner"""
+    indexes = np.ones(4096, dtype=np.int64)
+    indexes[5 * 256 + 7 * 16 + 3] = 0
+    indexes[6 * 256 + 7 * 16 + 3] = 0
+    indexes[5 * 256 + 0 * 16 + 0] = 0
+    root = make_modern_chunk(x, z, {0: (indexes.tolist(), ['minecraft:air', 'minecraft:stone'])})
+    section = root['sections'][0]
+    block_light = np.zeros((16, 16, 16), dtype=np.uint8)
+    block_light[5, 0, 0] = 14
+    add_light(section, 'BlockLight', block_light)
+    add_light(section, 'SkyLight', np.zeros((16, 16, 16), dtype=np.uint8))
+    return root
+
+def test_get_light() -> None:
+    chunk = Chunk(make_cave_chunk())
+    block_light, sky_light = chunk.get_light(0)
+    assert block_light.shape == sky_light.shape == (16, 16, 16)
+    assert block_light.dtype == np.uint8
+    assert block_light[5, 0, 0] == 14 and block_light.sum() == 14
+    assert not sky_light.any()
+
+    block_light, sky_light = chunk.get_light(None)
+    assert not block_light.any() and (sky_light == 15).all()
+    assert (chunk.get_light(None, sky_default=0)[1] == 0).all()
+
+def test_light_array() -> None:
+    root = make_cave_chunk()
+    # Light only section above the blocks
+    section = nbt.TAG_Compound()
+    section.tags.append(nbt.TAG_Byte(name='Y', value=2))
+    add_light(section, 'SkyLight', np.full((16, 16, 16), 9, dtype=np.uint8))
+    root['sections'].tags.append(section)
+
+    block_light, sky_light = Chunk(root).light_array()
+    assert block_light.shape == (48, 16, 16)
+    assert block_light[5, 0, 0] == 14
+    assert not sky_light[:16].any()
+    # Section 1 is missing
+    assert (sky_light[16:32] == 15).all()
+    assert (sky_light[32:] == 9).all()
+
+def test_find_dark_spaces() -> None:
+    chunk = Chunk(make_cave_chunk())
+    # (0, 5, 0) is lit, (3, 6, 7) stands on air
+    assert chunk.find_dark_spaces().tolist() == [[3, 5, 7]]
+    assert sorted(chunk.find_dark_spaces(max_light=14).tolist()) == [[0, 5, 0], [3, 5, 7]]
+    # Nothing counts as solid
+    assert len(chunk.find_dark_spaces(solid=lambda name: False)) == 0
+
+def test_region_find_dark_spaces() -> None:
+    region = Region(make_region({(0, 0): compress_nbt(make_cave_chunk()), (1, 2): compress_nbt(make_cave_chunk(33, 2))}))
+    assert sorted(region.find_dark_spaces().tolist()) == [[3, 5, 7], [33 * 16 + 3, 5, 2 * 16 + 7]]
+
+def test_is_solid() -> None:
+    assert is_solid('minecraft:stone')
+    assert is_solid('minecraft:grass_block')
+    assert not is_solid('minecraft:cave_air')
+    assert not is_solid('minecraft:water')
+    assert not is_solid('minecraft:oak_slab')
+    assert not is_solid('minecraft:birch_leaves')
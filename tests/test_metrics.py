@@ -0,0 +1,69 @@
+import context as _
+import logging
+from anvil import metrics, Region, EmptyRegion, Block
+from helpers import compress_nbt, make_region, make_modern_chunk
+
+def sample_region() -> Region:
+    return Region(make_region({
+        (0, 0): compress_nbt(make_modern_chunk(0, 0, {0: ([0] * 4096, ['minecraft:stone'])})),
+        (1, 0): compress_nbt(make_modern_chunk(1, 0, {0: ([i % 2 for i in range(4096)], ['minecraft:stone', 'minecraft:dirt'])})),
+    }))
+
+def test_disabled_without_sinks() -> None:
+    assert not metrics.enabled
+    with metrics.collect() as stats:
+        assert metrics.enabled
+    assert not metrics.enabled
+    Block('stone')
+    assert stats.totals == {}
+
+def test_collect_read_pipeline(tmp_path) -> None:
+    path = tmp_path / 'r.0.0.mca'
+    path.write_bytes(sample_region().data)
+    with metrics.collect() as stats:
+        with Region.open(path) as region:
+            region.count_blocks()
+    assert stats['chunks_parsed'] == 2
+    assert stats['sections_decoded'] == 2
+    assert stats['bytes_read'] > 8192
+    assert stats['bytes_decompressed'] > 0
+    assert stats['nbt_decode_seconds'] > 0
+    assert stats['blocks_allocated'] == 3
+    assert stats.counts['chunks_parsed'] == 2
+
+def test_collect_save() -> None:
+    region = EmptyRegion(0, 0)
+    region.set_block(Block('stone'), 0, 0, 0)
+    region.set_block(Block('stone'), 20, 0, 0)
+    with metrics.collect() as stats:
+        region.save()
+    assert stats['chunks_saved'] == 2
+    assert stats['bytes_compressed'] > 0
+    assert stats['save_compress_seconds'] > 0
+
+def test_callback_and_logging_sinks(caplog) -> None:
+    events = []
+    callback = lambda name, value: events.append(name)
+    log_sink = metrics.logging_sink(level=logging.INFO)
+    metrics.add_sink(callback)
+    metrics.add_sink(log_sink)
+    try:
+        with caplog.at_level(logging.INFO, logger='anvil.metrics'):
+            sample_region().chunk_data(0, 0)
+    finally:
+        metrics.remove_sink(callback)
+        metrics.remove_sink(log_sink)
+    assert not metrics.enabled
+    assert events.count('chunks_parsed') == 1
+    assert any(record.getMessage().startswith('chunks_parsed') for record in caplog.records)
+
+def test_to_array_decodes_sections_in_range() -> None:
+    region = EmptyRegion(0, 0)
+    for y in (0, 20, 40, 60):
+        region.set_block(Block('stone'), 0, y, 0)
+    chunk = Region(region.save()).get_chunk(0, 0)
+    with metrics.collect() as stats:
+        assert chunk.section_range() == (0, 3)
+        blocks, palette = chunk.to_array(lowest=1, highest=2)
+    assert blocks.shape == (32, 16, 16) and (blocks != 0).sum() == 2
+    assert stats['sections_decoded'] == 2
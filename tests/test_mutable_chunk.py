@@ -0,0 +1,93 @@
+import context as _
+from anvil import Region, Chunk, EmptyChunk, MutableChunk, MutableRegion, Block
+from helpers import compress_nbt, make_region, make_modern_chunk, make_legacy_chunk
+from nbt import nbt
+import pytest
+
+STONE = Block('minecraft', 'stone')
+DIRT = Block('minecraft', 'dirt')
+AIR = Block('minecraft', 'air')
+
+def sample_chunk(x: int = 0, z: int = 0) -> nbt.NBTFile:
+    root = make_modern_chunk(x, z, {
+        0: ([i % 2 for i in range(4096)], ['minecraft:stone', 'minecraft:dirt']),
+        1: ([0] * 4096, ['minecraft:stone']),
+    }, y_pos=0)
+    root.tags.append(nbt.TAG_Byte(name='isLightOn', value=1))
+    return root
+
+def sample_region() -> Region:
+    return Region(make_region({
+        (0, 0): compress_nbt(sample_chunk(0, 0)),
+        (1, 0): compress_nbt(sample_chunk(1, 0)),
+    }))
+
+def test_set_block_only_decodes_touched_sections() -> None:
+    chunk = MutableChunk(Chunk(sample_chunk()))
+    untouched = chunk.chunk.get_section(0)['block_states']['data'].value[:]
+    chunk.set_block(AIR, 1, 20, 1)
+    assert chunk.dirty == {1}
+    assert chunk.get_block(1, 20, 1) == AIR
+    assert chunk.get_block(0, 20, 0) == STONE
+
+    saved = Chunk(chunk.save())
+    assert saved.get_section(0)['block_states']['data'].value == untouched
+    assert saved.data['isLightOn'].value == 0
+    blocks, palette = saved.get_section_array(1)
+    assert palette[blocks[4, 1, 1]].id == 'air'
+    assert palette[blocks[0, 0, 0]].id == 'stone'
+
+def test_set_block_new_section() -> None:
+    chunk = MutableChunk(Chunk(sample_chunk()))
+    chunk.set_block(DIRT, 0, 40, 0)
+    saved = Chunk(chunk.save())
+    assert [s['Y'].value for s in saved.data['sections']] == [0, 1, 2]
+    blocks, palette = saved.get_section_array(2)
+    assert palette[blocks[8, 0, 0]].id == 'dirt'
+
+def test_replace() -> None:
+    chunk = MutableChunk(Chunk(sample_chunk()))
+    assert chunk.replace(DIRT, AIR) == 2048
+    assert chunk.dirty == {0}
+    saved = Chunk(chunk.save())
+    assert saved.count_blocks() == {STONE: 6144, AIR: 2048}
+
+def test_rejects_legacy_chunks() -> None:
+    with pytest.raises(ValueError):
+        MutableChunk(Chunk(make_legacy_chunk(0, 0, {0: [(1, 0)] * 4096})))
+
+def test_region_copies_untouched_chunks() -> None:
+    region = sample_region()
+    editable = MutableRegion(region)
+    editable.set_block(AIR, 16, 0, 0)
+    assert editable.get_block(16, 0, 0) == AIR
+
+    saved = Region(editable.save())
+    assert saved.chunk_record(0, 0) == region.chunk_record(0, 0)
+    assert saved.chunk_record(1, 0) != region.chunk_record(1, 0)
+    assert saved.get_chunk(1, 0).count_blocks()[AIR] == 1
+    assert saved.chunk_timestamp(1, 0) > 0
+    assert sorted(saved.generated_chunks()) == [(0, 0), (1, 0)]
+
+def test_region_replace() -> None:
+    editable = MutableRegion(sample_region())
+    assert editable.replace(STONE, DIRT) == 2 * 6144
+    saved = Region(editable.save())
+    assert saved.count_blocks() == {DIRT: 2 * 8192}
+
+def test_keeps_root_tags() -> None:
+    empty = EmptyChunk(0, 0)
+    empty.version = 2586
+    empty.set_block(STONE, 0, 0, 0)
+    root = empty.save()
+    caps = nbt.TAG_Compound(name='ForgeCaps')
+    caps.tags.append(nbt.TAG_Int(name='mod', value=7))
+    root.tags.append(caps)
+    root.tags.append(nbt.TAG_Int(name='ForgeDataVersion', value=1))
+
+    chunk = MutableChunk.from_region(Region(make_region({(0, 0): compress_nbt(root)})), 0, 0)
+    chunk.set_block(DIRT, 0, 0, 0)
+    saved = chunk.save()
+    assert saved['ForgeCaps']['mod'].value == 7 and saved['ForgeDataVersion'].value == 1
+    assert saved['DataVersion'].value == 2586
+    assert Chunk(saved).get_block(0, 0, 0) == DIRT
@@ -0,0 +1,80 @@
+import context as _
+from anvil import EmptyChunk, EmptySection, EmptyRegion, Region, Block
+from anvil.nbt_stream import NBTWriter, encode, read_scalars
+from anvil.errors import CorruptedData
+from helpers import compress_nbt, make_modern_chunk, make_legacy_chunk
+from io import BytesIO
+from nbt import nbt
+import numpy as np
+import zlib
+import pytest
+
+def written(tag: nbt.TAG_Compound) -> bytes:
+    buffer = BytesIO()
+    tag.write_file(buffer=buffer)
+    return buffer.getvalue()
+
+def make_chunk(version: int) -> EmptyChunk:
+    chunk = EmptyChunk(3, 5)
+    chunk.version = version
+    chunk.fill(Block('stone'), 0, 0, 0, 15, 20, 15)
+    chunk.set_block(Block('minecraft', 'oak_log', {'axis': 'x'}), 4, 30, 2)
+    chunk.set_block(Block('minecraft', 'oak_slab', {'waterlogged': True, 'type': 'top'}), 5, 30, 2)
+    # Only air, left out when saving
+    chunk.add_section(EmptySection(5))
+    return chunk
+
+@pytest.mark.parametrize('version', [1976, 2586, 2975])
+def test_encode_chunk(version: int) -> None:
+    chunk = make_chunk(version)
+    assert chunk.encode() == written(chunk.save())
+    assert chunk.encode(True, True) == written(chunk.save(True, True))
+
+def test_encode_tags() -> None:
+    root = nbt.NBTFile()
+    root.tags.append(nbt.TAG_Float(name='f', value=1.5))
+    root.tags.append(nbt.TAG_Double(name='d', value=-2.25))
+    root.tags.append(nbt.TAG_Short(name='s', value=-3))
+    ints = nbt.TAG_Int_Array(name='i')
+    ints.value = [1, -2, 3]
+    root.tags.append(ints)
+    strings = nbt.TAG_List(name='l', type=nbt.TAG_String)
+    strings.tags.append(nbt.TAG_String('é'))
+    root.tags.append(strings)
+    root.tags.append(nbt.TAG_List(name='empty', type=nbt.TAG_Compound))
+    assert encode(root) == written(root)
+
+def test_long_array_sign() -> None:
+    writer = NBTWriter()
+    writer.begin_compound()
+    writer.write_long_array('signed', np.array([-1, -(2**63), 5, -(2**63)], dtype=np.int64))
+    writer.write_long_array('unsigned', np.array([2**64 - 1, 2**63, 5, 2**63], dtype=np.uint64))
+    writer.end_compound()
+    data = writer.buffer
+    signed_start = data.index(b'signed') + len('signed') + 4
+    unsigned_start = data.index(b'unsigned') + len('unsigned') + 4
+    assert data[signed_start:signed_start + 32] == data[unsigned_start:unsigned_start + 32]
+    assert np.frombuffer(data, dtype='>i8', count=4, offset=signed_start).tolist() == [-1, -(2**63), 5, -(2**63)]
+
+def test_region_save() -> None:
+    chunk = make_chunk(2975)
+    region = EmptyRegion(0, 0)
+    region.add_chunk(chunk)
+    assert encode(Region(region.save()).chunk_data(3, 5)) == chunk.encode()
+
+def make_scalars_chunk() -> nbt.NBTFile:
+    root = make_modern_chunk(3, 4, {0: ([1] * 4096, ['minecraft:air', 'minecraft:stone'])})
+    root.tags.append(nbt.TAG_Long(name='InhabitedTime', value=1200))
+    root.tags.append(nbt.TAG_String(name='Status', value='minecraft:full'))
+    return root
+
+def test_read_scalars() -> None:
+    data = zlib.decompress(compress_nbt(make_scalars_chunk()))
+    assert read_scalars(data, ['InhabitedTime', 'Status', 'xPos', 'Missing']) == {
+        'InhabitedTime': 1200, 'Status': 'minecraft:full', 'xPos': 3
+    }
+    legacy = zlib.decompress(compress_nbt(make_legacy_chunk(7, 8, {0: [(1, 0)] * 4096})))
+    assert read_scalars(legacy, ['DataVersion', 'zPos']) == {'DataVersion': 1343, 'zPos': 8}
+    assert read_scalars(data, []) == {}
+    with pytest.raises(CorruptedData):
+        read_scalars(data[:100], ['Missing'])
@@ -0,0 +1,72 @@
+import context as _
+from anvil import PoiRegion, PoiRecords, PoiIndex
+from helpers import compress_nbt, make_region
+from nbt import nbt
+
+def make_poi_chunk(records: dict[int, list[tuple[str, int, int, int, int]]], valid: bool = True) -> bytes:
+    root = nbt.NBTFile()
+    root.tags.append(nbt.TAG_Int(name='DataVersion', value=2975))
+    sections = nbt.TAG_Compound()
+    sections.name = 'Sections'
+    for y, section_records in records.items():
+        section = nbt.TAG_Compound()
+        section.name = str(y)
+        section.tags.append(nbt.TAG_Byte(name='Valid', value=int(valid)))
+        tag = nbt.TAG_List(name='Records', type=nbt.TAG_Compound)
+        for poi_type, x, py, z, tickets in section_records:
+            record = nbt.TAG_Compound()
+            record.tags.append(nbt.TAG_String(name='type', value=poi_type))
+            pos = nbt.TAG_Int_Array(name='pos')
+            pos.value = [x, py, z]
+            record.tags.append(pos)
+            record.tags.append(nbt.TAG_Int(name='free_tickets', value=tickets))
+            tag.tags.append(record)
+        section.tags.append(tag)
+        sections.tags.append(section)
+    root.tags.append(sections)
+    return compress_nbt(root)
+
+def sample_region() -> PoiRegion:
+    return PoiRegion(make_region({
+        (0, 0): make_poi_chunk({4: [('minecraft:home', 1, 70, 1, 1), ('minecraft:armorer', 5, 70, 5, 0)]}),
+        (3, 1): make_poi_chunk({-1: [('minecraft:home', 50, -10, 20, 0)]}),
+        (0, 1): make_poi_chunk({0: [('minecraft:bell', 0, 0, 16, 32)]}, valid=False),
+    }))
+
+def test_records() -> None:
+    records = sample_region().records()
+    assert len(records) == 3
+    assert sorted(records.names()) == ['minecraft:armorer', 'minecraft:home', 'minecraft:home']
+    homes = records.select(records.type_mask('home'))
+    assert sorted(map(tuple, homes.positions.tolist())) == [(1, 70, 1), (50, -10, 20)]
+    assert sorted(homes.free_tickets.tolist()) == [0, 1]
+
+def test_records_include_invalid() -> None:
+    records = sample_region().records(include_invalid=True)
+    assert 'minecraft:bell' in records.names()
+
+def test_concatenate_merges_types() -> None:
+    a = PoiRecords(('minecraft:home',), [0], [(0, 0, 0)], [1])
+    b = PoiRecords(('minecraft:bell', 'minecraft:home'), [1, 0], [(1, 1, 1), (2, 2, 2)], [0, 0])
+    merged = PoiRecords.concatenate([a, b])
+    assert merged.names() == ['minecraft:home', 'minecraft:home', 'minecraft:bell']
+
+def test_nearest() -> None:
+    index = PoiIndex(sample_region().records())
+    nearest = index.nearest(40, 0, 20, types='home')
+    assert nearest.positions.tolist() == [[50, -10, 20]]
+
+    both = index.nearest(0, 70, 0, types=['home', 'armorer'], k=5)
+    assert both.positions.tolist() == [[1, 70, 1], [5, 70, 5], [50, -10, 20]]
+
+    assert len(index.nearest(0, 70, 0, types='home', max_distance=10)) == 1
+    assert len(index.nearest(0, 70, 0, types='bell')) == 0
+
+def test_from_world(tmp_path) -> None:
+    (tmp_path / 'poi').mkdir()
+    (tmp_path / 'poi' / 'r.0.0.mca').write_bytes(make_region({
+        (0, 0): make_poi_chunk({4: [('minecraft:home', 1, 70, 1, 1)]}),
+    }))
+    (tmp_path / 'poi' / 'r.1.0.mca').write_bytes(b'')
+    index = PoiIndex.from_world(tmp_path)
+    assert len(index) == 1
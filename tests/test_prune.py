@@ -0,0 +1,93 @@
+import context as _
+from anvil import Region
+from anvil.prune import prune_region, prune_world, inhabited_for, ChunkSummary
+from anvil.errors import CorruptedData
+from helpers import compress_nbt, make_region, make_modern_chunk
+from nbt import nbt
+import os
+import zlib
+import pytest
+
+def make_chunk(x: int, z: int, inhabited: int) -> nbt.NBTFile:
+    root = make_modern_chunk(x, z, {0: ([1] * 4096, ['minecraft:air', 'minecraft:stone'])})
+    root.tags.append(nbt.TAG_Long(name='InhabitedTime', value=inhabited))
+    root.tags.append(nbt.TAG_String(name='Status', value='minecraft:full'))
+    return root
+
+def write_region(path, region_x: int = 0, region_z: int = 0):
+    chunks = {
+        (0, 0): compress_nbt(make_chunk(region_x * 32, region_z * 32, 0)),
+        (1, 0): compress_nbt(make_chunk(region_x * 32 + 1, region_z * 32, 5000)),
+        (2, 0): compress_nbt(make_chunk(region_x * 32 + 2, region_z * 32, 10)),
+    }
+    path.write_bytes(make_region(chunks))
+
+def test_prune_in_place(tmp_path) -> None:
+    path = tmp_path / 'r.1.0.mca'
+    write_region(path, region_x=1)
+    size = path.stat().st_size
+
+    seen = []
+    def predicate(chunk: ChunkSummary) -> bool:
+        seen.append((chunk.x, chunk.z, chunk.status))
+        return chunk.inhabited_time >= 100
+    report = prune_region(path, predicate)
+    assert seen == [(32, 0, 'minecraft:full'), (33, 0, 'minecraft:full'), (34, 0, 'minecraft:full')]
+    assert report.kept == [(1, 0)] and report.removed == [(0, 0), (2, 0)]
+    assert report.reclaimed == 2 * 4096
+    assert path.stat().st_size == size
+
+    region = Region.from_file(path)
+    assert region.generated_chunks() == [(1, 0)]
+    assert region.chunk_timestamp(0, 0) == 0
+    assert region.get_chunk(1, 0).x == 33
+
+def test_prune_compacted(tmp_path) -> None:
+    path = tmp_path / 'r.0.0.mca'
+    write_region(path)
+    output = tmp_path / 'out' / 'r.0.0.mca'
+    output.parent.mkdir()
+
+    report = prune_region(path, inhabited_for(100), output=output)
+    assert report.reclaimed == path.stat().st_size - output.stat().st_size == 2 * 4096
+    with Region.open(path) as original:
+        assert Region.from_file(output).chunk_record(1, 0) == original.chunk_record(1, 0)
+
+def test_prune_headers_only(tmp_path) -> None:
+    path = tmp_path / 'r.0.0.mca'
+    write_region(path)
+    report = prune_region(path, lambda chunk: chunk.x == 2 and not chunk.tags, tags=())
+    assert report.kept == [(2, 0)]
+
+def test_prune_corrupted(tmp_path) -> None:
+    path = tmp_path / 'r.0.0.mca'
+    path.write_bytes(make_region({(0, 0): zlib.compress(b'not nbt'), (1, 0): compress_nbt(make_chunk(1, 0, 0))}))
+    with pytest.raises(CorruptedData):
+        prune_region(path, inhabited_for(100))
+
+    report = prune_region(path, inhabited_for(100), errors='collect')
+    assert report.kept == [(0, 0)] and report.removed == [(1, 0)]
+    assert report.errors[0].chunk == (0, 0)
+
+def test_prune_world(tmp_path) -> None:
+    write_region(tmp_path / 'r.0.0.mca')
+    write_region(tmp_path / 'r.-1.0.mca', region_x=-1)
+    (tmp_path / 'r.3.3.mca').write_bytes(b'')
+
+    reports = prune_world(tmp_path, inhabited_for(10), compact=True, jobs=2)
+    assert [report.removed for report in reports] == [[(0, 0)], [(0, 0)]]
+    assert Region.from_file(tmp_path / 'r.-1.0.mca').generated_chunks() == [(1, 0), (2, 0)]
+    assert reports[0].to_dict()['removed'] == 1
+
+def test_prune_compacted_failed_write(tmp_path, monkeypatch) -> None:
+    path = tmp_path / 'r.0.0.mca'
+    write_region(path)
+    original = path.read_bytes()
+
+    def replace(source, destination):
+        raise OSError('No space left on device')
+    monkeypatch.setattr(os, 'replace', replace)
+    with pytest.raises(OSError):
+        prune_region(path, inhabited_for(100), output=path)
+    assert path.read_bytes() == original
+    assert [file.name for file in tmp_path.iterdir()] == ['r.0.0.mca']
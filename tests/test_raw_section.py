@@ -0,0 +1,51 @@
+import context as _
+from anvil import RawSection, EmptyChunk, EmptyRegion, Region, Block
+from anvil.utils import unpack_states
+import numpy as np
+import array
+import pytest
+
+PALETTE = (Block('air'), Block('stone'), Block('dirt'))
+
+def test_numpy_blocks_are_not_copied() -> None:
+    blocks = np.zeros((16, 16, 16), dtype=np.uint16)
+    section = RawSection(0, blocks, PALETTE)
+    assert np.shares_memory(section.blocks, blocks)
+
+def test_accepts_buffers_and_iterables() -> None:
+    assert RawSection(0, array.array('B', [1] * 4096), PALETTE).blocks.sum() == 4096
+    assert RawSection(0, [2] * 4096, PALETTE).blocks.sum() == 2 * 4096
+    assert RawSection(0, (1 for _ in range(4096)), PALETTE).blocks.sum() == 4096
+
+@pytest.mark.parametrize('blocks', [
+    np.zeros(100, dtype=np.uint8),
+    np.full(4096, 3, dtype=np.uint8),
+    np.full(4096, -1, dtype=np.int32),
+    np.zeros(4096, dtype=np.float32),
+])
+def test_validation(blocks) -> None:
+    with pytest.raises(ValueError):
+        RawSection(0, blocks, PALETTE)
+
+@pytest.mark.parametrize('stretches', [True, False])
+def test_blockstates_layouts(stretches: bool) -> None:
+    blocks = np.random.randint(0, len(PALETTE), 4096)
+    states = RawSection(0, blocks, PALETTE).blockstates(stretches=stretches)
+    assert np.array_equal(unpack_states(states, 4, stretches=stretches), blocks)
+
+@pytest.mark.parametrize('version', [1976, 2586, 2975])
+def test_chunk_from_array_round_trip(version: int) -> None:
+    palette = tuple(Block(f'wool_{i}') for i in range(40)) + (Block('air'),)
+    blocks = np.full((48, 16, 16), 40, dtype=np.uint16)
+    blocks[:16] = np.random.randint(0, 40, (16, 16, 16))
+    blocks[40, 3, 4] = 7
+
+    chunk = EmptyChunk.from_array(0, 0, blocks, palette)
+    chunk.version = version
+    # The all air section in the middle is left out
+    assert [s.y for s in chunk.sections if s] == [0, 2]
+
+    region = EmptyRegion(0, 0)
+    region.add_chunk(chunk)
+    read, read_palette = Region(region.save()).get_chunk(0, 0).to_array(0, 2)
+    assert [read_palette[i] for i in read.reshape(-1).tolist()] == [palette[i] for i in blocks.reshape(-1).tolist()]
@@ -1,11 +1,13 @@
-from anvil.errors import EmptyRegionFile, InvalidFileType
+from anvil.errors import EmptyRegionFile, InvalidFileType, CorruptedData
 from anvil.empty_region import EmptyRegion
 from anvil.empty_chunk import EmptyChunk
 import context as _
 import pytest
-from anvil import Region
+from anvil import Region, Block
+from helpers import compress_nbt, make_region, make_modern_chunk
 import io
 import secrets
+import zlib
 
 # TODO: Implement tests for anvil/region.py
 #
@@ -103,8 +105,95 @@ def test_chunk_data_handle_unsupported_gzip() -> None:
 def test_chunk_data_handle_empty_region() -> None:
     pass
 
+def _corrupted_region() -> bytes:
+    good = compress_nbt(make_modern_chunk(0, 0, {0: ([1] * 4096, ['minecraft:air', 'minecraft:stone'])}))
+    return make_region({
+        (0, 0): good,
+        # Compound named with invalid UTF-8, then a lot of data
+        (1, 0): zlib.compress(b'\x0a\x00\x02\xff\xfe' + bytes(1 << 20)),
+        (2, 0): b'not zlib data at all',
+    })
+
 def test_chunk_data_handle_unicode_decode_error() -> None:
-    pass
+    region = Region(_corrupted_region())
+    with pytest.raises(CorruptedData) as info:
+        region.chunk_data(1, 0)
+    error = info.value
+    assert 'UnicodeDecodeError' in error.message
+    assert error.chunk == (1, 0)
+    assert error.offset == 3 * 4096
+    assert error.compression == 2
+    assert error.prefix == '0a0002fffe' + '00' * 11
+    assert error.data is None
+    # Not chained to the UnicodeDecodeError, which holds the whole decompressed data
+    assert error.__context__ is None and error.__cause__ is None
 
 def test_chunk_data_handle_corrupted_data() -> None:
-    pass
+    region = Region(_corrupted_region(), include_raw=True)
+    with pytest.raises(CorruptedData) as info:
+        region.chunk_data(2, 0)
+    error = info.value
+    assert 'decompress' in error.message
+    assert error.chunk == (2, 0)
+    assert error.length == len(b'not zlib data at all') + 1
+    assert error.prefix == b'not zlib data at'.hex()
+    assert error.data == region.chunk_record(2, 0)
+    assert 'chunk=(2, 0)' in str(error)
+
+def test_corrupted_chunks_policy(tmp_path) -> None:
+    path = tmp_path / 'r.0.0.mca'
+    path.write_bytes(_corrupted_region())
+
+    with pytest.raises(CorruptedData):
+        Region.from_file(path).count_blocks()
+
+    region = Region.from_file(path, errors='skip')
+    assert region.count_blocks()[Block('stone')] == 4096
+    assert region.corrupted == []
+
+    with Region.open(path, errors='collect') as region:
+        assert [chunk.x for chunk in region.iter_chunks()] == [0]
+        assert region.count_blocks()[Block('stone')] == 4096
+    assert [error.chunk for error in region.corrupted] == [(1, 0), (2, 0)] * 2
+    assert all(error.path == str(path) and error.__traceback__ is None for error in region.corrupted)
+
+    with pytest.raises(ValueError):
+        Region(_corrupted_region(), errors='ignore')
+    with pytest.raises(ValueError):
+        Region.from_file(path, errors='ignore')
+
+    # Records past the end of the file, or cut short by it
+    data = bytearray(_corrupted_region())
+    data[12:16] = (500).to_bytes(3, 'big') + b'\x01'
+    data[16:20] = (len(data) // 4096).to_bytes(3, 'big') + b'\x01'
+    data += (100000).to_bytes(4, 'big') + b'\x02' + bytes(11)
+    with pytest.raises(CorruptedData, match='truncated or past the end'):
+        Region(bytes(data)).chunk_data(3, 0)
+    region = Region(bytes(data), errors='collect')
+    assert [chunk.x for chunk in region.iter_chunks()] == [0]
+    assert [error.chunk for error in region.corrupted] == [(1, 0), (2, 0), (3, 0), (4, 0)]
+    assert region.corrupted[2].offset == 500 * 4096 and region.corrupted[2].length is None
+    assert region.corrupted[3].length == 100000 and region.corrupted[3].compression == 2
+    assert Region(bytes(data), errors='skip').count_blocks()[Block('stone')] == 4096
+
+def test_to_array() -> None:
+    empty_region = EmptyRegion(0, 0)
+    empty_region.set_block(Block('stone'), 0, 0, 0)
+    empty_region.set_block(Block('dirt'), 511, 17, 33)
+    region = Region(empty_region.save())
+
+    blocks, palette = region.to_array()
+    assert blocks.shape == (32, 512, 512)
+    assert palette[blocks[0, 0, 0]] == Block('stone')
+    assert palette[blocks[17, 33, 511]] == Block('dirt')
+    assert (blocks != 0).sum() == 2
+
+def test_count_and_find_blocks() -> None:
+    empty_region = EmptyRegion(1, 0)
+    empty_region.set_block(Block('diamond_ore'), 512 + 40, 5, 70)
+    empty_region.set_block(Block('diamond_ore'), 1000, 100, 3)
+    region = Region(empty_region.save())
+
+    assert region.count_blocks()[Block('diamond_ore')] == 2
+    coords = region.find_blocks(lambda name: name == 'minecraft:diamond_ore')
+    assert sorted(map(tuple, coords.tolist())) == [(552, 5, 70), (1000, 100, 3)]
@@ -0,0 +1,157 @@
+import context as _
+from anvil import Region, Chunk, EmptyRegion, Block
+from anvil.relocate import translate_chunk_data, translate_chunk, relocate_region, relocate_regions, region_position
+from anvil.errors import CorruptedData
+from helpers import compress_nbt, make_region, make_modern_chunk, make_legacy_chunk
+from nbt import nbt
+import zlib
+import pytest
+
+def add_block_entity(root: nbt.TAG_Compound, name: str, x: int, y: int, z: int):
+    entity = nbt.TAG_Compound()
+    entity.tags.append(nbt.TAG_String(name='id', value='minecraft:chest'))
+    for key, value in (('x', x), ('y', y), ('z', z)):
+        entity.tags.append(nbt.TAG_Int(name=key, value=value))
+    root[name].tags.append(entity)
+
+def make_entity(x: float, y: float, z: float) -> nbt.TAG_Compound:
+    entity = nbt.TAG_Compound()
+    entity.tags.append(nbt.TAG_String(name='id', value='minecraft:pig'))
+    pos = nbt.TAG_List(name='Pos', type=nbt.TAG_Double)
+    pos.tags.extend(nbt.TAG_Double(value) for value in (x, y, z))
+    entity.tags.append(pos)
+    return entity
+
+def make_chunk(x: int, z: int) -> nbt.NBTFile:
+    root = make_modern_chunk(x, z, {0: ([1] * 4096, ['minecraft:air', 'minecraft:stone'])})
+    add_block_entity(root, 'block_entities', x * 16 + 1, 5, z * 16 + 2)
+    return root
+
+def test_translate_chunk_data() -> None:
+    root = make_chunk(3, 4)
+    data = zlib.decompress(compress_nbt(root))
+    moved = Region.parse_chunk_bytes(translate_chunk_data(data, 32, -64))
+    assert moved['xPos'].value == 35 and moved['zPos'].value == -60
+    entity = moved['block_entities'][0]
+    assert (entity['x'].value, entity['y'].value, entity['z'].value) == (35 * 16 + 1, 5, -60 * 16 + 2)
+    assert moved['sections'][0]['block_states']['data'].value == root['sections'][0]['block_states']['data'].value
+
+def test_translate_entities() -> None:
+    root = make_legacy_chunk(1, 1, {0: [(1, 0)] * 4096})
+    level = root['Level']
+    level.tags.append(nbt.TAG_List(name='TileEntities', type=nbt.TAG_Compound))
+    entities = nbt.TAG_List(name='Entities', type=nbt.TAG_Compound)
+    pig = make_entity(20.5, 64.0, 30.25)
+    passengers = nbt.TAG_List(name='Passengers', type=nbt.TAG_Compound)
+    passengers.tags.append(make_entity(20.5, 65.0, 30.25))
+    pig.tags.append(passengers)
+    entities.tags.append(pig)
+    level.tags.append(entities)
+    add_block_entity(level, 'TileEntities', 17, 3, 18)
+
+    moved = Region.parse_chunk_bytes(translate_chunk_data(zlib.decompress(compress_nbt(root)), -1, 2))
+    level = moved['Level']
+    assert (level['xPos'].value, level['zPos'].value) == (0, 3)
+    pig = level['Entities'][0]
+    assert [tag.value for tag in pig['Pos']] == [4.5, 64.0, 62.25]
+    assert [tag.value for tag in pig['Passengers'][0]['Pos']] == [4.5, 65.0, 62.25]
+    assert (level['TileEntities'][0]['x'].value, level['TileEntities'][0]['z'].value) == (1, 50)
+
+def test_translate_chunk() -> None:
+    chunk = Chunk(make_chunk(0, 1))
+    moved = translate_chunk(chunk, 5, 0)
+    assert (moved.x, moved.z) == (5, 1)
+    assert chunk.x == 0
+    assert moved.get_block(0, 0, 0) == Block('stone')
+
+    region = EmptyRegion(0, 0)
+    region.add_chunk(moved)
+    assert Region(region.save()).get_chunk(5, 1).x == 5
+
+def test_corrupted_data() -> None:
+    data = zlib.decompress(compress_nbt(make_chunk(0, 0)))
+    with pytest.raises(CorruptedData):
+        translate_chunk_data(data[:100], 1, 1)
+
+def test_relocate_region(tmp_path) -> None:
+    source = tmp_path / 'r.0.-1.mca'
+    source.write_bytes(make_region({(3, 4): compress_nbt(make_chunk(3, -28))}))
+
+    data = relocate_region(source, 2, 1, tmp_path / 'r.2.1.mca')
+    chunk = Region.from_file(tmp_path / 'r.2.1.mca').get_chunk(3, 4)
+    assert (chunk.x, chunk.z) == (67, 36)
+    assert chunk.tile_entities[0]['x'].value == 67 * 16 + 1
+
+    # Staying in place copies the records
+    with Region.open(source) as region:
+        assert Region(relocate_region(region, 0, -1)).chunk_record(3, 4) == region.chunk_record(3, 4)
+    assert Region(data).chunk_record(0, 0) is None
+
+    with pytest.raises(ValueError):
+        relocate_region(Region(source.read_bytes()), 1, 1)
+
+def test_relocate_regions(tmp_path) -> None:
+    templates = tmp_path / 'templates'
+    templates.mkdir()
+    (templates / 'r.0.0.mca').write_bytes(make_region({(0, 0): compress_nbt(make_chunk(0, 0))}))
+    (templates / 'r.1.0.mca').write_bytes(b'')
+
+    written = relocate_regions({templates / 'r.0.0.mca': (-3, 7), templates / 'r.1.0.mca': (4, 4)}, tmp_path / 'world')
+    assert [path.name for path in written] == ['r.-3.7.mca']
+    assert Region.from_file(tmp_path / 'world' / 'r.-3.7.mca').get_chunk(0, 0).z == 7 * 32
+
+    # The same template placed twice
+    moves = [(templates / 'r.0.0.mca', (-3, 7)), (str(templates / 'r.0.0.mca'), (5, 5))]
+    written = relocate_regions(moves, tmp_path / 'world', jobs=2)
+    assert [path.name for path in written] == ['r.-3.7.mca', 'r.5.5.mca']
+    assert Region.from_file(tmp_path / 'world' / 'r.5.5.mca').get_chunk(0, 0).x == 5 * 32
+
+def make_entity_chunk(x: int, z: int) -> nbt.NBTFile:
+    root = nbt.NBTFile()
+    root.tags.append(nbt.TAG_Int(name='DataVersion', value=3465))
+    position = nbt.TAG_Int_Array(name='Position')
+    position.value = [x, z]
+    root.tags.append(position)
+    pig = make_entity(x * 16 + 1.5, 64.0, z * 16 + 1.5)
+    uuid = nbt.TAG_Int_Array(name='UUID')
+    uuid.value = [1, 2, 3, 4]
+    pig.tags.append(uuid)
+    rider = make_entity(x * 16 + 1.5, 65.0, z * 16 + 1.5)
+    rider.tags.append(nbt.TAG_Long(name='UUIDMost', value=5))
+    rider.tags.append(nbt.TAG_Long(name='UUIDLeast', value=6))
+    passengers = nbt.TAG_List(name='Passengers', type=nbt.TAG_Compound)
+    passengers.tags.append(rider)
+    pig.tags.append(passengers)
+    entities = nbt.TAG_List(name='Entities', type=nbt.TAG_Compound)
+    entities.tags.append(pig)
+    root.tags.append(entities)
+    return root
+
+def test_fresh_uuids(tmp_path) -> None:
+    data = zlib.decompress(compress_nbt(make_entity_chunk(0, 0)))
+    kept = Region.parse_chunk_bytes(translate_chunk_data(data, 1, 0))
+    assert list(kept['Entities'][0]['UUID'].value) == [1, 2, 3, 4]
+
+    copies = [Region.parse_chunk_bytes(translate_chunk_data(data, 1, 0, fresh_uuids=True)) for _ in range(2)]
+    uuids = [list(copy['Entities'][0]['UUID'].value) for copy in copies]
+    assert [1, 2, 3, 4] not in uuids and uuids[0] != uuids[1]
+    rider = copies[0]['Entities'][0]['Passengers'][0]
+    assert (rider['UUIDMost'].value, rider['UUIDLeast'].value) != (5, 6)
+    assert list(copies[0]['Position'].value) == [1, 0]
+
+    # Entity files placed twice, only the copy gets new UUIDs
+    entities = tmp_path / 'entities'
+    entities.mkdir()
+    (entities / 'r.0.0.mca').write_bytes(make_region({(0, 0): compress_nbt(make_entity_chunk(0, 0))}))
+    moves = [(entities / 'r.0.0.mca', (0, 0)), (entities / 'r.0.0.mca', (1, 0))]
+    relocate_regions(moves, tmp_path / 'world')
+    with Region.open(entities / 'r.0.0.mca') as original:
+        assert Region.from_file(tmp_path / 'world' / 'r.0.0.mca').chunk_record(0, 0) == original.chunk_record(0, 0)
+    copy = Region.parse_chunk_bytes(Region.from_file(tmp_path / 'world' / 'r.1.0.mca').chunk_bytes(0, 0))
+    assert list(copy['Position'].value) == [32, 0]
+    assert list(copy['Entities'][0]['UUID'].value) != [1, 2, 3, 4]
+
+def test_region_position() -> None:
+    assert region_position('world/region/r.-1.20.mca') == (-1, 20)
+    with pytest.raises(ValueError):
+        region_position('level.dat')
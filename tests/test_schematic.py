@@ -0,0 +1,162 @@
+import context as _
+from anvil import Region, EmptyRegion, Block
+from anvil.schematic import Schematic, STRUCTURE_VOID, decode_varints, encode_varints
+from anvil.export import parse_block_state, block_state
+from anvil.errors import CorruptedData, OutOfBoundsCoordinates
+from io import BytesIO
+from nbt import nbt
+import gzip
+import numpy as np
+import pytest
+
+def make_schematic() -> Schematic:
+    palette = (Block('air'), Block('stone'), Block('minecraft', 'oak_log', {'axis': 'z'}), Block('chest'))
+    blocks = np.zeros((3, 4, 5), dtype=np.uint16)
+    blocks[0] = 1
+    blocks[1, 2, 3] = 2
+    blocks[2, 3, 4] = 3
+    chest = nbt.TAG_Compound()
+    chest.tags.append(nbt.TAG_String(name='id', value='minecraft:chest'))
+    for name, value in zip('xyz', (4, 2, 3)):
+        chest.tags.append(nbt.TAG_Int(name=name, value=value))
+    chest.tags.append(nbt.TAG_String(name='CustomName', value='"Loot"'))
+    return Schematic(blocks, palette, [chest], version=3465)
+
+def assert_same(schematic: Schematic, expected: Schematic):
+    assert schematic.size == expected.size == (5, 3, 4)
+    assert schematic.version == expected.version
+    palette = np.array([block_state(block) for block in schematic.palette])
+    expected_palette = np.array([block_state(block) for block in expected.palette])
+    assert (palette[schematic.blocks] == expected_palette[expected.blocks]).all()
+    [chest] = schematic.block_entities
+    assert chest['id'].value == 'minecraft:chest'
+    assert (chest['x'].value, chest['y'].value, chest['z'].value) == (4, 2, 3)
+    assert chest['CustomName'].value == '"Loot"'
+
+def test_structure_round_trip(tmp_path) -> None:
+    schematic = make_schematic()
+    schematic.save(tmp_path / 'build.nbt')
+    loaded = Schematic.from_file(tmp_path / 'build.nbt')
+    assert_same(loaded, schematic)
+    assert STRUCTURE_VOID not in loaded.palette
+
+    # Read with the nbt library too
+    root = nbt.NBTFile(buffer=BytesIO(gzip.decompress((tmp_path / 'build.nbt').read_bytes())))
+    assert [tag.value for tag in root['size'].tags] == [5, 3, 4]
+    assert len(root['blocks']) == 60
+
+def test_structure_voids() -> None:
+    palette = (Block('stone'), STRUCTURE_VOID)
+    blocks = np.ones((2, 2, 2), dtype=np.uint16)
+    blocks[1, 1, 0] = 0
+    data = Schematic(blocks, palette).to_structure()
+    root = nbt.NBTFile(buffer=BytesIO(gzip.decompress(data)))
+    assert len(root['blocks']) == 1
+    assert [tag.value for tag in root['blocks'][0]['pos'].tags] == [0, 1, 1]
+
+    loaded = Schematic.from_structure(data)
+    assert loaded.palette[loaded.blocks[1, 1, 0]] == Block('stone')
+    assert loaded.palette[loaded.blocks[0, 0, 0]] == STRUCTURE_VOID
+
+def test_structure_mixed_layouts() -> None:
+    # Blocks with extra tags and block entities in between runs of plain blocks
+    root = nbt.NBTFile()
+    size = nbt.TAG_List(name='size', type=nbt.TAG_Int)
+    size.tags.extend(nbt.TAG_Int(value) for value in (10, 1, 10))
+    root.tags.append(size)
+    palette = nbt.TAG_List(name='palette', type=nbt.TAG_Compound)
+    for name in ('minecraft:stone', 'minecraft:dirt', 'minecraft:chest'):
+        entry = nbt.TAG_Compound()
+        entry.tags.append(nbt.TAG_String(name='Name', value=name))
+        palette.tags.append(entry)
+    root.tags.append(palette)
+    blocks = nbt.TAG_List(name='blocks', type=nbt.TAG_Compound)
+    for i in range(100):
+        block = nbt.TAG_Compound()
+        if i % 17 == 5:
+            block.tags.append(nbt.TAG_Int(name='state', value=2))
+            data = nbt.TAG_Compound()
+            data.name = 'nbt'
+            data.tags.append(nbt.TAG_String(name='id', value='minecraft:chest'))
+            block.tags.append(data)
+        else:
+            block.tags.append(nbt.TAG_Int(name='state', value=i % 2))
+        if i % 31 == 7:
+            block.tags.append(nbt.TAG_Byte(name='extra', value=1))
+        pos = nbt.TAG_List(name='pos', type=nbt.TAG_Int)
+        pos.tags.extend(nbt.TAG_Int(value) for value in (i % 10, 0, i // 10))
+        block.tags.append(pos)
+        blocks.tags.append(block)
+    root.tags.append(blocks)
+    buffer = BytesIO()
+    root.write_file(buffer=buffer)
+
+    loaded = Schematic.from_structure(buffer.getvalue())
+    expected = np.arange(100) % 2
+    expected[np.arange(100) % 17 == 5] = 2
+    assert loaded.blocks.reshape(-1).tolist() == expected.tolist()
+    assert len(loaded.block_entities) == 6
+    assert loaded.version == 1976
+
+def test_sponge_round_trip(tmp_path) -> None:
+    schematic = make_schematic()
+    schematic.offset = (1, -2, 3)
+    for version in (2, 3):
+        schematic.to_sponge(tmp_path / 'build.schem', version=version)
+        loaded = Schematic.from_file(tmp_path / 'build.schem')
+        assert_same(loaded, schematic)
+        assert loaded.offset == (1, -2, 3)
+
+    root = nbt.NBTFile(buffer=BytesIO(gzip.decompress((tmp_path / 'build.schem').read_bytes())))
+    assert root['Schematic']['Version'].value == 3
+    assert root['Schematic']['Blocks']['Palette']['minecraft:oak_log[axis=z]'].value == 2
+
+def test_varints() -> None:
+    values = np.array([0, 1, 127, 128, 300, 16383, 16384, 65535, 2**21 + 5], dtype=np.uint32)
+    data = encode_varints(values)
+    assert data[:5] == bytes([0, 1, 127, 0x80, 1])
+    assert decode_varints(data).tolist() == values.tolist()
+    assert decode_varints(bytes([5, 6])).tolist() == [5, 6]
+    with pytest.raises(CorruptedData):
+        decode_varints(bytes([0x80]))
+    with pytest.raises(CorruptedData):
+        decode_varints(bytes([1, 2]), count=3)
+
+def test_from_region() -> None:
+    region = EmptyRegion(0, 0)
+    region.fill(Block('stone'), 10, 0, 10, 20, 3, 20)
+    region.set_block(Block('minecraft', 'oak_log', {'axis': 'x'}), 17, 2, 18)
+    data = Region(region.save())
+
+    schematic = Schematic.from_region(data, 20, 1, 21, 15, 2, 16)
+    assert schematic.size == (6, 2, 6)
+    palette = [block_state(block) for block in schematic.palette]
+    assert palette[schematic.blocks[1, 2, 2]] == 'minecraft:oak_log[axis=x]'
+    assert palette[schematic.blocks[0, 0, 0]] == 'minecraft:stone'
+    # Z 21 is outside the filled area
+    assert palette[schematic.blocks[0, 5, 0]] == 'minecraft:air'
+
+    # Pasted back somewhere else
+    pasted = EmptyRegion(0, 0)
+    pasted.paste(schematic, (100, 50, 100))
+    blocks, palette = pasted.to_array(lowest=0)
+    assert block_state(palette[blocks[51, 102, 102]]) == 'minecraft:oak_log[axis=x]'
+
+    with pytest.raises(OutOfBoundsCoordinates):
+        Schematic.from_region(data, 500, 0, 0, 520, 10, 10)
+
+def test_parse_block_state() -> None:
+    block = parse_block_state('minecraft:oak_stairs[facing=east,half=top]')
+    assert block == Block('minecraft', 'oak_stairs', {'facing': 'east', 'half': 'top'})
+    assert parse_block_state('stone') == Block('stone')
+    assert block_state(Block('minecraft', 'oak_slab', {'waterlogged': True})) == 'minecraft:oak_slab[waterlogged=true]'
+    with pytest.raises(ValueError):
+        parse_block_state('minecraft:stone[broken')
+
+def test_invalid_files() -> None:
+    with pytest.raises(CorruptedData):
+        Schematic.from_structure(b'\x0a\x00\x00\x00')
+    with pytest.raises(CorruptedData):
+        Schematic.from_sponge(b'\x0a\x00\x00\x00')
+    with pytest.raises(ValueError):
+        Schematic.from_file('build.txt')
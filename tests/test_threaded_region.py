@@ -0,0 +1,94 @@
+import context as _
+from concurrent.futures import ThreadPoolExecutor
+import os
+import random
+import sys
+from anvil import Region, EntityRegion
+from anvil.errors import EmptyRegionFile
+from helpers import compress_nbt, make_region, make_modern_chunk
+import pytest
+
+# These run on both the regular and the free-threaded (no GIL) builds of CPython,
+# the switch interval only matters for the first, where it makes threads interleave more often
+THREADS = 16
+ROUNDS = 20
+
+@pytest.fixture
+def region_file(tmp_path):
+    chunks = {}
+    for i in range(64):
+        x, z = i % 8, i // 8
+        # Different palettes and sizes for every chunk, so mixed up reads can't go unnoticed
+        names = [f'minecraft:block_{j}' for j in range(i % 7 + 2)]
+        indexes = [(j * (i + 1)) % len(names) for j in range(4096)]
+        chunks[x, z] = compress_nbt(make_modern_chunk(x, z, {0: (indexes, names)}))
+    path = tmp_path / 'r.0.0.mca'
+    path.write_bytes(make_region(chunks))
+    return path
+
+@pytest.fixture
+def fast_switching():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+def test_open_matches_from_file(region_file) -> None:
+    expected = Region.from_file(region_file)
+    with Region.open(region_file) as region:
+        assert len(region.data) == 8192
+        assert region.generated_chunks() == expected.generated_chunks()
+        for x, z in expected.generated_chunks():
+            assert region.chunk_record(x, z) == expected.chunk_record(x, z)
+        assert region.chunk_record(20, 20) is None
+        assert region.get_chunk(3, 2).count_blocks() == expected.get_chunk(3, 2).count_blocks()
+
+def test_reads_ignore_file_position(region_file) -> None:
+    with Region.open(region_file) as region:
+        os.lseek(region._fd, 12345, os.SEEK_SET)
+        assert region.chunk_data(1, 1) is not None
+    assert region._fd is None
+
+def test_open_empty_file(tmp_path) -> None:
+    path = tmp_path / 'r.0.0.mca'
+    path.write_bytes(b'')
+    with pytest.raises(EmptyRegionFile):
+        Region.open(path)
+
+def test_entity_region_open_reads_position(tmp_path, region_file) -> None:
+    path = tmp_path / 'r.-2.5.mca'
+    path.write_bytes(region_file.read_bytes())
+    with EntityRegion.open(path) as region:
+        assert (region.x, region.z) == (-2, 5)
+
+def test_concurrent_readers(region_file, fast_switching) -> None:
+    expected_region = Region.from_file(region_file)
+    coords = expected_region.generated_chunks()
+    expected = {xz: expected_region.chunk_record(*xz) for xz in coords}
+    blocks = {xz: expected_region.get_chunk(*xz).count_blocks() for xz in coords[:8]}
+
+    with Region.open(region_file) as region:
+        def read(seed: int) -> int:
+            order = coords[:]
+            random.Random(seed).shuffle(order)
+            for _ in range(ROUNDS):
+                for xz in order:
+                    assert region.chunk_record(*xz) == expected[xz]
+                for xz in order[:2]:
+                    if xz in blocks:
+                        assert region.get_chunk(*xz).count_blocks() == blocks[xz]
+            return len(order)
+
+        with ThreadPoolExecutor(max_workers=THREADS) as pool:
+            assert sum(pool.map(read, range(THREADS))) == THREADS * len(coords)
+
+def test_concurrent_in_memory_readers(region_file, fast_switching) -> None:
+    region = Region.from_file(region_file)
+    expected = region.to_array()
+
+    def read(_) -> bool:
+        blocks, palette = region.to_array()
+        return (blocks == expected[0]).all() and palette == expected[1]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert all(pool.map(read, range(8)))
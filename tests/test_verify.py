@@ -0,0 +1,61 @@
+import context as _
+from anvil import Region
+from anvil.verify import verify_region, salvage_region
+from helpers import compress_nbt, make_region, make_modern_chunk
+
+def sample_data() -> bytearray:
+    return bytearray(make_region({
+        (x, 0): compress_nbt(make_modern_chunk(x, 0, {0: ([0] * 4096, ['minecraft:stone'])}))
+        for x in range(4)
+    }))
+
+def set_location(data: bytearray, index: int, offset: int, sectors: int) -> None:
+    data[index * 4 : index * 4 + 4] = offset.to_bytes(3, 'big') + bytes([sectors])
+
+def kinds(report) -> dict:
+    return {issue.chunk: issue.kind for issue in report.issues}
+
+def test_valid_region() -> None:
+    report = verify_region(bytes(sample_data()))
+    assert report.ok
+    assert report.chunks == 4
+    assert report.valid == [(0, 0), (1, 0), (2, 0), (3, 0)]
+
+def test_header_problems() -> None:
+    data = sample_data()
+    set_location(data, 1, 1, 1)
+    set_location(data, 2, 500, 1)
+    set_location(data, 3, 2, 1)
+    report = verify_region(bytes(data))
+    assert kinds(report) == {(1, 0): 'header', (2, 0): 'past_eof', (0, 0): 'overlap', (3, 0): 'overlap'}
+    assert report.valid == []
+
+def test_zlib_and_length_problems() -> None:
+    data = sample_data()
+    # Corrupt the stream of the first chunk, and give the second one a length longer than its sectors
+    data[8192 + 20 : 8192 + 30] = bytes(10)
+    data[8192 + 4096 : 8192 + 4096 + 4] = (5000).to_bytes(4, 'big')
+    data[8192 + 2 * 4096 + 4] = 9
+    report = verify_region(bytes(data), jobs=2)
+    assert kinds(report) == {(0, 0): 'zlib', (1, 0): 'length', (2, 0): 'compression'}
+    assert report.valid == [(3, 0)]
+
+def test_small_file() -> None:
+    report = verify_region(b'\x00' * 100)
+    assert [issue.kind for issue in report.issues] == ['file']
+
+def test_salvage(tmp_path) -> None:
+    data = sample_data()
+    data[4096 + 8 : 4096 + 12] = (1234).to_bytes(4, 'big')
+    data[8192 + 20 : 8192 + 30] = bytes(10)
+    (tmp_path / 'r.0.0.mca').write_bytes(bytes(data))
+
+    clean, report = salvage_region(tmp_path / 'r.0.0.mca', tmp_path / 'clean.mca')
+    assert not report.ok
+    assert (tmp_path / 'clean.mca').read_bytes() == clean
+    assert verify_region(clean).ok
+
+    region = Region(clean)
+    assert sorted(region.generated_chunks()) == [(1, 0), (2, 0), (3, 0)]
+    assert region.chunk_timestamp(2, 0) == 1234
+    assert region.get_chunk(3, 0).x == 3